@@ -0,0 +1,250 @@
+"""
+Asyncio ASGI entry point of the API server.
+
+Messages are ingested by native async handlers driving the control center directly,
+without the Flask request cycle, in the event loop's thread pool so that applying them
+never blocks the loop. Every other route is served by the Flask app through
+a WSGI bridge running in a thread pool of its own, so both servers expose the same
+routes on the same control center, and long-lived event streams never hold the threads
+messages are applied in. The bridge stops reading a response as soon as its client
+disconnects and closes it, which releases the subscription of a fleet stream.
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+import io
+import json
+import logging
+import sys
+from typing import Awaitable, Callable
+from control_center import ControlCenter
+from ingest_pipeline import IngestPipeline, MESSAGE_INVALID, MESSAGE_REJECTED
+from message_codec import decode_batch, loads
+
+Scope = dict
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+# Threads serving the Flask routes, requests wait for one once they are all busy. Each open
+# fleet stream holds one while it waits for changes
+DEFAULT_BRIDGE_WORKERS = 32
+
+def create_asgi_app(flask_app, control_center: ControlCenter, ingest_pipeline: IngestPipeline | None = None,
+                    bridge_workers: int = DEFAULT_BRIDGE_WORKERS) -> Callable[[Scope, Receive, Send], Awaitable[None]]:
+    """
+    Creates the ASGI application.
+
+    Args:
+        flask_app: The Flask app serving the routes other than message ingestion
+        control_center (ControlCenter): The control center messages are applied to
+        ingest_pipeline (IngestPipeline | None): Set in pipeline ingest mode, messages are enqueued to it
+        bridge_workers (int): Threads serving the Flask routes
+    """
+    bridge_executor = ThreadPoolExecutor(max_workers=bridge_workers, thread_name_prefix="asgi-bridge")
+
+    async def receive_message(scope: Scope, receive: Receive, send: Send):
+        """Handles POST requests to the /messages endpoint."""
+        if not _is_json(scope):
+            logging.error("Request did not contain JSON data.")
+            return await _send_json(send, 400, {"error": "Request must be JSON"})
+
+        try:
+            data = loads(await _read_body(receive))
+        except ValueError:
+            logging.error("Request did not contain valid JSON data.")
+            return await _send_json(send, 400, {"error": "Request must be JSON"})
+
+        try:
+            if ingest_pipeline:
+                outcome = ingest_pipeline.submit(data)
+                if outcome == MESSAGE_INVALID:
+                    return await _send_json(send, 400, {"error": "Invalid message"})
+                if outcome == MESSAGE_REJECTED:
+                    return await _send_json(send, 429, {"error": "Ingest queue is full"}, [(b"retry-after", b"1")])
+                return await _send_json(send, 202, {"status": "queued", "message_received": data})
+
+            # Applying a message waits for the rocket's lock, which must not block the event loop
+            await asyncio.to_thread(control_center.process_incoming_message, data)
+        except Exception as e:
+            logging.error(f"Error processing request: {e}")
+            return await _send_json(send, 500, {"error": "An internal error occurred"})
+        await _send_json(send, 200, {"status": "success", "message_received": data})
+
+    async def receive_message_batch(scope: Scope, receive: Receive, send: Send):
+        """Handles POST requests to the /messages/batch endpoint."""
+        ndjson = _mimetype(scope) == "application/x-ndjson"
+        if not ndjson and not _is_json(scope):
+            logging.error("Batch request did not contain JSON or NDJSON data.")
+            return await _send_json(send, 400, {"error": "Request must be JSON or NDJSON"})
+
+        messages = decode_batch(await _read_body(receive), ndjson)
+        if messages is None:
+            logging.error("Batch request did not contain a JSON array.")
+            return await _send_json(send, 400, {"error": "Request must be a JSON array of messages"})
+
+        try:
+            if ingest_pipeline:
+                outcomes = ingest_pipeline.submit_batch(messages)
+                response = {"status": "queued", "messages_received": len(messages), **outcomes}
+                if outcomes[MESSAGE_REJECTED]:
+                    return await _send_json(send, 429, response, [(b"retry-after", b"1")])
+                return await _send_json(send, 202, response)
+
+            outcomes = await asyncio.to_thread(control_center.process_incoming_batch, messages)
+        except Exception as e:
+            logging.error(f"Error processing batch request: {e}")
+            return await _send_json(send, 500, {"error": "An internal error occurred"})
+        await _send_json(send, 200, {"status": "success", "messages_received": len(messages), **outcomes})
+
+    routes = {
+        ("POST", "/messages"): receive_message,
+        ("POST", "/messages/batch"): receive_message_batch
+    }
+
+    async def application(scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            await _handle_lifespan(receive, send)
+            bridge_executor.shutdown(wait=False, cancel_futures=True)
+            return
+        if scope["type"] != "http":
+            return
+
+        handler = routes.get((scope["method"], scope["path"]))
+        if handler:
+            await handler(scope, receive, send)
+        else:
+            await _call_wsgi(flask_app, bridge_executor, scope, receive, send)
+
+    return application
+
+def run(application, host: str, port: int):
+    """
+    Runs the ASGI application with uvicorn, on uvloop when it is installed.
+
+    Raises:
+        RuntimeError: If uvicorn is not installed
+    """
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise RuntimeError("The ASGI server requires uvicorn: pip install uvicorn") from e
+
+    uvicorn.run(application, host=host, port=port, loop="auto", http="auto", timeout_keep_alive=30, log_level="warning")
+
+async def _handle_lifespan(receive: Receive, send: Send):
+    """Acknowledges the server startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def _read_body(receive: Receive) -> bytes:
+    """Reads the whole request body."""
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    """Returns the value of a request header, or None if missing."""
+    for header_name, value in scope["headers"]:
+        if header_name == name:
+            return value.decode("latin-1")
+    return None
+
+def _mimetype(scope: Scope) -> str:
+    """Returns the mimetype of the request body, without parameters."""
+    return (_header(scope, b"content-type") or "").split(";", 1)[0].strip().lower()
+
+def _is_json(scope: Scope) -> bool:
+    """Returns whether the request body is JSON, like Flask's request.is_json."""
+    mimetype = _mimetype(scope)
+    return mimetype == "application/json" or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+async def _send_json(send: Send, status: int, data: dict, headers: list[tuple[bytes, bytes]] | None = None):
+    """Sends a JSON response, compact with sorted keys like jsonify."""
+    body = json.dumps(data, separators=(",", ":"), sort_keys=True).encode() + b"\n"
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())] + (headers or [])
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _call_wsgi(wsgi_app, executor: Executor, scope: Scope, receive: Receive, send: Send):
+    """
+    Serves a request with a WSGI app in the threads of an executor, streaming the response body
+    until it ends or the client disconnects.
+    """
+    body = await _read_body(receive)
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    response_start = {}
+
+    def start_response(status: str, headers: list[tuple[str, str]], exc_info=None):
+        response_start["status"] = int(status.split(" ", 1)[0])
+        response_start["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+    loop = asyncio.get_running_loop()
+    iterable = await loop.run_in_executor(executor, wsgi_app, environ, start_response)
+    iterator = iter(iterable)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    chunk = None
+    try:
+        started = False
+        while True:
+            chunk = loop.run_in_executor(executor, next, iterator, None)
+            await asyncio.wait((chunk, disconnected), return_when=asyncio.FIRST_COMPLETED)
+            if not chunk.done():
+                logging.debug("Client disconnected, closing the response.")
+                return
+            body_chunk = chunk.result()
+            # The first chunk is read before starting the response, since start_response may be called lazily
+            if not started:
+                await send({"type": "http.response.start", **response_start})
+                started = True
+            if body_chunk is None:
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({"type": "http.response.body", "body": body_chunk, "more_body": True})
+    finally:
+        disconnected.cancel()
+        # A generator can't be closed while running, wait for the chunk being read
+        if chunk is not None and not chunk.done():
+            await asyncio.wait((chunk,))
+        if hasattr(iterable, "close"):
+            await loop.run_in_executor(executor, iterable.close)
+
+async def _wait_for_disconnect(receive: Receive):
+    """Returns once the client disconnects, the request body having been read."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
@@ -0,0 +1,86 @@
+"""
+Compares the sharded fleet registry against a single global fleet lock.
+
+Ingestion threads post messages for their own channels while reader threads keep
+listing the fleet, like dashboards polling GET /rockets.
+
+Usage:
+    python -m benchmarks.fleet_contention [--channels N] [--messages M] [--writers W] [--readers R]
+"""
+import argparse
+import threading
+import time
+from benchmarks.workload import generate_channel_messages
+from control_center import ControlCenter
+
+class GlobalLockControlCenter(ControlCenter):
+    """Control center reproducing the previous design: one lock around every message and read."""
+
+    def __init__(self):
+        super().__init__()
+        self.fleet_lock = threading.Lock()
+
+    def process_incoming_message(self, message: any) -> str:
+        with self.fleet_lock:
+            return super().process_incoming_message(message)
+
+    def list_rockets_in_fleet(self) -> list[dict]:
+        with self.fleet_lock:
+            return super().list_rockets_in_fleet()
+
+def run(control_center: ControlCenter, channel_messages: list[list[dict]], writers: int, readers: int) -> dict:
+    """Runs the workload against a control center and returns the measured rates."""
+    stop_reading = threading.Event()
+    reads = [0] * readers
+
+    def write(worker: int):
+        for messages in channel_messages[worker::writers]:
+            for message in messages:
+                control_center.process_incoming_message(message)
+
+    def read(worker: int):
+        while not stop_reading.is_set():
+            control_center.list_rockets_in_fleet()
+            reads[worker] += 1
+
+    reader_threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stop_reading.set()
+    for thread in reader_threads:
+        thread.join()
+
+    message_count = sum(len(messages) for messages in channel_messages)
+    return {
+        "seconds": elapsed,
+        "messages_per_second": message_count / elapsed,
+        "reads_per_second": sum(reads) / elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per channel")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    for name, factory in (("global lock", GlobalLockControlCenter), ("sharded registry", ControlCenter)):
+        channel_messages = generate_channel_messages(args.channels, args.messages)
+        result = run(factory(), channel_messages, args.writers, args.readers)
+        print(
+            f"{name:>16}: {result['messages_per_second']:>10.0f} messages/s, "
+            f"{result['reads_per_second']:>8.1f} fleet reads/s ({result['seconds']:.2f}s)"
+        )
+
+if __name__ == '__main__':
+    main()
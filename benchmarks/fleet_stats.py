@@ -0,0 +1,60 @@
+"""
+Measures the cost of the fleet statistics of /fleet/stats against the size of the fleet.
+
+A columnar snapshot of the fleet is taken, by reading every rocket once, then the statistics
+are computed over its columns. Only the snapshot reads the rockets, and it is taken in the
+background, so the statistics are what a refresh adds once the snapshot is taken.
+
+Usage:
+    python -m benchmarks.fleet_stats [--rockets 10000 100000 1000000] [--repeat R]
+"""
+import argparse
+import random
+import time
+from control_center import ControlCenter
+from fleet_analytics import FleetColumns
+from rocket import Rocket
+
+MISSIONS = ("ARTEMIS", "APOLLO", "GEMINI", "MERCURY", "VOYAGER")
+ROCKET_TYPES = ("Falcon-9", "Falcon-Heavy", "Saturn-V", "Atlas-V")
+EXPLOSION_REASONS = ("PRESSURE_VESSEL_FAILURE", "ENGINE_FAILURE", "GUIDANCE_FAILURE")
+
+def build_fleet(rocket_count: int, seed: int = 0) -> ControlCenter:
+    """Builds a fleet of rockets directly in the registry, a seventh of them exploded."""
+    rng = random.Random(seed)
+    control_center = ControlCenter()
+    for number in range(rocket_count):
+        rocket = Rocket(
+            f"rocket-{number}", "2025-05-14T10:00:00", "2025-05-14T10:00:00", 1,
+            rng.randint(0, 50_000), rng.choice(ROCKET_TYPES), rng.choice(MISSIONS)
+        )
+        if number % 7 == 0:
+            rocket.explode(rng.choice(EXPLOSION_REASONS), "2025-05-14T10:00:01", 2)
+        control_center.rockets_fleet.get_or_create(rocket.id, lambda: rocket)
+    return control_center
+
+def best_of(function, repeat: int) -> float:
+    """Returns the best wall time of calling a function, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rockets", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions, the best one is kept")
+    args = parser.parse_args()
+
+    for rocket_count in args.rockets:
+        control_center = build_fleet(rocket_count)
+        snapshot = best_of(control_center.fleet_columns, args.repeat)
+        columns: FleetColumns = control_center.fleet_columns()
+        stats = best_of(columns.stats, args.repeat)
+        print(f"{rocket_count:>9} rockets: snapshot {snapshot * 1000:>8.1f}ms, stats {stats * 1000:>7.1f}ms")
+
+if __name__ == '__main__':
+    main()
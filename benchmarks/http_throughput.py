@@ -0,0 +1,62 @@
+"""
+Measures the ingestion throughput of a running API server.
+
+Client threads post the messages of their own channels to /messages over
+keep-alive connections, like the rockets load generator at a given concurrency level.
+
+Usage:
+    python server.py --server flask|asgi
+    python -m benchmarks.http_throughput [--url URL] [--channels N] [--messages M] [--concurrency C]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+from benchmarks.workload import generate_channel_messages
+
+def run(url: str, channel_messages: list[list[dict]], concurrency: int) -> dict:
+    """Posts all messages and returns the measured rate."""
+    target = urlsplit(url)
+    errors = [0] * concurrency
+
+    def post(worker: int):
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80)
+        headers = {"Content-Type": "application/json"}
+        for messages in channel_messages[worker::concurrency]:
+            for message in messages:
+                connection.request("POST", target.path, body=json.dumps(message), headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[worker] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    message_count = sum(len(messages) for messages in channel_messages)
+    return {"seconds": elapsed, "messages_per_second": message_count / elapsed, "errors": sum(errors)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8088/messages")
+    parser.add_argument("--channels", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50, help="messages per channel")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    result = run(args.url, generate_channel_messages(args.channels, args.messages), args.concurrency)
+    print(
+        f"{result['messages_per_second']:.0f} messages/s "
+        f"({result['seconds']:.2f}s, {result['errors']} errors)"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures the CPU spent per message to decode, validate and apply it, against the previous path.
+
+The previous path decoded with the standard library, validated by building a list for all(),
+then extracted the fields in a second pass and parsed the message time into the rocket on
+every message. Applying the messages is measured in process, on an in-order workload.
+
+Usage:
+    python -m benchmarks.message_decoding [--channels N] [--messages M] [--repeat R]
+"""
+import argparse
+import json
+import logging
+import time
+from benchmarks.workload import generate_traffic
+from control_center import ControlCenter
+from message_codec import loads, orjson, parse_message
+from rocket import _to_epoch_us
+
+def legacy_parse(data: bytes) -> tuple | None:
+    """Decodes, validates and extracts a message like the previous path."""
+    message = json.loads(data)
+    metadata = message.get("metadata", {})
+    if not all([
+        metadata.get("channel"),
+        isinstance(metadata.get("messageNumber"), int),
+        metadata.get("messageType"),
+        metadata.get("messageTime")
+    ]):
+        return None
+    metadata = message["metadata"]
+    return (
+        metadata["channel"],
+        (metadata["messageNumber"], metadata["messageType"], metadata["messageTime"], message.get("message", {}))
+    )
+
+def fast_parse(data: bytes) -> tuple | None:
+    """Decodes, validates and extracts a message in a single pass."""
+    return parse_message(loads(data))
+
+def cpu_per_call(function, items: list, repeat: int) -> float:
+    """Returns the best CPU time per item of calling a function on every item, in microseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        for item in items:
+            function(item)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items) * 1_000_000
+
+def apply_messages(traffic: list[dict], parse_times: bool) -> float:
+    """Returns the CPU time per message of applying the traffic to a fleet, in microseconds."""
+    control_center = ControlCenter()
+    start = time.process_time()
+    for message in traffic:
+        control_center.process_incoming_message(message)
+        if parse_times:
+            # The previous path parsed the message time into every rocket it updated
+            _to_epoch_us(message["metadata"]["messageTime"])
+    return (time.process_time() - start) / len(traffic) * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=50, help="messages per channel")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions, the best one is kept")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    traffic = generate_traffic(args.channels, args.messages)
+    bodies = [json.dumps(message).encode() for message in traffic]
+    print(f"{len(traffic)} messages, decoder: {'orjson' if orjson is not None else 'json'}")
+
+    legacy = cpu_per_call(legacy_parse, bodies, args.repeat)
+    fast = cpu_per_call(fast_parse, bodies, args.repeat)
+    print(f"decode and validate: previous {legacy:.2f}us, fast {fast:.2f}us per message ({fast / legacy - 1:+.0%})")
+
+    legacy = min(apply_messages(traffic, True) for _ in range(args.repeat))
+    fast = min(apply_messages(traffic, False) for _ in range(args.repeat))
+    print(f"apply:               previous {legacy:.2f}us, fast {fast:.2f}us per message ({fast / legacy - 1:+.0%})")
+
+if __name__ == '__main__':
+    main()
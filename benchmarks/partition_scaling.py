@@ -0,0 +1,63 @@
+"""
+Measures the ingest throughput of the multi-process fleet against its number of worker processes.
+
+The traffic is submitted in batches from this process, like the batch endpoint does, and
+the throughput counts until every message has been applied by the workers. A single
+in-process ControlCenter applying the same batches is measured as the baseline.
+
+Usage:
+    python -m benchmarks.partition_scaling [--workers 1 2 4 8] [--channels N] [--messages M] [--batch-size B]
+"""
+import argparse
+import logging
+import os
+import time
+from benchmarks.workload import generate_traffic
+from control_center import ControlCenter
+from partitioned_fleet import PartitionedFleet
+
+def batches_of(traffic: list[dict], batch_size: int) -> list[list[dict]]:
+    return [traffic[index:index + batch_size] for index in range(0, len(traffic), batch_size)]
+
+def in_process(batches: list[list[dict]]) -> float:
+    """Returns the seconds to apply the batches in this process."""
+    control_center = ControlCenter()
+    start = time.perf_counter()
+    for batch in batches:
+        control_center.process_incoming_batch(batch)
+    return time.perf_counter() - start
+
+def partitioned(batches: list[list[dict]], workers: int) -> float:
+    """Returns the seconds for worker processes to apply the batches, submitted from this process."""
+    fleet = PartitionedFleet(workers, queue_size=len(batches) + 1, log_level=logging.ERROR, message_log_level=logging.DEBUG)
+    try:
+        fleet.join() # Wait for the workers to start
+        start = time.perf_counter()
+        for batch in batches:
+            fleet.submit_batch(batch)
+        fleet.join()
+        return time.perf_counter() - start
+    finally:
+        fleet.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=50, help="messages per channel")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    traffic = generate_traffic(args.channels, args.messages, 0.1, 0.05)
+    batches = batches_of(traffic, args.batch_size)
+    print(f"{len(traffic)} messages in batches of {args.batch_size}, {os.cpu_count()} CPU(s)")
+
+    baseline = len(traffic) / in_process(batches)
+    print(f"{'in process':>12}: {baseline:>9.0f} messages/s")
+    for workers in args.workers:
+        rate = len(traffic) / partitioned(batches, workers)
+        print(f"{workers:>4} workers: {rate:>9.0f} messages/s ({rate / baseline:.2f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures the time to recover the fleet on startup against the size of the event log.
+
+For each log size, the fleet is rebuilt from the log alone, then from a snapshot taken
+every given number of messages plus the tail of the log following the last snapshot.
+
+Usage:
+    python -m benchmarks.recovery_time [--events 10000 100000] [--messages 20] [--snapshot-every N]
+"""
+import argparse
+import tempfile
+from benchmarks.workload import generate_channel_messages
+from control_center import ControlCenter
+from fleet_journal import FleetJournal
+
+def write_journal(directory: str, events: int, messages_per_channel: int, snapshot_every: int | None):
+    """Applies messages interleaved across channels with journaling, snapshotting every given number of messages."""
+    control_center = ControlCenter()
+    journal = FleetJournal(control_center, directory)
+    journal.recover()
+
+    channel_messages = generate_channel_messages(max(events // messages_per_channel, 1), messages_per_channel)
+    applied = 0
+    for round_messages in zip(*channel_messages):
+        for message in round_messages:
+            control_center.process_incoming_message(message)
+            applied += 1
+            if snapshot_every and applied % snapshot_every == 0:
+                journal.snapshot()
+    journal.close(snapshot=False)
+
+def recover(directory: str) -> dict:
+    """Recovers a fleet from a journal directory."""
+    journal = FleetJournal(ControlCenter(), directory)
+    recovery = journal.recover()
+    journal.close(snapshot=False)
+    return recovery
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[10_000, 100_000], help="messages in the log")
+    parser.add_argument("--messages", type=int, default=20, help="messages per channel")
+    parser.add_argument("--snapshot-every", type=int, default=None, help="messages between snapshots, default 30%% of the log")
+    args = parser.parse_args()
+
+    for events in args.events:
+        snapshot_every = args.snapshot_every or max(events * 3 // 10, 1)
+        for name, interval in (("log only", None), (f"snapshot every {snapshot_every}", snapshot_every)):
+            with tempfile.TemporaryDirectory() as directory:
+                write_journal(directory, events, args.messages, interval)
+                result = recover(directory)
+            print(
+                f"{events:>9} events, {name:>24}: {result['seconds']:>7.3f}s to recover "
+                f"{result['rockets']} rockets, {result['replayed_events']} events replayed"
+            )
+
+if __name__ == '__main__':
+    main()
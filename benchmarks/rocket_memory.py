@@ -0,0 +1,70 @@
+"""
+Measures the memory held by the rockets of a fleet, against the previous Rocket model.
+
+The previous model had a per-instance dictionary, two datetime objects, an empty heap,
+an empty dictionary of buffered sizes and a reentrant lock for every rocket.
+
+Usage:
+    python -m benchmarks.rocket_memory [--rockets 10000 100000 1000000]
+"""
+import argparse
+from datetime import datetime
+import gc
+import threading
+import tracemalloc
+from benchmarks.workload import BASE_TIME
+from rocket import Rocket
+
+class LegacyRocket:
+    """Rocket reproducing the previous data layout, without its behavior."""
+
+    def __init__(self, id: str, launch_time: str, last_update_time: str, last_message_number: int,
+                 speed: int, rocket_type: str, mission: str):
+        self.id = id
+        self.launch_time = datetime.fromisoformat(launch_time)
+        self.last_update_time = datetime.fromisoformat(last_update_time)
+        self.last_message_number = last_message_number
+        self.speed = speed
+        self.rocket_type = rocket_type
+        self.mission = mission
+        self.status = "Launched"
+        self.explosion_reason = None
+        self.version = 0
+        self.json_cache = None
+        self.message_buffer = []
+        self.buffered_sizes = {}
+        self.buffered_bytes = 0
+        self.gap_started_at = None
+        self.degraded = False
+        self.lock = threading.RLock()
+
+def measure(factory: type, count: int) -> int:
+    """Returns the bytes allocated to build a number of rockets."""
+    launch_time = BASE_TIME.isoformat()
+    gc.collect()
+    tracemalloc.start()
+    # Types and missions are decoded from each message, so they are distinct string objects
+    fleet = [
+        factory(f"channel-{i}", launch_time, launch_time, 1, 500, "".join(["Falcon", "-9"]), "".join(["ARTE", "MIS"]))
+        for i in range(count)
+    ]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del fleet
+    return allocated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rockets", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for count in args.rockets:
+        legacy = measure(LegacyRocket, count)
+        compact = measure(Rocket, count)
+        print(
+            f"{count:>9} rockets: previous {legacy / count:>6.0f} B/rocket, "
+            f"compact {compact / count:>6.0f} B/rocket ({compact / legacy:.0%})"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares the storage backends of the fleet on identical workloads: the in-memory registry, and
+the SQLite database written behind the registry, see fleet_storage.
+
+Each backend ingests the same generated traffic, in batches then from concurrent threads, then
+serves the same reads. The SQLite backend is also measured writing the changes waiting for a flush,
+and loading the fleet back as on a restart.
+
+Usage:
+    python -m benchmarks.storage_backends [--channels N] [--messages M] [--threads T]
+                                          [--batch-size B] [--repeat R] [--flush-interval S]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from benchmarks.workload import generate_traffic
+from control_center import ControlCenter
+from fleet_storage import StorageOptions
+from replay import replay
+
+BACKENDS = ("memory", "sqlite")
+
+def control_center_of(backend: str, path: str, flush_interval: float) -> ControlCenter:
+    """Builds a control center on an empty storage of a backend."""
+    if os.path.exists(path):
+        os.remove(path)
+    storage = StorageOptions(path, flush_interval=flush_interval) if backend == "sqlite" else None
+    control_center = ControlCenter(storage=storage)
+    control_center.load_stored_fleet()
+    return control_center
+
+def best_of(function, repeat: int) -> float:
+    """Returns the best wall time of calling a function, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def ingest_batches(control_center: ControlCenter, traffic: list[dict], batch_size: int) -> float:
+    """Applies the messages in batches, returns the messages per second."""
+    start = time.perf_counter()
+    for index in range(0, len(traffic), batch_size):
+        control_center.process_incoming_batch(traffic[index:index + batch_size])
+    return len(traffic) / (time.perf_counter() - start)
+
+def measure(backend: str, traffic: list[dict], args: argparse.Namespace, directory: str) -> list[str]:
+    """Runs the workloads on a backend, returns a line per measure."""
+    path = os.path.join(directory, "fleet.db")
+    lines = []
+
+    control_center = control_center_of(backend, path, args.flush_interval)
+    result = replay(control_center, traffic, args.threads)
+    lines.append(f"ingest {args.threads} threads {result['messages_per_second']:>12,.0f} msg/s, p99 {result['p99_us']:,.0f}µs")
+    control_center.close()
+
+    control_center = control_center_of(backend, path, args.flush_interval)
+    lines.append(f"ingest batches   {ingest_batches(control_center, traffic, args.batch_size):>12,.0f} msg/s")
+    if backend == "sqlite":
+        # The changes since the last background flush, at most a flush interval of them
+        start = time.perf_counter()
+        written = control_center.rockets_fleet.flush()
+        lines.append(f"flush            {(time.perf_counter() - start) * 1000:>12,.1f}ms, {written} rockets")
+
+    rocket_ids = sorted({message["metadata"]["channel"] for message in traffic})
+    rng = random.Random(0)
+    reads = {
+        "get rocket": lambda: control_center.get_rocket_by_id(rng.choice(rocket_ids)),
+        "page of 100": lambda: control_center.rockets_page(100),
+        "mission": lambda: control_center.get_rockets_by_mission("ARTEMIS"),
+        "query speed": lambda: control_center.query_rockets(status="launched", sort="speed", limit=100)
+    }
+    for name, read in reads.items():
+        lines.append(f"{name:<16} {best_of(read, args.repeat) * 1e6:>12,.1f}µs")
+
+    if backend == "sqlite":
+        control_center.close()
+        lines.append(f"database         {os.path.getsize(path) / 1e6:>12,.1f}MB")
+        reloaded = ControlCenter(storage=StorageOptions(path, flush_interval=args.flush_interval))
+        start = time.perf_counter()
+        loaded = reloaded.load_stored_fleet()
+        lines.append(f"load             {(time.perf_counter() - start) * 1000:>12,.1f}ms, {loaded} rockets")
+        reloaded.close()
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per channel")
+    parser.add_argument("--out-of-order", type=float, default=0.1, help="fraction of the messages delivered late")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="fraction of the messages delivered twice")
+    parser.add_argument("--threads", type=int, default=4, help="ingestion threads")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions of each read, the best one is kept")
+    parser.add_argument("--flush-interval", type=float, default=StorageOptions().flush_interval,
+                        help="seconds between flushes of the SQLite backend")
+    args = parser.parse_args()
+    # Late and duplicate messages are logged as warnings
+    logging.basicConfig(level=logging.ERROR)
+
+    traffic = generate_traffic(args.channels, args.messages, args.out_of_order, args.duplicates)
+    print(f"{len(traffic)} messages of {args.channels} rockets")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in BACKENDS:
+            for line in measure(backend, traffic, args, directory):
+                print(f"{backend:>7}: {line}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures the time to first byte, the total time and the peak memory of a request listing the fleet.
+
+The rockets are served by the API server over HTTP, once streamed page by page like /rockets,
+and once built as a single body like /rockets was before, both uncompressed and compressed.
+The rockets are serialized once beforehand, as a polled server would have them cached, and the
+buffered body is built on every request, as after any change of the fleet. The peak memory of a
+request is measured both as the peak of Python allocations and, on Linux, as the growth of the
+resident set size of the process.
+
+Usage:
+    python -m benchmarks.streaming_responses [--rockets N] [--repeat R]
+"""
+import argparse
+import gc
+import gzip
+import http.client
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from werkzeug.serving import make_server
+from benchmarks.workload import generate_traffic
+import server
+from response_streams import content_encodings
+
+def buffered_rockets():
+    """Serves all rockets as a single body, like /rockets before it was streamed."""
+    body = server.snapshot_cache.rockets_json(server.control_center.rockets_in_launch_order())
+    headers = {}
+    if "gzip" in server.request.headers.get("Accept-Encoding", ""):
+        body = gzip.compress(body, 4)
+        headers["Content-Encoding"] = "gzip"
+    return server.json_response(body, server.snapshot_cache.etag(server.control_center.fleet_version), headers=headers)
+
+def resident_bytes(field: str) -> int | None:
+    """Returns a memory field of /proc/self/status in bytes, None if unavailable."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def reset_peak_resident_bytes() -> bool:
+    """Resets the peak resident set size of the process, returns whether it is supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def request(port: int, path: str, encoding: str | None) -> dict:
+    """Sends a request and returns its time to first byte, total time and the bytes received."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    start = time.perf_counter()
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    first = response.read(1)
+    first_byte = time.perf_counter()
+    size = len(first)
+    # Read and drop the body in chunks, so that the client doesn't count in the memory of the request
+    while chunk := response.read(65536):
+        size += len(chunk)
+    end = time.perf_counter()
+    connection.close()
+    assert response.status == 200, response.status
+    return {"ttfb": first_byte - start, "seconds": end - start, "bytes": size}
+
+def peak_memory(port: int, path: str, encoding: str | None) -> dict:
+    """Sends a request and returns the peak of Python allocations and of resident memory while serving it."""
+    gc.collect()
+    resident = resident_bytes("VmRSS") if reset_peak_resident_bytes() else None
+    tracemalloc.start()
+    request(port, path, encoding)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_resident = resident_bytes("VmHWM") if resident is not None else None
+    return {"allocated": peak, "resident": peak_resident - resident if peak_resident is not None else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rockets", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="requests per measure, the best one is kept")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    server.control_center.process_incoming_batch(generate_traffic(args.rockets, 1))
+    server.app.add_url_rule("/benchmark/buffered", view_func=buffered_rockets)
+    http_server = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    port = http_server.server_port
+    # Serialize every rocket once, as a polled server would have them cached
+    request(port, "/rockets", None)
+
+    print(f"{len(server.control_center.rockets_fleet)} rockets, pid {os.getpid()}")
+    print(f"{'response':<24} {'ttfb':>9} {'total':>9} {'size':>10} {'peak alloc':>11} {'peak rss':>10}")
+    encodings = [None, "gzip"] + [encoding for encoding in content_encodings() if encoding != "gzip"]
+    for name, path, supported in (("buffered", "/benchmark/buffered", (None, "gzip")), ("streamed", "/rockets", encodings)):
+        for encoding in supported:
+            timings = [request(port, path, encoding) for _ in range(args.repeat)]
+            ttfb = min(timing["ttfb"] for timing in timings)
+            seconds = min(timing["seconds"] for timing in timings)
+            memory = peak_memory(port, path, encoding)
+            resident = f"{memory['resident'] / 2**20:>7.1f} MB" if memory["resident"] is not None else f"{'n/a':>10}"
+            print(
+                f"{name + (' ' + encoding if encoding else ''):<24} {ttfb * 1000:>6.1f} ms {seconds * 1000:>6.0f} ms "
+                f"{timings[0]['bytes'] / 2**20:>7.1f} MB {memory['allocated'] / 2**20:>8.1f} MB {resident}"
+            )
+    http_server.shutdown()
+
+if __name__ == '__main__':
+    main()
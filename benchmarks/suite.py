@@ -0,0 +1,219 @@
+"""
+Benchmark suite of the ingestion and query paths, emitting its results as JSON.
+
+Every scenario runs on the same generated traffic: N channels of M messages, interleaved,
+with a fraction of the messages delivered out of order or twice. Results can be compared
+with those of a previous run to track regressions between versions.
+
+Usage:
+    python -m benchmarks.suite [--channels N] [--messages M] [--out-of-order R] [--duplicates R]
+                               [--threads T] [--scenarios NAME ...] [--output FILE] [--compare FILE]
+"""
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable
+from benchmarks.workload import generate_traffic
+from control_center import ControlCenter
+from replay import latency_percentiles, replay
+
+# Scenarios by name, each one taking the traffic and the arguments and returning its measures
+SCENARIOS: dict[str, Callable[[list[dict], argparse.Namespace], dict]] = {}
+
+def scenario(name: str):
+    """Registers a scenario of the suite."""
+    def register(function: Callable[[list[dict], argparse.Namespace], dict]):
+        SCENARIOS[name] = function
+        return function
+    return register
+
+def timed(function: Callable, repeat: int) -> dict:
+    """Calls a function a number of times, and returns the calls per second and their latencies."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call_start = time.perf_counter_ns()
+        function()
+        latencies.append(time.perf_counter_ns() - call_start)
+    elapsed = time.perf_counter() - start
+    return {"calls_per_second": repeat / elapsed, **latency_percentiles(latencies)}
+
+@scenario("ingest")
+def ingest(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Applies the messages one at a time, in process."""
+    return replay(ControlCenter(), traffic)
+
+@scenario("ingest_batch")
+def ingest_batch(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Applies the messages in batches, in process."""
+    control_center = ControlCenter()
+    batches = [traffic[index:index + args.batch_size] for index in range(0, len(traffic), args.batch_size)]
+    batch = iter(batches)
+    start = time.perf_counter()
+    result = timed(lambda: control_center.process_incoming_batch(next(batch)), len(batches))
+    elapsed = time.perf_counter() - start
+    return {"batch_size": args.batch_size, "messages_per_second": len(traffic) / elapsed, **result}
+
+@scenario("ingest_concurrent")
+def ingest_concurrent(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Applies the messages from concurrent ingestion threads."""
+    return {"threads": args.threads, **replay(ControlCenter(), traffic, args.threads)}
+
+@scenario("read_write_mix")
+def read_write_mix(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Applies the messages from ingestion threads while reader threads query the fleet."""
+    control_center = ControlCenter()
+    rocket_ids = sorted({message["metadata"]["channel"] for message in traffic})
+    queries = (
+        lambda index: control_center.list_rockets_page(100),
+        lambda index: control_center.get_rocket_by_id(rocket_ids[index % len(rocket_ids)]),
+        lambda index: control_center.get_rockets_by_mission("ARTEMIS"),
+        lambda index: control_center.list_rockets_in_fleet()
+    )
+    stop_reading = threading.Event()
+    read_latencies = [[] for _ in range(args.readers)]
+
+    def read(worker: int):
+        index = 0
+        while not stop_reading.is_set():
+            start = time.perf_counter_ns()
+            queries[index % len(queries)](index)
+            read_latencies[worker].append(time.perf_counter_ns() - start)
+            index += 1
+
+    readers = [threading.Thread(target=read, args=(worker,)) for worker in range(args.readers)]
+    for reader in readers:
+        reader.start()
+    result = replay(control_center, traffic, args.threads)
+    stop_reading.set()
+    for reader in readers:
+        reader.join()
+
+    reads = [latency for latencies in read_latencies for latency in latencies]
+    return {
+        "threads": args.threads,
+        "readers": args.readers,
+        "messages_per_second": result["messages_per_second"],
+        "write_p50_us": result["p50_us"],
+        "write_p99_us": result["p99_us"],
+        "reads_per_second": len(reads) / result["seconds"],
+        **{f"read_{name}": value for name, value in latency_percentiles(reads).items()}
+    }
+
+@scenario("queries")
+def queries(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Queries a fleet holding every message."""
+    control_center = ControlCenter()
+    replay(control_center, traffic)
+    rocket_id = traffic[0]["metadata"]["channel"]
+    return {
+        "rockets": len(control_center.rockets_fleet),
+        "list_rockets": timed(control_center.list_rockets_in_fleet, args.repeat),
+        "list_rockets_page": timed(lambda: control_center.list_rockets_page(100), args.repeat),
+        "get_rocket": timed(lambda: control_center.get_rocket_by_id(rocket_id), args.repeat * 100),
+        "rockets_by_mission": timed(lambda: control_center.get_rockets_by_mission("ARTEMIS"), args.repeat),
+        "mission_stats": timed(lambda: control_center.get_mission_stats("ARTEMIS"), args.repeat * 100),
+        "list_missions": timed(control_center.list_missions, args.repeat * 100)
+    }
+
+@scenario("http")
+def http(traffic: list[dict], args: argparse.Namespace) -> dict:
+    """Posts messages to the Flask endpoints and queries them, end to end through the test client."""
+    import server
+    logging.getLogger().setLevel(args.log_level)
+    server.control_center.clear_fleet()
+    client = server.app.test_client()
+
+    messages = traffic[:args.http_messages]
+    post = iter(messages)
+    ingest_result = timed(lambda: client.post("/messages", json=next(post)), len(messages))
+    rocket_id = messages[0]["metadata"]["channel"]
+    result = {
+        "messages": len(messages),
+        "messages_per_second": ingest_result["calls_per_second"],
+        "post_p50_us": ingest_result["p50_us"],
+        "post_p99_us": ingest_result["p99_us"],
+        "get_rockets": timed(lambda: client.get("/rockets"), args.repeat),
+        "get_rocket": timed(lambda: client.get(f"/rockets/{rocket_id}"), args.repeat * 10)
+    }
+    server.control_center.clear_fleet()
+    return result
+
+def git_commit() -> str | None:
+    """Returns the commit of the benchmarked tree, if it is a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def rates(measures: dict, prefix: str = "") -> dict[str, float]:
+    """Returns the rates of measures, nested measures included, by dotted name."""
+    found = {}
+    for key, value in measures.items():
+        if isinstance(value, dict):
+            found.update(rates(value, f"{prefix}{key}."))
+        elif key.endswith("_per_second"):
+            found[f"{prefix}{key}"] = value
+    return found
+
+def compare(results: dict, previous: dict) -> list[str]:
+    """Returns the relative change of every rate of the results against previous results."""
+    previous_rates = rates(previous.get("results", {}))
+    lines = []
+    for name, value in rates(results["results"]).items():
+        if previous_rates.get(name):
+            change = value / previous_rates[name] - 1
+            lines.append(f"{name}: {previous_rates[name]:.0f} -> {value:.0f} ({change:+.1%})")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per channel")
+    parser.add_argument("--out-of-order", type=float, default=0.1, help="fraction of the messages delivered late")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="fraction of the messages delivered twice")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=4, help="ingestion threads")
+    parser.add_argument("--readers", type=int, default=2, help="reader threads of the read/write mix")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions of each fleet-wide query")
+    parser.add_argument("--http-messages", type=int, default=5000, help="messages posted over HTTP")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="file to write the results to, the standard output by default")
+    parser.add_argument("--compare", help="results of a previous run to compare against")
+    parser.add_argument("--log-level", default="ERROR", help="level of the control center logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    traffic = generate_traffic(args.channels, args.messages, args.out_of_order, args.duplicates, args.seed)
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": {}
+    }
+    for name in args.scenarios:
+        print(f"Running scenario {name}...", file=sys.stderr)
+        results["results"][name] = SCENARIOS[name](traffic, args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            for line in compare(results, json.load(file)):
+                print(line)
+
+if __name__ == '__main__':
+    main()
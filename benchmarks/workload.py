@@ -0,0 +1,95 @@
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import sys
+from replay import inject_duplicates
+
+BASE_TIME = datetime(2025, 5, 14, 10, 0, 0)
+
+def launch_message(channel_id: str, launch_offset: int = 0, mission: str = "ARTEMIS",
+                   rocket_type: str = "Falcon-9") -> dict:
+    """Builds the RocketLaunched message of a channel."""
+    return {
+        "metadata": {
+            "channel": channel_id,
+            "messageNumber": 1,
+            "messageTime": (BASE_TIME + timedelta(seconds=launch_offset)).isoformat(),
+            "messageType": "RocketLaunched"
+        },
+        "message": {
+            "type": rocket_type,
+            "launchSpeed": 500,
+            "mission": mission
+        }
+    }
+
+def speed_message(channel_id: str, msg_number: int, increment: int = 100) -> dict:
+    """Builds a RocketSpeedIncreased message of a channel."""
+    return {
+        "metadata": {
+            "channel": channel_id,
+            "messageNumber": msg_number,
+            "messageTime": (BASE_TIME + timedelta(seconds=msg_number)).isoformat(),
+            "messageType": "RocketSpeedIncreased"
+        },
+        "message": {
+            "by": increment
+        }
+    }
+
+def generate_channel_messages(channel_count: int, messages_per_channel: int) -> list[list[dict]]:
+    """
+    Generates in-order messages for a number of channels.
+
+    Returns:
+        list[list[dict]]: The messages of each channel, starting with its launch message
+    """
+    return [
+        [launch_message(f"channel-{channel}", launch_offset=channel)]
+        + [speed_message(f"channel-{channel}", msg_number) for msg_number in range(2, messages_per_channel + 1)]
+        for channel in range(channel_count)
+    ]
+
+def generate_traffic(channel_count: int, messages_per_channel: int, out_of_order_rate: float = 0.0,
+                     duplicate_rate: float = 0.0, seed: int = 0) -> list[dict]:
+    """
+    Generates the messages of a number of channels, interleaved like concurrent rockets.
+
+    Args:
+        channel_count (int): Number of channels
+        messages_per_channel (int): Messages per channel, starting with its launch message
+        out_of_order_rate (float): Fraction of the messages delivered a few messages late
+        duplicate_rate (float): Fraction of the messages delivered a second time, later on
+        seed (int): Seed of the random reordering and duplicates
+
+    Returns:
+        list[dict]: The messages in delivery order
+    """
+    rng = random.Random(seed)
+    traffic = [message for messages in zip(*generate_channel_messages(channel_count, messages_per_channel)) for message in messages]
+
+    # Messages are interleaved round by round, so moving a message a few rounds later delays it within its channel
+    window = 4 * channel_count
+    for index in range(len(traffic)):
+        if rng.random() < out_of_order_rate:
+            other = min(index + rng.randint(1, window), len(traffic) - 1)
+            traffic[index], traffic[other] = traffic[other], traffic[index]
+
+    return inject_duplicates(traffic, duplicate_rate, rng) if duplicate_rate else traffic
+
+def main():
+    """Writes generated traffic as a JSONL capture to the standard output, see replay.py."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per channel")
+    parser.add_argument("--out-of-order", type=float, default=0.0, help="fraction of the messages delivered late")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="fraction of the messages delivered twice")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for message in generate_traffic(args.channels, args.messages, args.out_of_order, args.duplicates, args.seed):
+        sys.stdout.write(json.dumps(message) + "\n")
+
+if __name__ == '__main__':
+    main()
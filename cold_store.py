@@ -0,0 +1,268 @@
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+from fleet_indexes import LaunchKey, category_key, mission_key
+from rocket import Rocket
+from rocket_history import parse_time
+
+# Archived rockets kept in memory after being read
+DEFAULT_COLD_CACHE_SIZE = 1024
+
+# Records read at a time when the whole archive is read
+_RECORDS_BATCH_SIZE = 1000
+
+# Column of each sort key of ControlCenter.query_rockets
+_SORT_COLUMNS = {"launch_time": "launch_us", "speed": "speed", "last_update_time": "last_update_us"}
+
+# Table of rockets stored as their snapshot record, next to the columns they are paged and queried by
+ROCKETS_TABLE = (
+    "rockets (id TEXT PRIMARY KEY, launch_us INTEGER NOT NULL, mission TEXT NOT NULL, status TEXT NOT NULL, "
+    "rocket_type TEXT NOT NULL, speed REAL, last_update_us INTEGER NOT NULL, record TEXT NOT NULL)"
+)
+ROCKETS_INDEXES = (
+    "rockets_launch ON rockets (launch_us, id)",
+    "rockets_mission ON rockets (mission, launch_us, id)"
+)
+
+# Encodes the records stored in the rows, compact like the snapshots
+_encode_record = json.JSONEncoder(separators=(",", ":")).encode
+
+def record_row(record: list) -> tuple:
+    """Returns the row of the rockets table of a rocket, from its record, see Rocket.to_snapshot."""
+    return (
+        record[0], parse_time(record[1]), mission_key(record[6]), category_key(record[7]),
+        category_key(record[5]), record[4] if isinstance(record[4], (int, float)) else None,
+        parse_time(record[2]), _encode_record(record)
+    )
+
+class ArchivePolicy:
+    """Rockets moved out of the fleet to the cold store, and where the cold store is kept."""
+
+    def __init__(self, exploded: bool = True, idle_after: float | None = None, path: str = "",
+                 cache_size: int = DEFAULT_COLD_CACHE_SIZE):
+        """
+        Args:
+            exploded (bool): Archive the exploded rockets, they never change again
+            idle_after (float | None): Seconds without any change after which a rocket is archived, never if None
+            path (str): SQLite database of the archived rockets, a temporary file removed on close if empty
+            cache_size (int): Archived rockets kept in memory after being read
+
+        Raises:
+            ValueError: If the idle time is not positive or the cache size is negative
+        """
+        if idle_after is not None and idle_after <= 0:
+            raise ValueError("idle_after must be positive")
+        if cache_size < 0:
+            raise ValueError("cache_size can't be negative")
+        self.exploded = exploded
+        self.idle_after = idle_after
+        self.path = path
+        self.cache_size = cache_size
+
+    @classmethod
+    def from_env(cls) -> "ArchivePolicy | None":
+        """
+        Builds the policy from environment variables, defaults are used for unset ones.
+        Returns None, archiving nothing, unless LUNAR_ARCHIVE is set to 1.
+        """
+        if os.environ.get("LUNAR_ARCHIVE", "0") != "1":
+            return None
+        defaults = cls()
+        idle_after = os.environ.get("LUNAR_ARCHIVE_IDLE_SECONDS")
+        return cls(
+            exploded=os.environ.get("LUNAR_ARCHIVE_EXPLODED", "1") == "1",
+            idle_after=float(idle_after) if idle_after else defaults.idle_after,
+            path=os.environ.get("LUNAR_ARCHIVE_PATH", defaults.path),
+            cache_size=int(os.environ.get("LUNAR_ARCHIVE_CACHE_SIZE", defaults.cache_size))
+        )
+
+    def for_partition(self, index: int) -> "ArchivePolicy":
+        """Returns the policy of one of the partitions of the fleet, each archiving to its own database."""
+        return ArchivePolicy(self.exploded, self.idle_after, f"{self.path}.{index}" if self.path else "", self.cache_size)
+
+class ColdStore:
+    """
+    Rockets archived out of the fleet, in a SQLite database.
+
+    Archived rockets are exploded or idle, so they are written once and then mostly read by ID.
+    Each rocket is stored as its snapshot record, next to the columns it is paged and queried by,
+    so it holds no memory, lock or index entry in the fleet anymore. The latest rockets read are
+    kept in an LRU cache, so a rocket polled by a dashboard is only read from the database once.
+
+    The database only spills the archived rockets out of memory and starts empty: they are kept
+    across restarts by the snapshots of the fleet, see ControlCenter.snapshot_records.
+    """
+
+    def __init__(self, path: str = "", cache_size: int = DEFAULT_COLD_CACHE_SIZE):
+        """
+        Args:
+            path (str): SQLite database of the archived rockets, a temporary file removed on close if empty
+            cache_size (int): Archived rockets kept in memory after being read
+        """
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, Rocket] = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # A single connection shared by the readers and writers, one at a time
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            # Losing the database loses nothing the snapshots don't have, don't wait for the disk
+            self._connection.execute("PRAGMA synchronous = OFF")
+            self._connection.execute("DROP TABLE IF EXISTS rockets")
+            self._connection.execute(f"CREATE TABLE {ROCKETS_TABLE}")
+            for index in ROCKETS_INDEXES:
+                self._connection.execute(f"CREATE INDEX {index}")
+
+    def archive(self, records: Iterable[list]) -> int:
+        """
+        Writes rockets to the store, replacing any archived rocket of the same ID.
+
+        Args:
+            records (Iterable[list]): Records of the rockets, see Rocket.to_snapshot
+
+        Returns:
+            int: The number of rockets written
+        """
+        rows = [record_row(record) for record in records]
+        with self._lock:
+            with self._connection:
+                self._connection.executemany("INSERT OR REPLACE INTO rockets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            for row in rows:
+                self._cache.pop(row[0], None)
+        return len(rows)
+
+    def get(self, rocket_id: str) -> Rocket | None:
+        """Returns an archived rocket, from the cache if it has been read lately, or None if not archived."""
+        with self._lock:
+            rocket = self._cache.get(rocket_id)
+            if rocket is not None:
+                self._cache.move_to_end(rocket_id)
+                self._cache_hits += 1
+                return rocket
+            self._cache_misses += 1
+            row = self._connection.execute("SELECT record FROM rockets WHERE id = ?", (rocket_id,)).fetchone()
+            if row is None:
+                return None
+            rocket = Rocket.from_snapshot(json.loads(row[0]))
+            if self.cache_size:
+                self._cache[rocket_id] = rocket
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return rocket
+
+    def pop(self, rocket_id: str) -> Rocket | None:
+        """Removes a rocket from the store and returns it, or None if not archived."""
+        with self._lock:
+            rocket = self._cache.pop(rocket_id, None)
+            with self._connection:
+                row = self._connection.execute("SELECT record FROM rockets WHERE id = ?", (rocket_id,)).fetchone()
+                if row is None:
+                    return None
+                self._connection.execute("DELETE FROM rockets WHERE id = ?", (rocket_id,))
+            return rocket if rocket is not None else Rocket.from_snapshot(json.loads(row[0]))
+
+    def page(self, after: LaunchKey | None = None, limit: int | None = None,
+             mission: str | None = None) -> list[Rocket]:
+        """
+        Returns archived rockets in launch time order, like ControlCenter.rockets_page.
+
+        Args:
+            after (LaunchKey | None): Only return the rockets following this launch time index key
+            limit (int | None): Maximum number of rockets to return
+            mission (str | None): Only return the rockets of this mission, case insensitive
+        """
+        conditions, parameters = [], []
+        if mission is not None:
+            conditions.append("mission = ?")
+            parameters.append(mission_key(mission))
+        if after is not None:
+            conditions.append("(launch_us, id) > (?, ?)")
+            parameters += [after[0], after[1]]
+        return self._select(conditions, parameters, "launch_us, id", limit)
+
+    def query(self, status: str | None = None, rocket_type: str | None = None,
+              min_speed: int | float | None = None, max_speed: int | float | None = None,
+              sort: str = "launch_time", descending: bool = False, limit: int | None = None) -> list[Rocket]:
+        """
+        Returns the archived rockets matching filters, sorted by a key, like ControlCenter.query_rockets.
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in _SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        conditions, parameters = [], []
+        for column, value in (("status", status), ("rocket_type", rocket_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(category_key(value))
+        if sort == "speed" or min_speed is not None or max_speed is not None:
+            conditions.append("speed IS NOT NULL")
+        for condition, value in (("speed >= ?", min_speed), ("speed <= ?", max_speed)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        direction = " DESC" if descending else ""
+        return self._select(conditions, parameters, f"{_SORT_COLUMNS[sort]}{direction}, id{direction}", limit)
+
+    def records(self) -> Iterator[list]:
+        """Yields the records of all archived rockets, reading them a batch at a time."""
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, record FROM rockets WHERE id > ? ORDER BY id LIMIT ?", (after, _RECORDS_BATCH_SIZE)
+                ).fetchall()
+            for _, record in rows:
+                yield json.loads(record)
+            if len(rows) < _RECORDS_BATCH_SIZE:
+                return
+            after = rows[-1][0]
+
+    def stats(self) -> dict:
+        """Returns the number of archived rockets and the hits and misses of the cache."""
+        return {
+            "rockets": len(self),
+            "cached": len(self._cache),
+            "cache_hits": self._cache_hits,
+            "cache_misses": self._cache_misses
+        }
+
+    def clear(self):
+        """Removes all rockets from the store."""
+        with self._lock:
+            with self._connection:
+                self._connection.execute("DELETE FROM rockets")
+            self._cache.clear()
+
+    def close(self):
+        """Closes the database, a temporary one is removed."""
+        with self._lock:
+            self._connection.close()
+
+    def __contains__(self, rocket_id: str) -> bool:
+        with self._lock:
+            if rocket_id in self._cache:
+                return True
+            return self._connection.execute("SELECT 1 FROM rockets WHERE id = ?", (rocket_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM rockets").fetchone()[0]
+
+    def _select(self, conditions: list[str], parameters: list, order: str, limit: int | None) -> list[Rocket]:
+        """Returns the archived rockets matching conditions, in an order."""
+        sql = "SELECT record FROM rockets"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters = [*parameters, limit]
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [Rocket.from_snapshot(json.loads(record)) for record, in rows]
@@ -1,94 +1,769 @@
+from collections import deque
+from contextlib import nullcontext
 from datetime import datetime
+import heapq
+import itertools
 import logging
+from operator import itemgetter
 import threading
-from rocket import Rocket
+import time
+from typing import Callable, Iterable, Iterator
+from cold_store import ArchivePolicy, ColdStore
+from event_log import EventLog
+from fleet_analytics import FleetColumns
+from fleet_indexes import (
+    LaunchTimeIndex, MissionIndex, SpeedIndex, StatusTypeIndex, category_key, decode_cursor, encode_cursor
+)
+from fleet_registry import FleetRegistry, DEFAULT_SHARD_COUNT
+from fleet_storage import StorageOptions
+from fleet_stream import FleetStream
+from log_config import MESSAGE_LOGGER
+from message_codec import CompactMessage, parse_message, stored_message
+from metrics import DEPTH_BUCKETS, MetricsRegistry, TimedLock
+from pending_store import PendingMessage, PendingStore, PENDING_ADDED, PENDING_DUPLICATE
+from reorder_buffers import BufferAccounting, BufferLimits, GAP_POLICY_SKIP, estimate_message_size
+from rocket import Rocket, next_version
+from rocket_history import HistoryRetention, RocketHistory, parse_time
+
+# Outcomes reported for each incoming message
+MESSAGE_ACCEPTED = "accepted"
+MESSAGE_DUPLICATE = "duplicate"
+MESSAGE_BUFFERED = "buffered"
+MESSAGE_PENDING = "pending"
+MESSAGE_DROPPED = "dropped"
+MESSAGE_INVALID = "invalid"
+
+# Message types counted by their own label in the metrics, others are counted as "other"
+KNOWN_MESSAGE_TYPES = frozenset((
+    "RocketLaunched", "RocketSpeedIncreased", "RocketSpeedDecreased", "RocketExploded", "RocketMissionChanged"
+))
+
+# Kinds of the events written to the event log: a message changing the fleet, or the skip of a gap
+EVENT_MESSAGE = "m"
+EVENT_SKIP = "s"
+
+# Kinds of the snapshot records: a rocket with its buffered messages, the messages held for a channel,
+# or an archived rocket
+SNAPSHOT_ROCKET = "r"
+SNAPSHOT_PENDING = "p"
+SNAPSHOT_ARCHIVED = "a"
+
+# Archived rockets restored from a snapshot at a time
+_ARCHIVE_BATCH_SIZE = 1000
+
+# Sort orders of the rocket queries: the key of a rocket in each order, unique thanks to the ID
+ROCKET_SORT_KEYS: dict[str, Callable[[Rocket], tuple]] = {
+    "launch_time": lambda rocket: (rocket.launch_us, rocket.id),
+    "speed": lambda rocket: (rocket.speed, rocket.id),
+    "last_update_time": lambda rocket: (rocket.last_update_us, rocket.id)
+}
+
+# Logs written for each message, formatted lazily and tagged with their rocket so they can be sampled
+message_logger = logging.getLogger(MESSAGE_LOGGER)
+
 class ControlCenter:
-    def __init__(self):
-        self.rockets_fleet: dict[str, Rocket] = {}
+    def __init__(self, shard_count: int = DEFAULT_SHARD_COUNT, buffer_limits: BufferLimits | None = None,
+                 history_retention: HistoryRetention | None = None, archive_policy: ArchivePolicy | None = None,
+                 storage: StorageOptions | None = None):
+        # Where the fleet is stored beyond memory, see load_stored_fleet, set to None to keep it in memory only
+        self.storage: StorageOptions | None = storage
 
-        # Lock to ensure thread-safe access to the fleet
-        self.fleet_lock = threading.Lock()
+        # Fleet sharded by channel ID, each shard has its own lock
+        self.rockets_fleet: FleetRegistry = storage.open(shard_count) if storage is not None else FleetRegistry(shard_count)
 
-    def process_incoming_message(self, message: any):
-        """Processes incoming messages from the API server."""
-        if not self._validate_message(message):
-            return
+        # Limits of the reorder buffers, and their totals across the fleet
+        self.buffer_limits: BufferLimits = buffer_limits or BufferLimits()
+        self.buffer_accounting: BufferAccounting = BufferAccounting()
 
-        metadata, payload = message.get("metadata", {}), message.get("message", {})
+        # Messages of channels whose launch message hasn't arrived yet
+        self.pending_store: PendingStore = PendingStore(
+            self.buffer_limits.pending_max_channels,
+            self.buffer_limits.pending_max_messages_per_channel,
+            self.buffer_limits.pending_ttl
+        )
 
-        channel_id = metadata.get("channel")
-        msg_number = metadata.get("messageNumber")
-        msg_type = metadata.get("messageType")
-        msg_time_str = metadata.get("messageTime")
+        # Retention of the speeds and missions of each rocket over time, set to None to keep no history
+        self.history_retention: HistoryRetention | None = history_retention or HistoryRetention()
 
-        with self.fleet_lock:
-            rocket, new_rocket = self._get_or_create_rocket(channel_id, msg_type, metadata, payload)
-            if not rocket or new_rocket: # Return if no rocket exists with this ID or it's a new launch message
-                return
+        # Rocket IDs ordered by launch time, maintained as rockets are created
+        self.launch_index: LaunchTimeIndex = LaunchTimeIndex()
 
-        with rocket.lock:
-            if self._should_ignore_message(rocket, msg_number):
-                return
+        # Rockets grouped by case-insensitive mission, maintained as rockets are created or change mission
+        self.mission_index: MissionIndex = MissionIndex()
 
-            if msg_number > rocket.last_message_number + 1:
-                self._buffer_message(rocket, msg_number, message)
-                return
+        # Rockets ordered by speed, and grouped by case-insensitive status and type, used by query_rockets
+        self.speed_index: SpeedIndex = SpeedIndex()
+        self.status_type_index: StatusTypeIndex = StatusTypeIndex()
+
+        # Rockets moved out of the fleet once exploded or idle, see archive_rockets, set to None to archive nothing
+        self.archive_policy: ArchivePolicy | None = archive_policy
+        self.cold_store: ColdStore | None = (
+            ColdStore(archive_policy.path, archive_policy.cache_size) if archive_policy is not None else None
+        )
+        # Held while rockets leave the fleet for the cold store, or move back
+        self._archive_lock = threading.Lock()
+        # Versions drawn by the archival passes with their monotonic time, to find the idle rockets
+        self._version_marks: deque[tuple[float, int]] = deque()
+        self._version_marks_lock = threading.Lock()
+
+        # Bumped whenever a rocket is created or changes, used to reuse serialized fleet views
+        self._fleet_versions = itertools.count(1)
+        self.fleet_version: int = next(self._fleet_versions)
+
+        # Set when each rocket is only ever written by the same thread, see IngestPipeline
+        self.single_writer: bool = False
+
+        # Set to log the events changing the fleet, see FleetJournal
+        self.event_log: EventLog | None = None
+
+        # Set to publish the changes of the rockets to subscribers, see FleetStream
+        self.fleet_stream: FleetStream | None = None
+
+        # Level of the logs of each applied message, set to DEBUG to drop them in production
+        self.message_log_level: int = logging.INFO
+
+        # Metrics of the hot path, recorded per thread without locks, exposed on /metrics
+        self.metrics: MetricsRegistry = MetricsRegistry()
+        self._messages_total = self.metrics.counter(
+            "lunar_messages_total", "Incoming messages by message type and outcome.", ("type", "outcome")
+        )
+        self._apply_seconds = self.metrics.histogram(
+            "lunar_message_apply_seconds", "Time to process an incoming message, in seconds."
+        )
+        self._lock_wait_seconds = self.metrics.histogram(
+            "lunar_lock_wait_seconds", "Time waited to acquire a contended lock, in seconds.", ("lock",)
+        )
+        self._buffer_depth = self.metrics.histogram(
+            "lunar_reorder_buffer_depth", "Depth of a rocket's reorder buffer when a message is buffered.",
+            buckets=DEPTH_BUCKETS
+        )
+        self.rockets_fleet.lock_wait = self._lock_wait_seconds
+        self.metrics.gauge(
+            "lunar_rockets", "Rockets in the fleet by status.", ("status",),
+            lambda: {(status,): count for status, count in self.mission_index.status_counts().items()}
+        )
+        self.metrics.gauge(
+            "lunar_buffered_messages", "Messages held in the reorder buffers.", (),
+            lambda: {(): self.buffer_accounting.messages}
+        )
+        self.metrics.gauge(
+            "lunar_buffered_bytes", "Estimated bytes held in the reorder buffers.", (),
+            lambda: {(): self.buffer_accounting.bytes}
+        )
+        self.metrics.gauge(
+            "lunar_pending_messages", "Messages held until their rocket's launch.", (),
+            lambda: {(): self.pending_store.stats()["messages"]}
+        )
+        self.metrics.gauge(
+            "lunar_storage_pending_rockets", "Changed rockets waiting to be written to the storage.", (),
+            lambda: {(): self.rockets_fleet.stats()["pending"]} if self.storage is not None else {}
+        )
+        self.metrics.gauge(
+            "lunar_archived_rockets", "Rockets moved to the cold store.", (),
+            lambda: {(): len(self.cold_store)} if self.cold_store is not None else {}
+        )
+
+    def clear_fleet(self):
+        """Removes all rockets from the fleet and its indexes."""
+        self.rockets_fleet.clear()
+        self.launch_index.clear()
+        self.mission_index.clear()
+        self.speed_index.clear()
+        self.status_type_index.clear()
+        self.buffer_accounting.clear()
+        self.pending_store.clear()
+        if self.cold_store is not None:
+            self.cold_store.clear()
+        self._record_change()
+
+    def load_stored_fleet(self) -> int:
+        """
+        Loads the rockets stored by a previous run, see StorageOptions, into the empty fleet and its
+        indexes, with their buffered messages. Must be called before messages are applied.
+
+        Returns:
+            int: The number of loaded rockets, 0 when the fleet is kept in memory only
+        """
+        now = time.monotonic()
+        rockets = self.rockets_fleet.load()
+        for rocket in rockets:
+            self._index_rocket(rocket)
+            if rocket.message_buffer:
+                self.buffer_accounting.add(len(rocket.message_buffer), rocket.buffered_bytes)
+                # The gap timeout of loaded buffers starts over
+                rocket.gap_started_at = now
+        if rockets:
+            self._record_change()
+        return len(rockets)
+
+    def close(self):
+        """Writes the last changes of the fleet to its storage and closes it."""
+        self.rockets_fleet.close()
+
+    def _record_change(self):
+        """Records that the state of the fleet has changed."""
+        self.fleet_version = next(self._fleet_versions)
+
+    def _log_message(self, channel_id: str, msg: str, *args, level: int | None = None):
+        """Logs about a rocket's message, at the message log level by default, formatting it only if enabled."""
+        level = self.message_log_level if level is None else level
+        if message_logger.isEnabledFor(level):
+            message_logger.log(level, "[%s] " + msg, channel_id, *args, extra={"rocket": channel_id})
+
+    def process_incoming_message(self, message: any) -> str:
+        """
+        Processes incoming messages from the API server.
+
+        Returns:
+            str: The outcome of the message (accepted, duplicate, buffered, pending, dropped or invalid)
+        """
+        start = time.perf_counter()
+        parsed = parse_message(message)
+        if parsed is None:
+            self._messages_total.inc(("other", MESSAGE_INVALID))
+            return MESSAGE_INVALID
+
+        outcome = self._ingest_message(*parsed)
+        self._apply_seconds.observe(time.perf_counter() - start)
+        return outcome
+
+    def process_parsed_message(self, channel_id: str, compact_message: CompactMessage) -> str:
+        """
+        Processes a message already validated by message_codec.parse_message, e.g. when it was
+        enqueued, without parsing it again.
+
+        Returns:
+            str: The outcome of the message, see process_incoming_message
+        """
+        start = time.perf_counter()
+        outcome = self._ingest_message(channel_id, compact_message)
+        self._apply_seconds.observe(time.perf_counter() - start)
+        return outcome
+
+    def _ingest_message(self, channel_id: str, compact_message: PendingMessage) -> str:
+        """Applies a parsed message, creating its rocket or holding it until launch, and records its outcome."""
+        rocket, new_rocket = self._get_or_create_rocket(channel_id, compact_message)
+        if not rocket: # The rocket hasn't launched yet
+            outcome = self._hold_until_launch(channel_id, compact_message)
+        elif new_rocket: # The launch message created the rocket
+            self._replay_pending_messages(rocket)
+            outcome = MESSAGE_ACCEPTED
+        else:
+            with self._rocket_lock(rocket):
+                archived = not self._in_fleet(rocket)
+                if not archived:
+                    outcome = self._apply_message(rocket, *compact_message)
+            if archived: # Archived while waiting for its lock, applied once back in the fleet
+                return self._ingest_message(channel_id, compact_message)
+
+        self._record_outcome(channel_id, compact_message, outcome)
+        return outcome
 
-            self._process_message(rocket, msg_type, payload, msg_time_str, msg_number)
+    def process_incoming_batch(self, messages: list) -> dict[str, int]:
+        """
+        Processes a batch of incoming messages.
+
+        Messages are grouped by channel and sorted by message number, so that each
+        rocket's messages are applied in order under a single acquisition of its lock.
+
+        Args:
+            messages (list): The messages to process
+
+        Returns:
+            dict[str, int]: The number of messages for each outcome
+        """
+        parsed_messages = []
+        invalid = 0
+        for message in messages:
+            parsed = parse_message(message)
+            if parsed is None:
+                invalid += 1
+                self._messages_total.inc(("other", MESSAGE_INVALID))
+                continue
+            parsed_messages.append(parsed)
+
+        outcomes = self.process_parsed_batch(parsed_messages)
+        outcomes[MESSAGE_INVALID] = invalid
+        return outcomes
+
+    def process_parsed_batch(self, parsed_messages: list[tuple[str, CompactMessage]]) -> dict[str, int]:
+        """
+        Processes a batch of messages already validated by message_codec.parse_message, as
+        (channel, compact message) pairs, like process_incoming_batch.
+
+        Returns:
+            dict[str, int]: The number of messages for each outcome
+        """
+        outcomes = {
+            MESSAGE_ACCEPTED: 0,
+            MESSAGE_DUPLICATE: 0,
+            MESSAGE_BUFFERED: 0,
+            MESSAGE_PENDING: 0,
+            MESSAGE_DROPPED: 0,
+            MESSAGE_INVALID: 0
+        }
+
+        channels: dict[str, list[PendingMessage]] = {}
+        for channel_id, compact_message in parsed_messages:
+            channels.setdefault(channel_id, []).append(compact_message)
+
+        for channel_id, channel_messages in channels.items():
+            channel_messages.sort(key=lambda message: message[0])
+            for outcome in self._process_channel_messages(channel_id, channel_messages):
+                outcomes[outcome] += 1
+
+        return outcomes
+
+    def _process_channel_messages(self, channel_id: str, messages: list[PendingMessage]) -> list[str]:
+        """Processes sorted messages of a single channel, holding the rocket lock once."""
+        outcomes = []
+        rocket = None
+        # Taken from the front one at a time until the rocket is in the fleet
+        remaining = deque(messages)
+
+        # Messages preceding the launch message are held until it arrives
+        while remaining and rocket is None:
+            outcomes.append(self._ingest_message(channel_id, remaining.popleft()))
+            rocket = self.rockets_fleet.get(channel_id)
+
+        while rocket is not None and remaining:
+            with self._rocket_lock(rocket):
+                if self._in_fleet(rocket):
+                    for compact_message in remaining:
+                        outcome = self._apply_message(rocket, *compact_message)
+                        self._record_outcome(rocket.id, compact_message, outcome)
+                        outcomes.append(outcome)
+                    return outcomes
+            # Archived while waiting for its lock, the next message brings it back to the fleet
+            outcomes.append(self._ingest_message(channel_id, remaining.popleft()))
+            rocket = self.rockets_fleet.get(channel_id)
+
+        return outcomes
+
+    def _record_outcome(self, channel_id: str, message: PendingMessage, outcome: str):
+        """Counts the outcome of a message, and logs the message to the event log if it changed the fleet."""
+        msg_type = message[1] if message[1] in KNOWN_MESSAGE_TYPES else "other"
+        self._messages_total.inc((msg_type, outcome))
+        if self.event_log is not None and outcome in (MESSAGE_ACCEPTED, MESSAGE_BUFFERED, MESSAGE_PENDING):
+            self.event_log.append([EVENT_MESSAGE, channel_id, *message])
+
+    def _rocket_lock(self, rocket: Rocket):
+        """Returns the lock to hold while applying messages to a rocket, none in single writer mode."""
+        return nullcontext() if self.single_writer else TimedLock(rocket.lock, self._lock_wait_seconds, ("rocket",))
+
+    def _in_fleet(self, rocket: Rocket) -> bool:
+        """Returns whether a rocket is still in the fleet, not archived since it was read."""
+        return self.cold_store is None or self.rockets_fleet.get(rocket.id) is rocket
+
+    def _apply_message(self, rocket: Rocket, msg_number: int, msg_type: str,
+                       msg_time_str: str, msg_time_us: int, payload: dict) -> str:
+        """Applies a message to an existing rocket. The caller must hold the rocket's lock."""
+        if self._should_ignore_message(rocket, msg_number):
+            return MESSAGE_DUPLICATE
+
+        if msg_number > rocket.last_message_number + 1:
+            outcome = self._buffer_message(rocket, msg_number, (msg_type, msg_time_str, msg_time_us, payload))
+        else:
+            self._process_message(rocket, msg_type, payload, msg_time_str, msg_number, msg_time_us)
             self._process_buffered_messages(rocket)
+            outcome = MESSAGE_ACCEPTED
+        # Saved once, with the buffered messages the message released or the message buffered
+        self.rockets_fleet.save(rocket)
+        return outcome
 
-    def _validate_message(self, message: dict) -> bool:
+    def _hold_until_launch(self, channel_id: str, message: PendingMessage) -> str:
+        """Holds a message of a channel that hasn't launched yet."""
+        outcome = self.pending_store.add(channel_id, message)
+        if outcome == PENDING_DUPLICATE:
+            return MESSAGE_DUPLICATE
+        if outcome != PENDING_ADDED:
+            self._log_message(channel_id, "Too many messages before launch. Message %s dropped.", message[0], level=logging.WARNING)
+            return MESSAGE_DROPPED
+
+        self._log_message(channel_id, "Message %s held until launch.", message[0])
+
+        # The launch may have been processed while the message was being held
+        rocket = self.rockets_fleet.get(channel_id)
+        if rocket is not None:
+            self._replay_pending_messages(rocket)
+        return MESSAGE_PENDING
+
+    def _replay_pending_messages(self, rocket: Rocket):
+        """Applies, in order, the messages of a rocket that arrived before its launch."""
+        pending_messages = self.pending_store.pop(rocket.id)
+        if not pending_messages:
+            return
+        with self._rocket_lock(rocket):
+            for pending_message in pending_messages:
+                self._apply_message(rocket, *pending_message)
+        self._log_message(rocket.id, "Replayed %s message(s) received before launch.", len(pending_messages))
+
+    def validate_message(self, message: dict) -> bool:
         """Validates message structure and required fields."""
-        metadata = message.get("metadata", {})
-        return all([
-            metadata.get("channel"),
-            isinstance(metadata.get("messageNumber"), int),
-            metadata.get("messageType"),
-            metadata.get("messageTime")
-        ])
-
-    def _get_or_create_rocket(self, channel_id: str, msg_type: str, 
-                            metadata: dict, payload: dict) -> tuple[Rocket, bool] | tuple[None, bool]:
+        return parse_message(message) is not None
+
+    def _get_or_create_rocket(self, channel_id: str,
+                              message: PendingMessage) -> tuple[Rocket, bool] | tuple[None, bool]:
         """Gets existing rocket or creates new one if it's a launch message."""
         rocket = self.rockets_fleet.get(channel_id)
         new_rocket = False
-        if not rocket and msg_type == "RocketLaunched":
-            rocket = self._create_new_rocket(channel_id, metadata, payload)
-            self.rockets_fleet[channel_id] = rocket
-            new_rocket = True
-            logging.info(f"Rocket {channel_id} added to fleet.")
+        if not rocket and self.cold_store is not None:
+            rocket = self._unarchive_rocket(channel_id)
+        if not rocket and message[1] == "RocketLaunched":
+            rocket, new_rocket = self.rockets_fleet.get_or_create(
+                channel_id,
+                lambda: self._index_rocket(self._create_new_rocket(channel_id, message))
+            )
+            if new_rocket:
+                self._record_change()
+                if self.fleet_stream is not None:
+                    self.fleet_stream.publish(rocket)
+                self._log_message(channel_id, "Rocket added to fleet.")
         return (rocket, new_rocket)
 
-    def _create_new_rocket(self, channel_id: str, metadata: dict, payload: dict) -> Rocket:
+    def _index_rocket(self, rocket: Rocket, unarchived: bool = False) -> Rocket:
+        """
+        Adds a new rocket, or one back from the archive, to the indexes of the fleet. Messages index
+        the rockets they create in the registry's factory, before other threads can reach them, so a
+        message changing a rocket concurrently always finds it in the indexes.
+
+        Returns:
+            Rocket: The indexed rocket
+        """
+        self.launch_index.add(rocket.launch_us, rocket.id)
+        if unarchived:
+            self.mission_index.unarchive(rocket.mission, (rocket.launch_us, rocket.id))
+        else:
+            self.mission_index.add(rocket.mission, (rocket.launch_us, rocket.id), rocket.status)
+        self.speed_index.add(rocket.speed, rocket.id)
+        self.status_type_index.add(rocket.status, rocket.rocket_type, rocket.id)
+        return rocket
+
+    def _unindex_archived_rockets(self, rockets: list[Rocket]):
+        """Removes archived rockets from the indexes of the fleet, they are still counted in their mission."""
+        keys = [(rocket.launch_us, rocket.id) for rocket in rockets]
+        self.launch_index.remove(keys)
+        missions: dict[str, list] = {}
+        for rocket, key in zip(rockets, keys):
+            missions.setdefault(rocket.mission, []).append(key)
+            self.speed_index.move(rocket.speed, None, rocket.id)
+            self.status_type_index.remove(rocket.status, rocket.rocket_type, rocket.id)
+        for mission, mission_keys in missions.items():
+            self.mission_index.archive(mission, mission_keys)
+
+    def _unarchive_rocket(self, channel_id: str) -> Rocket | None:
+        """Moves an archived rocket back to the fleet, as a message arrives for it, or returns None if not archived."""
+        with self._archive_lock:
+            archived = self.cold_store.pop(channel_id)
+            if archived is None:
+                # Another thread may have just moved it back
+                return self.rockets_fleet.get(channel_id)
+            rocket, unarchived = self.rockets_fleet.get_or_create(
+                channel_id, lambda: self._index_rocket(archived, unarchived=True)
+            )
+        if unarchived:
+            self._record_change()
+            self._log_message(channel_id, "Rocket moved back from the archive.")
+            # Messages held while it was neither archived nor in the fleet
+            self._replay_pending_messages(rocket)
+        return rocket
+
+    def archive_rockets(self, now: float | None = None, owns: Callable[[str], bool] | None = None) -> int:
+        """
+        Moves the rockets selected by the archive policy from the fleet to the cold store: the
+        exploded ones, and the ones unchanged for the idle time. Rockets with buffered messages
+        are kept in the fleet. An archived rocket still counts in its mission and is still found
+        by ID, and a message for it moves it back to the fleet. Its history is not kept.
+
+        Args:
+            now (float | None): Current monotonic time, defaults to time.monotonic()
+            owns (Callable[[str], bool] | None): In single writer mode, selects the rockets
+            written by the calling thread
+
+        Returns:
+            int: The number of archived rockets
+        """
+        if self.cold_store is None:
+            return 0
+        idle_version = self._idle_version(time.monotonic() if now is None else now)
+        exploded = self.archive_policy.exploded
+        rockets = [
+            rocket for rocket in self.rockets_fleet.values()
+            if ((exploded and rocket.status == "Exploded") or rocket.version < idle_version)
+            and not rocket.message_buffer and (owns is None or owns(rocket.id))
+        ]
+        if not rockets:
+            return 0
+
+        # Rockets are written to the store before leaving the fleet, so they are always found by ID
+        versions = []
+        for rocket in rockets:
+            with self._rocket_lock(rocket):
+                versions.append((rocket.version, rocket.to_snapshot()))
+        self.cold_store.archive(record for _, record in versions)
+        archived = []
+        # Rockets can't move back to the fleet until they have left its indexes
+        with self._archive_lock:
+            for rocket, (version, _) in zip(rockets, versions):
+                with self._rocket_lock(rocket):
+                    if rocket.version != version or rocket.message_buffer or not self.rockets_fleet.remove(rocket):
+                        # Changed while being archived, it stays in the fleet
+                        self.cold_store.pop(rocket.id)
+                        continue
+                archived.append(rocket)
+            self._unindex_archived_rockets(archived)
+        self._record_change()
+        logging.debug(f"Archived {len(archived)} rocket(s).")
+        return len(archived)
+
+    def _idle_version(self, now: float) -> int:
+        """
+        Returns a version older than the current version of the rockets changed within the idle
+        time of the archive policy, from the versions drawn by the previous passes, 0 if none.
+        """
+        idle_after = self.archive_policy.idle_after
+        if idle_after is None:
+            return 0
+        with self._version_marks_lock:
+            marks = self._version_marks
+            marks.append((now, next_version()))
+            # Keep the latest mark drawn at least the idle time ago, and the following ones
+            while len(marks) > 1 and marks[1][0] <= now - idle_after:
+                marks.popleft()
+            return marks[0][1] if marks[0][0] <= now - idle_after else 0
+
+    def _create_new_rocket(self, channel_id: str, message: PendingMessage) -> Rocket:
         """Creates a new rocket instance."""
-        return Rocket(
+        msg_number, _, msg_time_str, msg_time_us, payload = message
+        rocket = Rocket(
             id=channel_id,
-            launch_time=metadata.get("messageTime"),
-            last_update_time=metadata.get("messageTime"),
-            last_message_number=metadata.get("messageNumber"),
+            launch_time=msg_time_str,
+            last_update_time=msg_time_str,
+            last_message_number=msg_number,
             speed=payload.get("launchSpeed"),
             rocket_type=payload.get("type"),
-            mission=payload.get("mission")
+            mission=payload.get("mission"),
+            last_update_us=msg_time_us
         )
+        # Recorded before the rocket is added to the fleet, while no other thread can write it
+        self._record_speed(rocket)
+        self._record_mission(rocket)
+        return rocket
 
     def _should_ignore_message(self, rocket: Rocket, msg_number: int) -> bool:
         """Determines if message should be ignored based on message number."""
         if msg_number <= rocket.last_message_number:
-            logging.warning(f"[{rocket.id}] Message {msg_number} is too old. Ignoring.")
+            self._log_message(rocket.id, "Message %s is too old. Ignoring.", msg_number, level=logging.WARNING)
             return True
         return False
 
-    def _buffer_message(self, rocket: Rocket, msg_number: int, message: dict):
-        """Buffers out-of-order message if not already buffered."""
-        for buffered_msg_number, _ in rocket.message_buffer:
-            if buffered_msg_number == msg_number:
-                logging.info(f"[{rocket.id}] Message {msg_number} already buffered. Ignoring.")
+    def _buffer_message(self, rocket: Rocket, msg_number: int, message: tuple[str, str, int, dict]) -> str:
+        """
+        Buffers out-of-order message, as (message_type, message_time, message_time_us, payload),
+        if not already buffered.
+        """
+        size = estimate_message_size(message)
+        if not rocket.append_message_to_buffer(msg_number, message, size):
+            self._log_message(rocket.id, "Message %s already buffered. Ignoring.", msg_number)
+            return MESSAGE_DUPLICATE
+        self.buffer_accounting.add(1, size)
+        self._buffer_depth.observe(len(rocket.message_buffer))
+        if rocket.gap_started_at is None:
+            rocket.gap_started_at = time.monotonic()
+        self._log_message(rocket.id, "Message %s added to buffer.", msg_number)
+
+        self._enforce_buffer_limits(rocket)
+        return MESSAGE_BUFFERED
+
+    def _enforce_buffer_limits(self, rocket: Rocket, now: float | None = None):
+        """Skips gaps while the rocket's buffer exceeds its limits, then applies the gap timeout."""
+        limits = self.buffer_limits
+        while rocket.message_buffer and (
+            (limits.max_messages_per_rocket is not None and len(rocket.message_buffer) > limits.max_messages_per_rocket)
+            or (limits.max_bytes_per_rocket is not None and rocket.buffered_bytes > limits.max_bytes_per_rocket)
+        ):
+            self._skip_gap(rocket, eviction=True)
+        self._check_gap_timeout(rocket, now)
+
+    def _check_gap_timeout(self, rocket: Rocket, now: float | None = None):
+        """Applies the gap policy if the rocket has been waiting for a missing message for too long."""
+        timeout = self.buffer_limits.gap_timeout
+        if timeout is None or rocket.gap_started_at is None:
+            return
+        now = time.monotonic() if now is None else now
+        if now - rocket.gap_started_at < timeout:
+            return
+
+        if self.buffer_limits.gap_policy == GAP_POLICY_SKIP:
+            self._skip_gap(rocket, gap_timeout=True)
+        elif not rocket.degraded:
+            rocket.degraded = True
+            self.rockets_fleet.save(rocket)
+            self.buffer_accounting.record_gap_timeout()
+            self._log_message(
+                rocket.id, "Waiting for message %s for too long. Rocket degraded.", rocket.last_message_number + 1,
+                level=logging.WARNING
+            )
+
+    def _skip_gap(self, rocket: Rocket, eviction: bool = False, gap_timeout: bool = False):
+        """Gives up on the messages missing before the first buffered one, and applies the buffered messages."""
+        next_msg_number = rocket.message_buffer[0][0]
+        skipped = next_msg_number - rocket.last_message_number - 1
+        self._log_message(
+            rocket.id, "Skipping %s missing message(s) before message %s.", skipped, next_msg_number, level=logging.WARNING
+        )
+        rocket.last_message_number = next_msg_number - 1
+        self.buffer_accounting.record_skip(skipped, eviction, gap_timeout)
+        if self.event_log is not None:
+            self.event_log.append([EVENT_SKIP, rocket.id, rocket.last_message_number])
+        self._process_buffered_messages(rocket)
+        self.rockets_fleet.save(rocket)
+
+    def replay_event(self, event: list):
+        """
+        Applies an event read from the event log. Events are applied like the messages
+        they come from, so replaying an event already reflected in the fleet has no effect.
+        The event log must be detached while replaying, so events aren't logged twice.
+        """
+        kind, channel_id = event[0], event[1]
+        if kind == EVENT_MESSAGE:
+            self._ingest_message(channel_id, stored_message(event[2:]))
+        elif kind == EVENT_SKIP:
+            rocket = self.rockets_fleet.get(channel_id)
+            if rocket is None or event[2] <= rocket.last_message_number:
+                return
+            with self._rocket_lock(rocket):
+                rocket.last_message_number = event[2]
+                # Buffered messages preceding the skipped gap were skipped along with it
+                while rocket.message_buffer and rocket.message_buffer[0][0] <= rocket.last_message_number:
+                    buffered_bytes = rocket.buffered_bytes
+                    rocket.pop_message_from_buffer()
+                    self.buffer_accounting.add(-1, rocket.buffered_bytes - buffered_bytes)
+                self._process_buffered_messages(rocket)
+                self.rockets_fleet.save(rocket)
+
+    def snapshot_records(self) -> Iterator[list]:
+        """
+        Yields the records of a snapshot of the fleet: each rocket with its buffered messages,
+        then the messages held until launch, then the archived rockets. Each rocket is read under
+        its lock, in single writer mode the writers must be paused, see IngestPipeline.paused.
+        """
+        for rocket in self.rockets_fleet.values():
+            with self._rocket_lock(rocket):
+                record = rocket.to_snapshot()
+            yield [SNAPSHOT_ROCKET, *record]
+        for channel_id, messages in self.pending_store.items():
+            yield [SNAPSHOT_PENDING, channel_id, [list(message) for message in messages]]
+        if self.cold_store is not None:
+            for record in self.cold_store.records():
+                # Moved back to the fleet since it was read, if ever
+                if record[0] not in self.rockets_fleet:
+                    yield [SNAPSHOT_ARCHIVED, *record]
+
+    def restore_snapshot(self, records: Iterable[list]):
+        """
+        Restores the rockets, the messages held until launch and the archived rockets of a snapshot
+        into an empty fleet. Archived rockets are restored into the fleet if nothing archives them.
+        """
+        now = time.monotonic()
+        archived = []
+        for record in records:
+            if record[0] == SNAPSHOT_ROCKET:
+                rocket = Rocket.from_snapshot(record[1:])
+                self.rockets_fleet.get_or_create(rocket.id, lambda rocket=rocket: rocket)
+                self._index_rocket(rocket)
+                for values in record[-1]:
+                    msg_number, *message = stored_message(values)
+                    size = estimate_message_size(tuple(message))
+                    rocket.append_message_to_buffer(msg_number, tuple(message), size)
+                    self.buffer_accounting.add(1, size)
+                if rocket.message_buffer:
+                    # The gap timeout of restored buffers starts over
+                    rocket.gap_started_at = now
+                    self.rockets_fleet.save(rocket)
+            elif record[0] == SNAPSHOT_PENDING:
+                for message in record[2]:
+                    self.pending_store.add(record[1], stored_message(message), now)
+            elif record[0] == SNAPSHOT_ARCHIVED:
+                rocket = Rocket.from_snapshot(record[1:])
+                if self.cold_store is None:
+                    self.rockets_fleet.get_or_create(rocket.id, lambda rocket=rocket: rocket)
+                    self._index_rocket(rocket)
+                    continue
+                self.mission_index.add(rocket.mission, (rocket.launch_us, rocket.id), rocket.status)
+                self.mission_index.archive(rocket.mission, (rocket.launch_us, rocket.id))
+                archived.append(record[1:])
+                if len(archived) == _ARCHIVE_BATCH_SIZE:
+                    self.cold_store.archive(archived)
+                    archived = []
+        if archived:
+            self.cold_store.archive(archived)
+        self._record_change()
+
+    def sweep_buffers(self, now: float | None = None, owns: Callable[[str], bool] | None = None):
+        """
+        Archives the rockets selected by the archive policy, see archive_rockets, applies the
+        gap timeout to every buffering rocket, then evicts the largest buffers while the
+        buffers of the fleet exceed the global limits.
+
+        Args:
+            now (float | None): Current monotonic time, defaults to time.monotonic()
+            owns (Callable[[str], bool] | None): In single writer mode, selects the rockets
+            written by the calling thread
+        """
+        self.archive_rockets(now, owns)
+        self.pending_store.expire(now)
+
+        rockets = [
+            rocket for rocket in self.rockets_fleet.values()
+            if rocket.message_buffer and (owns is None or owns(rocket.id))
+        ]
+        for rocket in rockets:
+            with self._rocket_lock(rocket):
+                self._check_gap_timeout(rocket, now)
+
+        if not self.buffer_accounting.exceeds(self.buffer_limits):
+            return
+        for rocket in sorted(rockets, key=lambda rocket: rocket.buffered_bytes, reverse=True):
+            with self._rocket_lock(rocket):
+                while rocket.message_buffer and self.buffer_accounting.exceeds(self.buffer_limits):
+                    self._skip_gap(rocket, eviction=True)
+            if not self.buffer_accounting.exceeds(self.buffer_limits):
                 return
-        rocket.append_message_to_buffer(msg_number, message)
-        logging.info(f"[{rocket.id}] Message {msg_number} added to buffer.")
+
+    def buffer_stats(self, top: int = 10) -> dict:
+        """
+        Returns the occupancy of the reorder buffers.
+
+        Args:
+            top (int): Number of largest buffers to detail
+
+        Returns:
+            dict: The limits, the totals across the fleet, the messages held until launch,
+            the number of buffering rockets, the degraded rockets and the largest buffers
+        """
+        rockets = [rocket for rocket in self.rockets_fleet.values() if rocket.message_buffer]
+        now = time.monotonic()
+        return {
+            "limits": self.buffer_limits.to_dict(),
+            "totals": self.buffer_accounting.to_dict(),
+            "pending": self.pending_store.stats(),
+            "buffering_rockets": len(rockets),
+            "degraded_rockets": sorted(rocket.id for rocket in rockets if rocket.degraded),
+            "largest_buffers": [
+                {
+                    "id": rocket.id,
+                    "messages": len(rocket.message_buffer),
+                    "bytes": rocket.buffered_bytes,
+                    "gap_age_seconds": round(now - rocket.gap_started_at, 3) if rocket.gap_started_at else 0,
+                    "degraded": rocket.degraded
+                }
+                for rocket in heapq.nlargest(top, rockets, key=lambda rocket: rocket.buffered_bytes)
+            ]
+        }
 
     def _process_message(self, rocket: Rocket, msg_type: str, 
-                        payload: dict, msg_time_str: str, msg_number: int):
+                        payload: dict, msg_time_str: str, msg_number: int, msg_time_us: int):
         """Processes message based on its type."""
         handlers = {
             "RocketSpeedIncreased": self._handle_speed_increase,
@@ -97,47 +772,261 @@ class ControlCenter:
             "RocketMissionChanged": self._handle_mission_change
         }
         if handler := handlers.get(msg_type):
-            handler(rocket, payload, msg_time_str, msg_number)
+            previous_mission = rocket.mission
+            handler(rocket, payload, msg_time_str, msg_number, msg_time_us)
+            self._record_change()
+            if self.fleet_stream is not None:
+                self.fleet_stream.publish(rocket, previous_mission)
 
     def _handle_speed_increase(self, rocket: Rocket, payload: dict, 
-                             msg_time_str: str, msg_number: int):
+                             msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Handles speed increase message."""
         speed_increment = payload.get("by")
-        rocket.increase_speed(speed_increment, msg_time_str, msg_number)
-        logging.info(f"[{rocket.id}] Speed increased by {speed_increment}. New speed: {rocket.speed}.")
+        previous_speed = rocket.speed
+        rocket.increase_speed(speed_increment, msg_time_str, msg_number, msg_time_us)
+        self.speed_index.move(previous_speed, rocket.speed, rocket.id)
+        self._record_speed(rocket)
+        self._log_message(rocket.id, "Speed increased by %s. New speed: %s.", speed_increment, rocket.speed)
 
     def _handle_speed_decrease(self, rocket: Rocket, payload: dict, 
-                             msg_time_str: str, msg_number: int):
+                             msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Handles speed decrease message."""
         speed_decrement = payload.get("by")
-        rocket.decrease_speed(speed_decrement, msg_time_str, msg_number)
-        logging.info(f"[{rocket.id}] Speed decreased by {speed_decrement}. New speed: {rocket.speed}.")
+        previous_speed = rocket.speed
+        rocket.decrease_speed(speed_decrement, msg_time_str, msg_number, msg_time_us)
+        self.speed_index.move(previous_speed, rocket.speed, rocket.id)
+        self._record_speed(rocket)
+        self._log_message(rocket.id, "Speed decreased by %s. New speed: %s.", speed_decrement, rocket.speed)
 
     def _handle_explosion(self, rocket: Rocket, payload: dict, 
-                         msg_time_str: str, msg_number: int):
+                         msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Handles explosion message."""
         reason = payload.get("reason")
-        rocket.explode(reason, msg_time_str, msg_number)
-        logging.info(f"[{rocket.id}] Rocket exploded. Reason: {reason}.")
+        previous_status = rocket.status
+        rocket.explode(reason, msg_time_str, msg_number, msg_time_us)
+        if rocket.status != previous_status:
+            self.mission_index.update_status(rocket.mission, previous_status, rocket.status)
+            self.status_type_index.move(previous_status, rocket.status, rocket.rocket_type, rocket.id)
+        self._log_message(rocket.id, "Rocket exploded. Reason: %s.", reason)
 
     def _handle_mission_change(self, rocket: Rocket, payload: dict, 
-                             msg_time_str: str, msg_number: int):
+                             msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Handles mission change message."""
         new_mission = payload.get("newMission")
-        rocket.update_mission(new_mission, msg_time_str, msg_number)
-        logging.info(f"[{rocket.id}] Mission changed to {new_mission}.")
+        previous_mission = rocket.mission
+        rocket.update_mission(new_mission, msg_time_str, msg_number, msg_time_us)
+        self._record_mission(rocket)
+        self.mission_index.move(previous_mission, new_mission, (rocket.launch_us, rocket.id), rocket.status)
+        self._log_message(rocket.id, "Mission changed to %s.", new_mission)
+
+    def _record_speed(self, rocket: Rocket):
+        """Records the speed of a rocket at the time of its last message in its history."""
+        if self.history_retention is not None and isinstance(rocket.speed, (int, float)):
+            if rocket.history is None:
+                rocket.history = RocketHistory(self.history_retention)
+            rocket.history.record_speed(rocket.last_update_us, rocket.speed)
+
+    def _record_mission(self, rocket: Rocket):
+        """Records the mission of a rocket from the time of its last message in its history."""
+        if self.history_retention is not None and isinstance(rocket.mission, str):
+            if rocket.history is None:
+                rocket.history = RocketHistory(self.history_retention)
+            rocket.history.record_mission(rocket.last_update_us, rocket.mission)
 
     def _process_buffered_messages(self, rocket: Rocket):
-        """Processes any buffered messages that are now ready."""
-        # Check if there is a message in the buffer
-        if not rocket.message_buffer:
-            return
-        
+        """Processes, in a single pass, every buffered message that now follows the last processed one."""
+        buffered_count, buffered_bytes = len(rocket.message_buffer), rocket.buffered_bytes
+
         # A heap is used, so root of the list is the message with the smallest message number
-        buffered_msg_number, buffered_message = rocket.message_buffer[0]
-        if buffered_msg_number == rocket.last_message_number + 1:
-            rocket.pop_message_from_buffer()
-            self.process_incoming_message(buffered_message)
+        while rocket.message_buffer and rocket.message_buffer[0][0] == rocket.last_message_number + 1:
+            buffered_msg_number, (msg_type, msg_time_str, msg_time_us, payload) = rocket.pop_message_from_buffer()
+            # Buffered messages have already been validated
+            self._process_message(rocket, msg_type, payload, msg_time_str, buffered_msg_number, msg_time_us)
+
+        if len(rocket.message_buffer) != buffered_count:
+            self.buffer_accounting.add(len(rocket.message_buffer) - buffered_count, rocket.buffered_bytes - buffered_bytes)
+
+        # Progress has been made, so a remaining gap starts now
+        if rocket.message_buffer:
+            rocket.gap_started_at = time.monotonic()
+        else:
+            rocket.gap_started_at = None
+            rocket.degraded = False
+
+    def get_rocket(self, rocket_id: str) -> Rocket | None:
+        """Returns a specific rocket by its ID, from the fleet or else from the archive, or None if not found."""
+        rocket = self.rockets_fleet.get(rocket_id)
+        if rocket is None and self.cold_store is not None:
+            # Read the fleet again in case the rocket has just been moved back from the archive
+            rocket = self.cold_store.get(rocket_id) or self.rockets_fleet.get(rocket_id)
+        return rocket
+
+    def rockets_in_launch_order(self) -> list[Rocket]:
+        """Returns all rockets in the fleet, ordered by launch time."""
+        return self._rockets_for_keys(self.launch_index.keys())
+
+    def rockets_page(self, limit: int, cursor: str | None = None, mission: str | None = None,
+                     include_archived: bool = False) -> tuple[list[Rocket], str | None]:
+        """
+        Returns a page of rockets in the fleet, ordered by launch time.
+
+        Args:
+            limit (int): Maximum number of rockets in the page
+            cursor (str | None): Cursor returned with the previous page, None for the first page
+            mission (str | None): Only return the rockets of this mission, case insensitive
+            include_archived (bool): Also return the archived rockets, see archive_rockets
+
+        Returns:
+            tuple[list[Rocket], str | None]: The rockets, and the cursor of the next page
+            or None if this is the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # Fetch one more key than requested to know whether there is a next page
+        if mission is not None:
+            keys = self.mission_index.keys(mission, after, limit + 1)
+        else:
+            keys = self.launch_index.keys(after, limit + 1)
+        if include_archived and self.cold_store is not None:
+            return self._page_with_archived(keys, after, limit, mission)
+        next_cursor = encode_cursor(keys[limit - 1]) if len(keys) > limit else None
+        return (self._rockets_for_keys(keys[:limit]), next_cursor)
+
+    def _page_with_archived(self, keys: list, after: tuple | None, limit: int,
+                            mission: str | None) -> tuple[list[Rocket], str | None]:
+        """Merges a page of launch time index keys with the archived rockets of the same range."""
+        rockets = ((key, self.rockets_fleet.get(key[1])) for key in keys)
+        archived = (
+            ((rocket.launch_us, rocket.id), rocket) for rocket in self.cold_store.page(after, limit + 1, mission)
+            # Moved back to the fleet since it was read
+            if rocket.id not in self.rockets_fleet
+        )
+        entries = list(itertools.islice(heapq.merge(rockets, archived, key=itemgetter(0)), limit + 1))
+        next_cursor = encode_cursor(entries[limit - 1][0]) if len(entries) > limit else None
+        return ([rocket for _, rocket in entries[:limit] if rocket is not None], next_cursor)
+
+    def rockets_of_mission(self, mission: str) -> list[Rocket]:
+        """Returns the rockets of a specific mission, case insensitive, ordered by launch time."""
+        return self._rockets_for_keys(self.mission_index.keys(mission))
+
+    def query_rockets(self, status: str | None = None, rocket_type: str | None = None,
+                      min_speed: int | float | None = None, max_speed: int | float | None = None,
+                      sort: str = "launch_time", descending: bool = False, limit: int | None = None,
+                      include_archived: bool = False) -> list[Rocket]:
+        """
+        Returns the rockets matching filters, sorted by a key.
+
+        The rockets are read from the index estimated to visit the fewest of them: the status and
+        type groups, the speed range, or with a limit, the index of the sort order walked until
+        enough rockets match. Rockets without a numeric speed never match a speed range, nor are
+        they returned when sorting by speed. Archived rockets are queried in the cold store.
+
+        Args:
+            status (str | None): Status of the rockets, case insensitive, any status if None
+            rocket_type (str | None): Type of the rockets, case insensitive, any type if None
+            min_speed (int | float | None): Lowest speed, included
+            max_speed (int | float | None): Highest speed, included
+            sort (str): Key the rockets are sorted by, see ROCKET_SORT_KEYS, ties are broken by ID
+            descending (bool): Sort from the highest key
+            limit (int | None): Maximum number of rockets to return
+            include_archived (bool): Also return the archived rockets, see archive_rockets
+
+        Returns:
+            list[Rocket]: The matching rockets, in sort order
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in ROCKET_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        if include_archived and self.cold_store is not None:
+            rockets = self.query_rockets(status, rocket_type, min_speed, max_speed, sort, descending, limit)
+            archived = self.cold_store.query(status, rocket_type, min_speed, max_speed, sort, descending, limit)
+            # Rockets moved back to the fleet since they were read are returned from the fleet
+            rockets += [rocket for rocket in archived if rocket.id not in self.rockets_fleet]
+            return self._sorted_rockets(rockets, sort, descending, limit)
+        by_group = status is not None or rocket_type is not None
+        by_speed = sort == "speed" or min_speed is not None or max_speed is not None
+        status_key = category_key(status) if status is not None else None
+        type_key = category_key(rocket_type) if rocket_type is not None else None
+
+        def matches(rocket: Rocket) -> bool:
+            if status_key is not None and category_key(rocket.status) != status_key:
+                return False
+            if type_key is not None and category_key(rocket.rocket_type) != type_key:
+                return False
+            if by_speed:
+                speed = rocket.speed
+                if not isinstance(speed, (int, float)):
+                    return False
+                if (min_speed is not None and speed < min_speed) or (max_speed is not None and speed > max_speed):
+                    return False
+            return True
+
+        # Estimate the number of matching rockets from the sizes of the groups and of the range,
+        # assuming the filters are independent
+        fleet_size = len(self.rockets_fleet)
+        group_size = self.status_type_index.count(status, rocket_type) if by_group else fleet_size
+        range_size = self.speed_index.count(min_speed, max_speed) if by_speed else fleet_size
+        expected = group_size * range_size / fleet_size if fleet_size else 0
+
+        if limit is not None and expected and sort in ("launch_time", "speed"):
+            # Walking the sort order visits the index until the limit is reached, about one match
+            # in every size / expected keys, the speed index only being walked over the range
+            walk_size = limit * (range_size if sort == "speed" else fleet_size) / expected
+            if walk_size < min(group_size, range_size):
+                rockets = self._walk_sort_index(sort, min_speed, max_speed, descending, limit, matches, walk_size)
+                return self._sorted_rockets(rockets, sort, descending, limit)
+
+        if by_group and group_size <= range_size:
+            candidates = map(self.rockets_fleet.get, self.status_type_index.ids(status, rocket_type))
+        elif by_speed:
+            candidates = (self.rockets_fleet.get(rocket_id) for _, rocket_id in self.speed_index.keys(min_speed, max_speed))
+        else:
+            candidates = self.rockets_fleet.values()
+        rockets = [rocket for rocket in candidates if rocket is not None and matches(rocket)]
+        return self._sorted_rockets(rockets, sort, descending, limit)
+
+    def _walk_sort_index(self, sort: str, min_speed: int | float | None, max_speed: int | float | None,
+                         descending: bool, limit: int, matches: Callable[[Rocket], bool],
+                         walk_size: float) -> list[Rocket]:
+        """Walks the launch time or speed index in batches, until enough rockets match or the index ends."""
+        batch_size = max(limit, int(walk_size) + 1)
+        found: list[Rocket] = []
+        # A rocket changing speed during the walk may be met again at its new speed
+        seen: set[str] = set()
+        after = None
+        while len(found) < limit:
+            if sort == "speed":
+                keys = self.speed_index.keys(min_speed, max_speed, after, batch_size, descending)
+            else:
+                keys = self.launch_index.keys(after, batch_size, descending)
+            for _, rocket_id in keys:
+                rocket = self.rockets_fleet.get(rocket_id)
+                if rocket is not None and rocket_id not in seen and matches(rocket):
+                    seen.add(rocket_id)
+                    found.append(rocket)
+            if len(keys) < batch_size:
+                break
+            after = keys[-1]
+            # The estimate was too optimistic, widen the next batches
+            batch_size *= 2
+        return found
+
+    @staticmethod
+    def _sorted_rockets(rockets: list[Rocket], sort: str, descending: bool, limit: int | None) -> list[Rocket]:
+        """Sorts rockets by a key of ROCKET_SORT_KEYS, keeping the first ones up to a limit."""
+        key = ROCKET_SORT_KEYS[sort]
+        if limit is None:
+            return sorted(rockets, key=key, reverse=descending)
+        return (heapq.nlargest if descending else heapq.nsmallest)(limit, rockets, key=key)
+
+    def _rockets_for_keys(self, keys: list) -> list[Rocket]:
+        """Returns the rockets of launch time index keys, skipping any no longer in the fleet."""
+        rockets = (self.rockets_fleet.get(rocket_id) for _, rocket_id in keys)
+        return [rocket for rocket in rockets if rocket is not None]
 
     def list_rockets_in_fleet(self) -> list[dict]:
         """
@@ -146,13 +1035,25 @@ class ControlCenter:
         Returns:
             list[dict]: A list of rocket dictionaries that can be JSON serialized
         """
-        with self.fleet_lock:
-        
-            sorted_rockets = sorted(
-                self.rockets_fleet.values(),
-                key=lambda rocket: rocket.launch_time
-            )
-            return [rocket.to_dict() for rocket in sorted_rockets]
+        return [rocket.to_dict() for rocket in self.rockets_in_launch_order()]
+
+    def list_rockets_page(self, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """
+        Returns a page of rockets in the fleet, ordered by launch time.
+
+        Args:
+            limit (int): Maximum number of rockets in the page
+            cursor (str | None): Cursor returned with the previous page, None for the first page
+
+        Returns:
+            tuple[list[dict], str | None]: The rocket dictionaries, and the cursor of the next page
+            or None if this is the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        rockets, next_cursor = self.rockets_page(limit, cursor)
+        return ([rocket.to_dict() for rocket in rockets], next_cursor)
     
     def list_missions(self) -> list[str]:
         """
@@ -161,9 +1062,7 @@ class ControlCenter:
         Returns:
             list[str]: A list of unique mission names, sorted alphabetically
         """
-        with self.fleet_lock:
-            missions = {rocket.mission for rocket in self.rockets_fleet.values()}
-            return sorted(list(missions))
+        return list(self.mission_index.missions())
     
     def get_rockets_by_mission(self, mission: str) -> list[dict]:
         """
@@ -175,13 +1074,20 @@ class ControlCenter:
         Returns:
             list[dict]: A list of rocket dictionaries assigned to the mission, ordered by launch time
         """
-        with self.fleet_lock:
-            mission_rockets = [
-                rocket for rocket in self.rockets_fleet.values() 
-                if rocket.mission.lower() == mission.lower()
-            ]
-            sorted_rockets = sorted(mission_rockets, key=lambda rocket: rocket.launch_time)
-            return [rocket.to_dict() for rocket in sorted_rockets]
+        return [rocket.to_dict() for rocket in self.rockets_of_mission(mission)]
+
+    def get_mission_stats(self, mission: str) -> dict | None:
+        """
+        Returns the number of rockets of a specific mission per status.
+
+        Args:
+            mission (str): The mission name, case insensitive
+
+        Returns:
+            dict | None: The total number of rockets of the mission and the number of
+            launched and exploded rockets, or None if the mission has no rockets
+        """
+        return self.mission_index.counts(mission)
     
     def get_rocket_by_id(self, rocket_id: str) -> dict | None:
         """
@@ -193,6 +1099,42 @@ class ControlCenter:
         Returns:
             dict | None: The rocket details as a dictionary, or None if not found.
         """
-        with self.fleet_lock:
-            rocket = self.rockets_fleet.get(rocket_id)
-            return rocket.to_dict() if rocket else None
\ No newline at end of file
+        rocket = self.get_rocket(rocket_id)
+        return rocket.to_dict() if rocket else None
+
+    def get_rocket_history(self, rocket_id: str, start: str | None = None, end: str | None = None,
+                           resolution: float | None = None) -> dict | None:
+        """
+        Returns the speeds and missions of a specific rocket over time.
+
+        Args:
+            rocket_id (str): The ID of the rocket
+            start (str | None): ISO 8601 time from which to return the history, from the oldest retained if None
+            end (str | None): ISO 8601 time up to which to return the history, included, up to the latest if None
+            resolution (float | None): Seconds of the buckets the speeds are aggregated in, see RocketHistory.speeds
+
+        Returns:
+            dict | None: The `speeds` and `missions` of the rocket, or None if not found
+
+        Raises:
+            ValueError: If a time is malformed
+        """
+        start_us = parse_time(start) if start else None
+        end_us = parse_time(end) if end else None
+        resolution_us = round(resolution * 1_000_000) if resolution else None
+
+        rocket = self.get_rocket(rocket_id)
+        if rocket is None:
+            return None
+        speeds, missions = [], []
+        with self._rocket_lock(rocket):
+            if rocket.history is not None:
+                speeds = rocket.history.speeds(start_us, end_us, resolution_us)
+                missions = rocket.history.missions(start_us, end_us)
+        return {"id": rocket.id, "resolution": resolution, "speeds": speeds, "missions": missions}
+
+    def fleet_columns(self) -> FleetColumns:
+        """Returns a columnar snapshot of the fleet, see FleetAnalytics. Requires NumPy."""
+        # Read the version before the rockets, so the snapshot is never tagged newer than its content
+        version = self.fleet_version
+        return FleetColumns.from_rockets(self.rockets_fleet.values(), version)
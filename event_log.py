@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Iterable, Iterator
+
+# Every record is framed by its payload length, the CRC32 of its payload and its sequence number
+_FRAME = struct.Struct("<IIQ")
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".log"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".snap"
+
+DEFAULT_SYNC_INTERVAL = 0.05
+
+def _encode(record: list) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode()
+
+def _frame(sequence: int, record: list) -> bytes:
+    payload = _encode(record)
+    return _FRAME.pack(len(payload), zlib.crc32(payload), sequence) + payload
+
+def _read_frames(path: str) -> Iterator[tuple[int, int, list]]:
+    """
+    Reads the records of a framed file, stopping at the first torn or corrupt record.
+
+    Yields:
+        tuple[int, int, list]: The offset following the record, its sequence number and the record
+    """
+    offset = 0
+    with open(path, "rb", buffering=1024 * 1024) as file:
+        while len(header := file.read(_FRAME.size)) == _FRAME.size:
+            length, checksum, sequence = _FRAME.unpack(header)
+            payload = file.read(length)
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                return
+            offset += _FRAME.size + length
+            yield (offset, sequence, json.loads(payload))
+
+def _file_name(prefix: str, sequence: int, suffix: str) -> str:
+    # Zero padded so that names sort like sequence numbers
+    return f"{prefix}{sequence:020d}{suffix}"
+
+def _list_files(directory: str, prefix: str, suffix: str) -> list[tuple[int, str]]:
+    """Returns the sequence numbers and paths of the files of a kind, in sequence order."""
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            try:
+                files.append((int(name[len(prefix):-len(suffix)]), os.path.join(directory, name)))
+            except ValueError:
+                continue
+    return sorted(files)
+
+def _sync_directory(directory: str):
+    """Makes the creation, renaming or removal of files in a directory durable."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class EventLog:
+    """
+    Append-only log of events, each event being a JSON serializable list.
+
+    Events are framed in binary, with their length, checksum and sequence number, and
+    appended to segment files named after the sequence number of their first event.
+    Appends are only buffered: a background thread flushes and fsyncs the log every
+    sync interval, so one fsync makes a whole batch of events durable. A torn event at
+    the end of the log, left by a crash during a write, is discarded on open.
+    """
+
+    def __init__(self, directory: str, sync_interval: float = DEFAULT_SYNC_INTERVAL, after: int = 0):
+        """
+        Args:
+            directory (str): Directory holding the segments, created if missing
+            sync_interval (float): Seconds between fsyncs, 0 to fsync on every append
+            after (int): Sequence number the new events must follow, such as the one of a snapshot
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_interval = sync_interval
+
+        self._lock = threading.Lock()
+        # Serializes fsyncs with the closing of segments, so appends never wait for an fsync
+        self._sync_lock = threading.Lock()
+        self._dirty = False
+        self._appended = 0
+        self._syncs = 0
+
+        segments = _list_files(directory, SEGMENT_PREFIX, SEGMENT_SUFFIX)
+        self.last_sequence: int = after
+        if segments:
+            self._open_last_segment(*segments[-1])
+        else:
+            self._open_segment(after + 1)
+        if self.last_sequence < after:
+            # Segments were lost, never reuse the sequence numbers covered by the snapshot
+            self._file.close()
+            self.last_sequence = after
+            self._open_segment(after + 1)
+
+        self._closed = threading.Event()
+        self._sync_thread = None
+        if sync_interval > 0:
+            self._sync_thread = threading.Thread(target=self._sync_periodically, name="event-log-sync", daemon=True)
+            self._sync_thread.start()
+
+    def _open_last_segment(self, first_sequence: int, path: str):
+        """Opens the last segment for appending, after discarding its torn tail."""
+        valid_end = 0
+        self.last_sequence = first_sequence - 1
+        for offset, sequence, _ in _read_frames(path):
+            valid_end, self.last_sequence = offset, sequence
+        if valid_end < os.path.getsize(path):
+            logging.warning(f"Discarding the torn end of event log segment {path}.")
+            with open(path, "r+b") as file:
+                file.truncate(valid_end)
+        self._segment_path = path
+        self._file = open(path, "ab")
+
+    def _open_segment(self, first_sequence: int):
+        self._segment_path = os.path.join(self.directory, _file_name(SEGMENT_PREFIX, first_sequence, SEGMENT_SUFFIX))
+        self._file = open(self._segment_path, "ab")
+        _sync_directory(self.directory)
+
+    def append(self, event: list) -> int:
+        """
+        Appends an event to the log. The event is durable after the next sync.
+
+        Returns:
+            int: The sequence number of the event
+        """
+        with self._lock:
+            self.last_sequence += 1
+            self._file.write(_frame(self.last_sequence, event))
+            self._dirty = True
+            self._appended += 1
+            sequence = self.last_sequence
+        if self.sync_interval <= 0:
+            self.sync()
+        return sequence
+
+    def sync(self):
+        """Flushes the appended events and waits until they are durable."""
+        with self._sync_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._file.flush()
+                self._dirty = False
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._syncs += 1
+
+    def rotate(self) -> int:
+        """
+        Starts a new segment, so that the previous ones can be removed once covered by a snapshot.
+
+        Returns:
+            int: The sequence number of the last event of the previous segments
+        """
+        with self._sync_lock:
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                last_sequence = self.last_sequence
+                if os.path.getsize(self._segment_path) > 0:
+                    self._file.close()
+                    self._open_segment(last_sequence + 1)
+        return last_sequence
+
+    def remove_segments(self, up_to: int):
+        """Removes the segments whose events all have a sequence number up to a given one."""
+        segments = _list_files(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX)
+        # A segment ends right before the first sequence number of the next one
+        for (_, path), (next_first_sequence, _) in zip(segments, segments[1:]):
+            if next_first_sequence - 1 <= up_to and path != self._segment_path:
+                os.remove(path)
+        _sync_directory(self.directory)
+
+    def read(self, after: int = 0) -> Iterator[tuple[int, list]]:
+        """
+        Reads the events following a sequence number, in order. Only the synced
+        events are guaranteed to be read.
+
+        Yields:
+            tuple[int, list]: The sequence number and the event
+        """
+        segments = _list_files(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX)
+        for index, (first_sequence, path) in enumerate(segments):
+            next_first_sequence = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first_sequence is not None and next_first_sequence - 1 <= after:
+                continue # Every event of the segment precedes the requested ones
+            for _, sequence, event in _read_frames(path):
+                if sequence > after:
+                    yield (sequence, event)
+
+    def stats(self) -> dict:
+        """Returns the last sequence number, the number of segments, appended events and fsyncs."""
+        with self._lock:
+            return {
+                "last_sequence": self.last_sequence,
+                "segments": len(_list_files(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX)),
+                "appended": self._appended,
+                "syncs": self._syncs
+            }
+
+    def close(self):
+        """Syncs the appended events and closes the log."""
+        self._closed.set()
+        if self._sync_thread:
+            self._sync_thread.join()
+        self.sync()
+        with self._lock:
+            self._file.close()
+
+    def _sync_periodically(self):
+        while not self._closed.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logging.error(f"Error syncing the event log: {e}")
+
+def write_snapshot(directory: str, sequence: int, records: Iterable[list]) -> str:
+    """
+    Writes a snapshot atomically, then removes the previous snapshots.
+
+    Args:
+        directory (str): Directory holding the snapshots
+        sequence (int): Sequence number of the last event reflected in the snapshot
+        records (Iterable[list]): The records of the snapshot
+
+    Returns:
+        str: The path of the snapshot
+    """
+    path = os.path.join(directory, _file_name(SNAPSHOT_PREFIX, sequence, SNAPSHOT_SUFFIX))
+    temporary_path = path + ".tmp"
+    count = 0
+    with open(temporary_path, "wb") as file:
+        for count, record in enumerate(records, start=1):
+            file.write(_frame(count, record))
+        # Closing record, a snapshot without it is incomplete
+        file.write(_frame(count + 1, ["end", count]))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    _sync_directory(directory)
+
+    for previous_sequence, previous_path in _list_files(directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+        if previous_sequence < sequence:
+            os.remove(previous_path)
+    return path
+
+def read_latest_snapshot(directory: str) -> tuple[int, list[list]]:
+    """
+    Reads the latest complete snapshot.
+
+    Returns:
+        tuple[int, list[list]]: The sequence number of the last event reflected in the
+        snapshot and its records, or 0 and no records if there is no snapshot
+    """
+    if not os.path.isdir(directory):
+        return (0, [])
+    for sequence, path in reversed(_list_files(directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)):
+        records = [record for _, _, record in _read_frames(path)]
+        if records and records[-1] == ["end", len(records) - 1]:
+            return (sequence, records[:-1])
+        logging.warning(f"Ignoring incomplete snapshot {path}.")
+    return (0, [])
@@ -0,0 +1,204 @@
+from datetime import datetime, timezone
+import itertools
+import logging
+from operator import attrgetter
+import threading
+import time
+from typing import Callable, Iterable
+from rocket import Rocket
+
+try:
+    import numpy
+except ImportError:  # Optional, the fleet statistics are unavailable without it
+    numpy = None
+
+# Seconds between two snapshots of the fleet, skipped while the fleet is unchanged
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+# Percentiles of the speeds reported in the fleet statistics
+SPEED_PERCENTILES = (50, 90, 95, 99)
+
+def _encode(values: Iterable, count: int) -> tuple["numpy.ndarray", list]:
+    """Encodes categorical values as integer codes, returns the codes and the value of each code."""
+    # Code each value by the position of its first occurrence without leaving C, then renumber the codes
+    first_positions: dict = {}
+    positions = numpy.fromiter(map(first_positions.setdefault, values, itertools.count()), numpy.intp, count)
+    codes = numpy.zeros(count, numpy.intp)
+    codes[list(first_positions.values())] = numpy.arange(len(first_positions))
+    return (codes[positions], list(first_positions))
+
+def _speeds(rockets: list[Rocket]) -> "numpy.ndarray":
+    """Returns the speeds of rockets, NaN for the rockets without a numeric speed."""
+    try:
+        return numpy.fromiter(map(attrgetter("speed"), rockets), numpy.float64, len(rockets))
+    except (TypeError, ValueError):
+        return numpy.fromiter(
+            (speed if isinstance(speed, (int, float)) else numpy.nan for speed in map(attrgetter("speed"), rockets)),
+            numpy.float64, len(rockets)
+        )
+
+def _recode(parts: list[tuple["numpy.ndarray", list]]) -> tuple["numpy.ndarray", list]:
+    """Concatenates categorical columns encoded separately, mapping their codes to shared ones."""
+    categories: dict = {}
+    columns = []
+    for codes, names in parts:
+        mapping = numpy.fromiter((categories.setdefault(name, len(categories)) for name in names), numpy.intp, len(names))
+        columns.append(mapping[codes] if len(names) else codes)
+    return (numpy.concatenate(columns) if columns else numpy.zeros(0, numpy.intp), list(categories))
+
+def _number(value) -> float | None:
+    """Converts a NumPy scalar to a JSON number, None if it is not a number."""
+    value = float(value)
+    return None if numpy.isnan(value) else value
+
+class FleetColumns:
+    """
+    Columnar snapshot of the fleet: the speed of every rocket, NaN if unknown, and its status,
+    mission, type and explosion reason encoded as integer codes into lists of categories.
+    Statistics are computed with vectorized group-bys over the columns, without reading any rocket.
+    """
+
+    def __init__(self, speeds: "numpy.ndarray", statuses: tuple["numpy.ndarray", list],
+                 missions: tuple["numpy.ndarray", list], rocket_types: tuple["numpy.ndarray", list],
+                 reasons: tuple["numpy.ndarray", list], fleet_version: int):
+        self.speeds = speeds
+        self.statuses, self.status_names = statuses
+        self.missions, self.mission_names = missions
+        self.rocket_types, self.rocket_type_names = rocket_types
+        self.reasons, self.reason_names = reasons
+        self.fleet_version = fleet_version
+
+    @classmethod
+    def from_rockets(cls, rockets: list[Rocket], fleet_version: int) -> "FleetColumns":
+        """Builds the columns from rockets, one column at a time and without locking them."""
+        # The registry lists rockets by shard, scattered in memory: read them in address order instead,
+        # so that each column is read with far fewer cache misses. The order of the rows doesn't matter
+        rockets = sorted(rockets, key=id)
+        count = len(rockets)
+        return cls(
+            _speeds(rockets),
+            _encode(map(attrgetter("status"), rockets), count),
+            _encode(map(attrgetter("mission"), rockets), count),
+            _encode(map(attrgetter("rocket_type"), rockets), count),
+            _encode(map(attrgetter("explosion_reason"), rockets), count),
+            fleet_version
+        )
+
+    @classmethod
+    def concatenate(cls, parts: list["FleetColumns"]) -> "FleetColumns":
+        """Concatenates the columns of partitions of the fleet, e.g. of the worker processes."""
+        return cls(
+            numpy.concatenate([part.speeds for part in parts]) if parts else numpy.zeros(0),
+            _recode([(part.statuses, part.status_names) for part in parts]),
+            _recode([(part.missions, part.mission_names) for part in parts]),
+            _recode([(part.rocket_types, part.rocket_type_names) for part in parts]),
+            _recode([(part.reasons, part.reason_names) for part in parts]),
+            sum(part.fleet_version for part in parts)
+        )
+
+    def __len__(self) -> int:
+        return len(self.speeds)
+
+    def stats(self) -> dict:
+        """
+        Computes the fleet-wide statistics.
+
+        Returns:
+            dict: The number of `rockets`, of `exploded` ones and their ratio, the `speed` minimum,
+            maximum, mean and percentiles, the number of rockets, exploded ones and mean speed of
+            each mission and rocket type, and the number of explosions per reason
+        """
+        count = len(self)
+        known = ~numpy.isnan(self.speeds)
+        # Masking copies the columns, skip it when every speed is known
+        if known.all():
+            known = slice(None)
+        speeds = self.speeds[known]
+        if "Exploded" in self.status_names:
+            exploded = self.statuses == self.status_names.index("Exploded")
+        else:
+            exploded = numpy.zeros(count, dtype=bool)
+        exploded_count = int(exploded.sum())
+
+        percentiles = numpy.percentile(speeds, SPEED_PERCENTILES) if speeds.size else [numpy.nan] * len(SPEED_PERCENTILES)
+        reasons = numpy.bincount(self.reasons[exploded], minlength=len(self.reason_names))
+        return {
+            "rockets": count,
+            "exploded": exploded_count,
+            "exploded_ratio": exploded_count / count if count else None,
+            "speed": {
+                "min": _number(speeds.min()) if speeds.size else None,
+                "max": _number(speeds.max()) if speeds.size else None,
+                "mean": _number(speeds.mean()) if speeds.size else None,
+                "percentiles": {f"p{percentile}": _number(value) for percentile, value in zip(SPEED_PERCENTILES, percentiles)}
+            },
+            "missions": self._group_by(self.missions, self.mission_names, known, exploded),
+            "rocket_types": self._group_by(self.rocket_types, self.rocket_type_names, known, exploded),
+            "explosion_reasons": {str(name): int(reasons[code]) for code, name in enumerate(self.reason_names) if reasons[code]}
+        }
+
+    def _group_by(self, codes: "numpy.ndarray", names: list, known: "numpy.ndarray", exploded: "numpy.ndarray") -> dict:
+        """Returns the number of rockets, of exploded ones and the mean speed of each category."""
+        size = len(names)
+        rockets = numpy.bincount(codes, minlength=size)
+        exploded_counts = numpy.bincount(codes[exploded], minlength=size)
+        speed_counts = numpy.bincount(codes[known], minlength=size)
+        speed_sums = numpy.bincount(codes[known], weights=self.speeds[known], minlength=size)
+        return {
+            str(name): {
+                "rockets": int(rockets[code]),
+                "exploded": int(exploded_counts[code]),
+                "mean_speed": float(speed_sums[code] / speed_counts[code]) if speed_counts[code] else None
+            }
+            for code, name in enumerate(names) if rockets[code]
+        }
+
+class FleetAnalytics:
+    """
+    Fleet-wide statistics, computed over columnar snapshots of the fleet. Taking a snapshot reads
+    every rocket, so it is done periodically rather than per request, and only holds the fleet's
+    shard locks while listing the rockets. The statistics of the latest snapshot are served.
+    """
+
+    def __init__(self, snapshot: Callable[[], FleetColumns], refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        Args:
+            snapshot (Callable[[], FleetColumns]): Takes a snapshot of the fleet, e.g. ControlCenter.fleet_columns
+            refresh_interval (float): Seconds between two snapshots, see run
+        """
+        self._snapshot = snapshot
+        self.refresh_interval = refresh_interval
+        self._stats: dict | None = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> dict:
+        """Takes a snapshot of the fleet and computes its statistics."""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            columns = self._snapshot()
+            built = time.perf_counter()
+            stats = columns.stats()
+            stats["snapshot"] = {
+                "fleet_version": columns.fleet_version,
+                "taken_at": datetime.now(timezone.utc).isoformat(),
+                "build_seconds": round(built - start, 6),
+                "stats_seconds": round(time.perf_counter() - built, 6)
+            }
+            # The columns are dropped, only the statistics are kept
+            self._stats = stats
+            return stats
+
+    def stats(self) -> dict:
+        """Returns the statistics of the latest snapshot, taking the first one if needed."""
+        return self._stats or self.refresh()
+
+    def run(self, fleet_version: Callable[[], int]):
+        """Refreshes the statistics every refresh interval, while the fleet version changes."""
+        while True:
+            time.sleep(self.refresh_interval)
+            if self._stats is not None and self._stats["snapshot"]["fleet_version"] == fleet_version():
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing fleet statistics: {e}")
@@ -0,0 +1,520 @@
+from array import array
+import base64
+import bisect
+import itertools
+import threading
+from typing import Iterable, Iterator
+
+# Key of a rocket in the launch time index, its launch time in microseconds since the epoch, see
+# Rocket.launch_us, so that times of any time zone compare. The ID breaks ties between rockets launched at the same time.
+LaunchKey = tuple[int, str]
+
+class LaunchTimeIndex:
+    """
+    Rocket IDs ordered by launch time.
+
+    The launch time of a rocket never changes, so rockets are inserted once at their
+    creation and reads return them in order without sorting the fleet.
+    """
+
+    def __init__(self):
+        self._keys: list[LaunchKey] = []
+        self._lock = threading.Lock()
+
+    def add(self, launch_us: int, rocket_id: str):
+        """Inserts a rocket in the index."""
+        with self._lock:
+            bisect.insort(self._keys, (launch_us, rocket_id))
+
+    def remove(self, keys: Iterable[LaunchKey]):
+        """Removes rockets from the index, by their keys."""
+        with self._lock:
+            _remove_sorted(self._keys, set(keys))
+
+    def keys(self, after: LaunchKey | None = None, limit: int | None = None,
+             descending: bool = False) -> list[LaunchKey]:
+        """
+        Returns the keys in launch time order.
+
+        Args:
+            after (LaunchKey | None): Only return the keys following this key
+            limit (int | None): Maximum number of keys to return
+            descending (bool): Return the keys from the latest launch, following a key means preceding it
+        """
+        with self._lock:
+            if descending:
+                end = bisect.bisect_left(self._keys, after) if after else len(self._keys)
+                start = max(end - limit, 0) if limit is not None else 0
+                return self._keys[start:end][::-1]
+            start = bisect.bisect_right(self._keys, after) if after else 0
+            end = start + limit if limit is not None else len(self._keys)
+            return self._keys[start:end]
+
+    def clear(self):
+        """Removes all rockets from the index."""
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+def _remove_sorted(keys: list, removed: set):
+    """Removes keys from a sorted list, one at a time if they are few, else in a single pass over the list."""
+    # Deleting a key shifts the following ones, filtering the list is cheaper past a few dozen keys
+    if len(removed) * 64 < len(keys):
+        for key in removed:
+            index = bisect.bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                del keys[index]
+    else:
+        keys[:] = [key for key in keys if key not in removed]
+
+# Stands for an ID following any other, to bound the keys of a speed from above
+_AFTER_ANY_ID = object()
+
+# Key of a rocket in the speed index. The ID breaks ties between rockets of the same speed.
+SpeedKey = tuple[int | float, str]
+
+# Keys per chunk of the speed index, chunks twice as large are split
+SPEED_INDEX_CHUNK_SIZE = 512
+
+class SpeedIndex:
+    """
+    Rocket IDs ordered by speed, as an order statistics structure.
+
+    Speeds change with most messages, so moving a rocket only records its new speed, and the
+    changes are applied when the index is next read, once per rocket however many messages it
+    received meanwhile. The keys are kept sorted in chunks of bounded size: applying a change
+    only shifts the keys of two small chunks instead of the whole fleet, and when most rockets
+    changed the chunks are rebuilt in a single sort instead. The speeds of each chunk are stored
+    as doubles in an array, next to each other, so searching a chunk doesn't visit objects
+    scattered in memory. The number of rockets in a speed range is counted from the chunk sizes,
+    without walking the range, which lets queries choose between this index and the other ones.
+    Rockets without a numeric speed are not indexed.
+    """
+
+    def __init__(self, chunk_size: int = SPEED_INDEX_CHUNK_SIZE):
+        self._chunk_size = chunk_size
+        # Speeds and IDs of each chunk, sorted by speed then ID
+        self._speeds: list[array] = []
+        self._ids: list[list[str]] = []
+        # Last speed and ID of each chunk, to find the chunk of a key by bisection
+        self._max_speeds = array("d")
+        self._max_ids: list[str] = []
+        self._length = 0
+        # Guards the chunks, held while applying the changes and reading
+        self._lock = threading.Lock()
+
+        # Changes not applied yet, as the speed in the chunks and the new speed of each rocket
+        self._changes: dict[str, tuple[int | float | None, int | float | None]] = {}
+        # Guards the changes only, so that recording a change never waits for a read
+        self._changes_lock = threading.Lock()
+
+    def add(self, speed: int | float | None, rocket_id: str):
+        """Inserts a rocket in the index."""
+        self.move(None, speed, rocket_id)
+
+    def move(self, old_speed: int | float | None, new_speed: int | float | None, rocket_id: str):
+        """Moves a rocket from a speed to another."""
+        with self._changes_lock:
+            change = self._changes.get(rocket_id)
+            # The speed in the chunks is the old speed of the first change since they were applied
+            self._changes[rocket_id] = (old_speed if change is None else change[0], new_speed)
+
+    def count(self, low: int | float | None = None, high: int | float | None = None) -> int:
+        """Returns the number of rockets whose speed is between two bounds, included."""
+        with self._lock:
+            self._apply_changes()
+            return self._rank(self._upper(high)) - self._rank(self._lower(low))
+
+    def keys(self, low: int | float | None = None, high: int | float | None = None, after: SpeedKey | None = None,
+             limit: int | None = None, descending: bool = False) -> list[SpeedKey]:
+        """
+        Returns the keys in speed order, with the speeds as floats.
+
+        Args:
+            low (int | float | None): Lowest speed, included
+            high (int | float | None): Highest speed, included
+            after (SpeedKey | None): Only return the keys following this key
+            limit (int | None): Maximum number of keys to return
+            descending (bool): Return the keys from the highest speed, following a key means preceding it
+        """
+        with self._lock:
+            self._apply_changes()
+            start, end = self._lower(low), self._upper(high)
+            if after is not None:
+                if descending:
+                    end = min(end, self._locate(after, bisect.bisect_left))
+                else:
+                    start = max(start, self._locate(after, bisect.bisect_right))
+            if start >= end:
+                return []
+            return list(itertools.islice(itertools.chain.from_iterable(self._slices(start, end, descending)), limit))
+
+    def clear(self):
+        """Removes all rockets from the index."""
+        with self._lock, self._changes_lock:
+            self._changes.clear()
+            self._speeds.clear()
+            self._ids.clear()
+            del self._max_speeds[:]
+            self._max_ids.clear()
+            self._length = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._apply_changes()
+            return self._length
+
+    def _apply_changes(self):
+        """Applies the recorded changes to the chunks, the lock being held."""
+        with self._changes_lock:
+            changes, self._changes = self._changes, {}
+        # Rebuilding sorts every key, worth it once a large part of the fleet changed
+        if len(changes) > self._length // 4:
+            self._rebuild(changes)
+            return
+        for rocket_id, (old_speed, new_speed) in changes.items():
+            if old_speed == new_speed and type(old_speed) is type(new_speed):
+                continue
+            if isinstance(old_speed, (int, float)):
+                self._remove(old_speed, rocket_id)
+            if isinstance(new_speed, (int, float)):
+                self._insert(new_speed, rocket_id)
+
+    def _rebuild(self, changes: dict[str, tuple]):
+        """Rebuilds the chunks from their keys and the recorded changes."""
+        speeds = {
+            rocket_id: speed
+            for chunk_speeds, chunk_ids in zip(self._speeds, self._ids) for speed, rocket_id in zip(chunk_speeds, chunk_ids)
+        }
+        for rocket_id, (_, new_speed) in changes.items():
+            if isinstance(new_speed, (int, float)):
+                speeds[rocket_id] = new_speed
+            else:
+                speeds.pop(rocket_id, None)
+        keys = sorted(zip(speeds.values(), speeds.keys()))
+        size = self._chunk_size
+        chunks = [keys[index:index + size] for index in range(0, len(keys), size)]
+        self._speeds = [array("d", (speed for speed, _ in chunk)) for chunk in chunks]
+        self._ids = [[rocket_id for _, rocket_id in chunk] for chunk in chunks]
+        self._max_speeds = array("d", (chunk[-1][0] for chunk in chunks))
+        self._max_ids = [chunk[-1][1] for chunk in chunks]
+        self._length = len(keys)
+
+    def _insert(self, speed: int | float, rocket_id: str):
+        if not self._ids:
+            self._speeds.append(array("d", (speed,)))
+            self._ids.append([rocket_id])
+            self._max_speeds.append(speed)
+            self._max_ids.append(rocket_id)
+            self._length = 1
+            return
+        index, position = self._locate((speed, rocket_id), bisect.bisect_left)
+        if index == len(self._ids):
+            # Follows every key, append it to the last chunk
+            index = len(self._ids) - 1
+            position = len(self._ids[index])
+        speeds, ids = self._speeds[index], self._ids[index]
+        speeds.insert(position, speed)
+        ids.insert(position, rocket_id)
+        if position == len(ids) - 1:
+            self._max_speeds[index], self._max_ids[index] = speed, rocket_id
+        self._length += 1
+        if len(ids) > 2 * self._chunk_size:
+            half = self._chunk_size
+            self._speeds[index:index + 1] = [speeds[:half], speeds[half:]]
+            self._ids[index:index + 1] = [ids[:half], ids[half:]]
+            self._max_speeds.insert(index, speeds[half - 1])
+            self._max_ids.insert(index, ids[half - 1])
+
+    def _remove(self, speed: int | float, rocket_id: str):
+        index, position = self._locate((speed, rocket_id), bisect.bisect_left)
+        if index == len(self._ids):
+            return
+        speeds, ids = self._speeds[index], self._ids[index]
+        if position == len(ids) or ids[position] != rocket_id or speeds[position] != speed:
+            return
+        del speeds[position]
+        del ids[position]
+        self._length -= 1
+        if not ids:
+            del self._speeds[index]
+            del self._ids[index]
+            del self._max_speeds[index]
+            del self._max_ids[index]
+        elif position == len(ids):
+            self._max_speeds[index], self._max_ids[index] = speeds[-1], ids[-1]
+
+    def _chunk_of(self, speed: int | float, rocket_id, search) -> int:
+        """
+        Returns the chunk where a key would be inserted by a bisect function, or the number of
+        chunks if after every one. A key without ID precedes the keys of its speed.
+        """
+        max_speeds, max_ids = self._max_speeds, self._max_ids
+        if rocket_id is None or rocket_id is _AFTER_ANY_ID:
+            return search(max_speeds, speed)
+        # Bisect on the speeds alone, the chunks ending with the same speed are then ordered by ID
+        index = bisect.bisect_left(max_speeds, speed)
+        while index < len(max_ids) and max_speeds[index] == speed and search(max_ids, rocket_id, index, index + 1) > index:
+            index += 1
+        return index
+
+    def _locate(self, key: tuple, search) -> tuple[int, int]:
+        """Returns the chunk and the position in the chunk where a key would be inserted."""
+        speed, rocket_id = key
+        index = self._chunk_of(speed, rocket_id, search)
+        if index == len(self._ids):
+            return (index, 0)
+        speeds, ids = self._speeds[index], self._ids[index]
+        start = bisect.bisect_left(speeds, speed)
+        if rocket_id is None:
+            return (index, start)
+        end = bisect.bisect_right(speeds, speed, start)
+        if rocket_id is _AFTER_ANY_ID:
+            return (index, end)
+        return (index, search(ids, rocket_id, start, end))
+
+    def _lower(self, low: int | float | None) -> tuple[int, int]:
+        return self._locate((low, None), bisect.bisect_left) if low is not None else (0, 0)
+
+    def _upper(self, high: int | float | None) -> tuple[int, int]:
+        return self._locate((high, _AFTER_ANY_ID), bisect.bisect_right) if high is not None else (len(self._ids), 0)
+
+    def _rank(self, location: tuple[int, int]) -> int:
+        """Returns the number of keys before a location."""
+        index, position = location
+        return sum(map(len, self._ids[:index])) + position
+
+    def _slices(self, start: tuple[int, int], end: tuple[int, int], descending: bool) -> Iterator[list[SpeedKey]]:
+        """Yields the keys between two locations, one chunk at a time, so that a limit stops copying them."""
+        (first, first_position), (last, last_position) = start, end
+        indexes = range(first, min(last, len(self._ids) - 1) + 1)
+        for index in reversed(indexes) if descending else indexes:
+            begin = first_position if index == first else 0
+            stop = last_position if index == last else len(self._ids[index])
+            if begin < stop:
+                chunk = list(zip(self._speeds[index][begin:stop], self._ids[index][begin:stop]))
+                yield chunk[::-1] if descending else chunk
+
+def category_key(value: str | None) -> str:
+    """Returns the case-insensitive key of a status or rocket type."""
+    return (value or "").casefold()
+
+class StatusTypeIndex:
+    """
+    Rocket IDs grouped by case-insensitive status and rocket type, a hash index selecting
+    the rockets of a status, of a type, or of both, without scanning the fleet. There are
+    few statuses and types, so selecting by one of them walks the groups of the other.
+    """
+
+    def __init__(self):
+        self._groups: dict[tuple[str, str], set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, status: str, rocket_type: str, rocket_id: str):
+        """Adds a new rocket to the index."""
+        with self._lock:
+            self._groups.setdefault((category_key(status), category_key(rocket_type)), set()).add(rocket_id)
+
+    def move(self, old_status: str, new_status: str, rocket_type: str, rocket_id: str):
+        """Moves a rocket from a status to another."""
+        type_key = category_key(rocket_type)
+        with self._lock:
+            group = self._groups.get((category_key(old_status), type_key))
+            if group is not None:
+                group.discard(rocket_id)
+                if not group:
+                    del self._groups[(category_key(old_status), type_key)]
+            self._groups.setdefault((category_key(new_status), type_key), set()).add(rocket_id)
+
+    def remove(self, status: str, rocket_type: str, rocket_id: str):
+        """Removes a rocket from the index."""
+        key = (category_key(status), category_key(rocket_type))
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None:
+                group.discard(rocket_id)
+                if not group:
+                    del self._groups[key]
+
+    def ids(self, status: str | None = None, rocket_type: str | None = None) -> list[str]:
+        """Returns the IDs of the rockets of a status and a type, either of them matching all if None."""
+        with self._lock:
+            return [rocket_id for group in self._matching_groups(status, rocket_type) for rocket_id in group]
+
+    def count(self, status: str | None = None, rocket_type: str | None = None) -> int:
+        """Returns the number of rockets of a status and a type, either of them matching all if None."""
+        with self._lock:
+            return sum(map(len, self._matching_groups(status, rocket_type)))
+
+    def clear(self):
+        """Removes all rockets from the index."""
+        with self._lock:
+            self._groups.clear()
+
+    def _matching_groups(self, status: str | None, rocket_type: str | None) -> list[set[str]]:
+        status_key = category_key(status) if status is not None else None
+        type_key = category_key(rocket_type) if rocket_type is not None else None
+        return [
+            group for (group_status, group_type), group in self._groups.items()
+            if status_key in (None, group_status) and type_key in (None, group_type)
+        ]
+
+def encode_cursor(key: LaunchKey) -> str:
+    """Encodes a launch time index key into an opaque pagination cursor."""
+    launch_us, rocket_id = key
+    raw = f"{launch_us}|{rocket_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> LaunchKey:
+    """
+    Decodes a pagination cursor into a launch time index key.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        launch_us, rocket_id = raw.split("|", 1)
+        return (int(launch_us), rocket_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def mission_key(mission: str | None) -> str:
+    """Returns the case-insensitive key of a mission."""
+    return (mission or "").casefold()
+
+class MissionIndex:
+    """
+    Rockets grouped by case-insensitive mission, ordered by launch time, with
+    the number of rockets of each mission per status.
+
+    The index is updated as rockets are created, change mission or explode, so
+    mission queries don't scan the fleet. Archived rockets are removed from the keys
+    of their mission but still counted, see ControlCenter.archive_rockets.
+    """
+
+    def __init__(self):
+        # Launch time index keys of the rockets of each mission, by mission key
+        self._rockets: dict[str, list[LaunchKey]] = {}
+        # Number of rockets of each mission per status, by mission key
+        self._counts: dict[str, dict[str, int]] = {}
+        # Number of rockets of each mission, by exact mission name
+        self._names: dict[str, int] = {}
+        # Sorted mission names, rebuilt when a mission appears or disappears
+        self._sorted_names: list[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, mission: str, launch_key: LaunchKey, status: str):
+        """Adds a new rocket to a mission."""
+        with self._lock:
+            self._add(mission, launch_key, status)
+
+    def move(self, old_mission: str, new_mission: str, launch_key: LaunchKey, status: str):
+        """Moves a rocket from a mission to another."""
+        with self._lock:
+            self._remove(old_mission, launch_key, status)
+            self._add(new_mission, launch_key, status)
+
+    def update_status(self, mission: str, old_status: str, new_status: str):
+        """Moves a rocket of a mission from a status to another in the counts."""
+        with self._lock:
+            counts = self._counts[mission_key(mission)]
+            counts[old_status.lower()] -= 1
+            counts[new_status.lower()] = counts.get(new_status.lower(), 0) + 1
+
+    def archive(self, mission: str, launch_keys: Iterable[LaunchKey]):
+        """Removes archived rockets from the keys of their mission, keeping them in the counts."""
+        key = mission_key(mission)
+        with self._lock:
+            rockets = self._rockets.get(key, [])
+            _remove_sorted(rockets, set(launch_keys))
+            if not rockets:
+                self._rockets.pop(key, None)
+
+    def unarchive(self, mission: str, launch_key: LaunchKey):
+        """Adds a rocket back to the keys of its mission, when it leaves the archive."""
+        with self._lock:
+            bisect.insort(self._rockets.setdefault(mission_key(mission), []), launch_key)
+
+    def keys(self, mission: str, after: LaunchKey | None = None, limit: int | None = None) -> list[LaunchKey]:
+        """
+        Returns the launch time index keys of the rockets of a mission, in launch time order.
+
+        Args:
+            mission (str): The mission name, case insensitive
+            after (LaunchKey | None): Only return the keys following this key
+            limit (int | None): Maximum number of keys to return
+        """
+        with self._lock:
+            keys = self._rockets.get(mission_key(mission), [])
+            start = bisect.bisect_right(keys, after) if after else 0
+            end = start + limit if limit is not None else len(keys)
+            return keys[start:end]
+
+    def missions(self) -> list[str]:
+        """Returns the names of all missions, sorted alphabetically."""
+        return self._sorted_names
+
+    def counts(self, mission: str) -> dict[str, int] | None:
+        """Returns the number of rockets of a mission per status, or None if the mission has no rockets."""
+        with self._lock:
+            counts = self._counts.get(mission_key(mission))
+            return dict(counts) if counts else None
+
+    def status_counts(self) -> dict[str, int]:
+        """Returns the number of rockets of all missions per status."""
+        totals = {}
+        with self._lock:
+            for counts in self._counts.values():
+                for status, count in counts.items():
+                    if status != "total":
+                        totals[status] = totals.get(status, 0) + count
+        return totals
+
+    def clear(self):
+        """Removes all rockets from the index."""
+        with self._lock:
+            self._rockets.clear()
+            self._counts.clear()
+            self._names.clear()
+            self._sorted_names = []
+
+    def _add(self, mission: str, launch_key: LaunchKey, status: str):
+        key = mission_key(mission)
+        bisect.insort(self._rockets.setdefault(key, []), launch_key)
+
+        counts = self._counts.setdefault(key, {"total": 0, "launched": 0, "exploded": 0})
+        counts["total"] += 1
+        counts[status.lower()] = counts.get(status.lower(), 0) + 1
+
+        if mission:
+            self._names[mission] = self._names.get(mission, 0) + 1
+            if self._names[mission] == 1:
+                self._sorted_names = sorted(self._names)
+
+    def _remove(self, mission: str, launch_key: LaunchKey, status: str):
+        key = mission_key(mission)
+        rockets = self._rockets.get(key, [])
+        # An archived rocket is counted without keys, never delete the key of another rocket
+        index = bisect.bisect_left(rockets, launch_key)
+        if index < len(rockets) and rockets[index] == launch_key:
+            del rockets[index]
+            if not rockets:
+                del self._rockets[key]
+
+        counts = self._counts.get(key)
+        if counts is None or not counts.get(status.lower()):
+            return
+        counts["total"] -= 1
+        counts[status.lower()] -= 1
+        # Archived rockets are still counted
+        if not counts["total"]:
+            del self._counts[key]
+
+        if mission:
+            self._names[mission] -= 1
+            if self._names[mission] == 0:
+                del self._names[mission]
+                self._sorted_names = sorted(self._names)
@@ -0,0 +1,132 @@
+from contextlib import AbstractContextManager, nullcontext
+import logging
+import threading
+import time
+from typing import Callable
+from control_center import ControlCenter
+from event_log import DEFAULT_SYNC_INTERVAL, EventLog, read_latest_snapshot, write_snapshot
+
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+class FleetJournal:
+    """
+    Keeps the fleet across restarts, with an event log and periodic snapshots.
+
+    Every message changing the fleet, and every skipped gap, is appended to the event log.
+    Periodically, a snapshot of the fleet is written, including the reorder buffers and the
+    messages held until launch, and the log segments it covers are removed. On startup, the
+    latest snapshot is restored and only the tail of the log is replayed.
+
+    Snapshots are taken while messages keep being applied: the log is rotated first, so
+    every event before the rotation is reflected in the snapshot, and events after it may
+    be too. Since replaying an event already reflected in the fleet has no effect, the
+    tail can be replayed over the snapshot as is.
+    """
+
+    def __init__(self, control_center: ControlCenter, directory: str,
+                 snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL, sync_interval: float = DEFAULT_SYNC_INTERVAL):
+        """
+        Args:
+            control_center (ControlCenter): The control center whose fleet is kept
+            directory (str): Directory holding the log segments and the snapshots
+            snapshot_interval (float): Seconds between snapshots
+            sync_interval (float): Seconds between fsyncs of the log, see EventLog
+        """
+        self.control_center = control_center
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.sync_interval = sync_interval
+        self.event_log: EventLog | None = None
+
+        # Pauses the writers of the fleet while it is read, needed in single writer mode, see IngestPipeline.paused
+        self.pause: Callable[[], AbstractContextManager] = nullcontext
+
+        self._snapshot_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._snapshot_thread: threading.Thread | None = None
+        self._last_snapshot_sequence = 0
+        self._last_snapshot_seconds = 0.0
+        self._snapshots = 0
+
+    def recover(self) -> dict:
+        """
+        Restores the fleet from the latest snapshot and the tail of the log, then starts logging.
+
+        Returns:
+            dict: The sequence number of the snapshot, the number of replayed events and the recovery time
+        """
+        start = time.perf_counter()
+        sequence, records = read_latest_snapshot(self.directory)
+        self.control_center.restore_snapshot(records)
+
+        self.event_log = EventLog(self.directory, self.sync_interval, after=sequence)
+        replayed = 0
+        for _, event in self.event_log.read(after=sequence):
+            self.control_center.replay_event(event)
+            replayed += 1
+        self.control_center.event_log = self.event_log
+        self._last_snapshot_sequence = sequence
+
+        recovery = {
+            "snapshot_sequence": sequence,
+            "rockets": len(self.control_center.rockets_fleet),
+            "replayed_events": replayed,
+            "seconds": time.perf_counter() - start
+        }
+        logging.info(
+            f"Recovered {recovery['rockets']} rocket(s) from snapshot {sequence} "
+            f"and {replayed} logged event(s) in {recovery['seconds']:.3f}s."
+        )
+        return recovery
+
+    def snapshot(self) -> int:
+        """
+        Writes a snapshot of the fleet, then removes the log segments it covers.
+
+        Returns:
+            int: The sequence number of the last event reflected in the snapshot
+        """
+        with self._snapshot_lock:
+            start = time.perf_counter()
+            with self.pause():
+                sequence = self.event_log.rotate()
+                records = list(self.control_center.snapshot_records())
+            write_snapshot(self.directory, sequence, records)
+            self.event_log.remove_segments(sequence)
+
+            self._last_snapshot_sequence = sequence
+            self._last_snapshot_seconds = time.perf_counter() - start
+            self._snapshots += 1
+        logging.info(f"Snapshot {sequence} of {len(records)} record(s) written in {self._last_snapshot_seconds:.3f}s.")
+        return sequence
+
+    def start(self):
+        """Starts writing snapshots every snapshot interval."""
+        self._snapshot_thread = threading.Thread(target=self._snapshot_periodically, name="fleet-snapshots", daemon=True)
+        self._snapshot_thread.start()
+
+    def close(self, snapshot: bool = True):
+        """Stops the snapshots, optionally writes a last one for a fast restart, and closes the log."""
+        self._stopped.set()
+        if self._snapshot_thread:
+            self._snapshot_thread.join()
+        if snapshot:
+            self.snapshot()
+        self.control_center.event_log = None
+        self.event_log.close()
+
+    def stats(self) -> dict:
+        """Returns the state of the log and of the snapshots."""
+        return {
+            **self.event_log.stats(),
+            "snapshots": self._snapshots,
+            "last_snapshot_sequence": self._last_snapshot_sequence,
+            "last_snapshot_seconds": round(self._last_snapshot_seconds, 3)
+        }
+
+    def _snapshot_periodically(self):
+        while not self._stopped.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logging.error(f"Error writing snapshot: {e}")
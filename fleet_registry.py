@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, Iterator
+from metrics import Histogram, TimedLock
+from rocket import Rocket
+
+DEFAULT_SHARD_COUNT = 32
+
+class FleetRegistry:
+    """
+    Registry of the rockets in the fleet, sharded by channel ID.
+
+    Each shard is a dictionary guarded by its own lock, so creating rockets on
+    different channels rarely contends. Looking up an existing rocket is lock-free,
+    and fleet-wide reads only hold one shard lock at a time while copying it.
+
+    The registry is also the storage of the fleet: the control center reads and creates rockets
+    through it, and reports each change of a rocket with save. This registry keeps the fleet in
+    memory only, storage backends extend it to keep the fleet elsewhere, see SQLiteFleetRegistry.
+    """
+
+    def __init__(self, shard_count: int = DEFAULT_SHARD_COUNT):
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        self._shards: list[dict[str, Rocket]] = [{} for _ in range(shard_count)]
+        self._shard_locks: list[threading.Lock] = [threading.Lock() for _ in range(shard_count)]
+        # Set to record the time waited for a shard lock when creating rockets
+        self.lock_wait: Histogram | None = None
+
+    def _shard_index(self, channel_id: str) -> int:
+        """Returns the index of the shard holding the given channel ID."""
+        return hash(channel_id) % len(self._shards)
+
+    def get(self, channel_id: str, default: Rocket | None = None) -> Rocket | None:
+        """Returns the rocket for a channel ID without taking any lock."""
+        return self._shards[self._shard_index(channel_id)].get(channel_id, default)
+
+    def get_or_create(self, channel_id: str, factory: Callable[[], Rocket]) -> tuple[Rocket, bool]:
+        """
+        Returns the rocket for a channel ID, creating it with the factory if it doesn't exist.
+
+        Returns:
+            tuple[Rocket, bool]: The rocket, and whether it has been created by this call
+        """
+        index = self._shard_index(channel_id)
+        shard = self._shards[index]
+        rocket = shard.get(channel_id)
+        if rocket is not None:
+            return (rocket, False)
+
+        lock = self._shard_locks[index]
+        with TimedLock(lock, self.lock_wait, ("fleet_shard",)) if self.lock_wait else lock:
+            # Another thread may have created the rocket while waiting for the lock
+            rocket = shard.get(channel_id)
+            if rocket is not None:
+                return (rocket, False)
+            rocket = factory()
+            shard[channel_id] = rocket
+            return (rocket, True)
+
+    def remove(self, rocket: Rocket) -> bool:
+        """
+        Removes a rocket from the registry, unless its channel ID now maps to another rocket.
+
+        Returns:
+            bool: Whether the rocket has been removed
+        """
+        index = self._shard_index(rocket.id)
+        shard = self._shards[index]
+        with self._shard_locks[index]:
+            if shard.get(rocket.id) is not rocket:
+                return False
+            del shard[rocket.id]
+            return True
+
+    def save(self, rocket: Rocket):
+        """
+        Records that a rocket of the registry changed in place: its state, or its buffered messages.
+        Nothing to do in memory, the registry holds the rocket itself.
+        """
+
+    def load(self) -> list[Rocket]:
+        """Adds the rockets stored by a previous run to the registry and returns them, none in memory."""
+        return []
+
+    def flush(self) -> int:
+        """Writes the changes recorded since the last flush, returns the number of rockets written."""
+        return 0
+
+    def close(self):
+        """Writes the last changes and releases the storage."""
+
+    def values(self) -> list[Rocket]:
+        """Returns a snapshot of all rockets, locking one shard at a time."""
+        rockets = []
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                rockets.extend(shard.values())
+        return rockets
+
+    def clear(self):
+        """Removes all rockets from the registry."""
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                shard.clear()
+
+    def __getitem__(self, channel_id: str) -> Rocket:
+        rocket = self.get(channel_id)
+        if rocket is None:
+            raise KeyError(channel_id)
+        return rocket
+
+    def __contains__(self, channel_id: str) -> bool:
+        return self.get(channel_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([rocket.id for rocket in self.values()])
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Callable
+from cold_store import ROCKETS_INDEXES, ROCKETS_TABLE, record_row
+from fleet_registry import FleetRegistry, DEFAULT_SHARD_COUNT
+from message_codec import stored_message
+from reorder_buffers import estimate_message_size
+from rocket import Rocket
+
+# Changed rockets written per transaction
+DEFAULT_STORAGE_BATCH_SIZE = 1000
+
+# Seconds between two flushes of the changes to the database. Longer intervals write a rocket
+# changing all the time less often, and lose more changes if the process is killed
+DEFAULT_STORAGE_FLUSH_INTERVAL = 1.0
+
+# Statements run for every batch, prepared once and reused from the statement cache of the connection
+_UPSERT = (
+    "INSERT INTO rockets VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+    "launch_us = excluded.launch_us, mission = excluded.mission, status = excluded.status, "
+    "rocket_type = excluded.rocket_type, speed = excluded.speed, last_update_us = excluded.last_update_us, "
+    "record = excluded.record"
+)
+_DELETE = "DELETE FROM rockets WHERE id = ?"
+
+class StorageOptions:
+    """Where the fleet is stored beyond memory, and how often its changes are written."""
+
+    def __init__(self, path: str = "fleet.db", batch_size: int = DEFAULT_STORAGE_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_STORAGE_FLUSH_INTERVAL, partition_count: int | None = None):
+        """
+        Args:
+            path (str): SQLite database of the fleet, created if missing and kept across restarts
+            batch_size (int): Changed rockets written per transaction
+            flush_interval (float): Seconds between two flushes of the changes
+            partition_count (int | None): Number of partitions of the fleet, if the database stores one of them
+
+        Raises:
+            ValueError: If the batch size or the flush interval is not positive
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.partition_count = partition_count
+
+    @classmethod
+    def from_env(cls) -> "StorageOptions | None":
+        """
+        Builds the options from environment variables, defaults are used for unset ones.
+        Returns None, keeping the fleet in memory only, unless LUNAR_STORAGE is set to sqlite.
+
+        Raises:
+            ValueError: If LUNAR_STORAGE is neither memory nor sqlite
+        """
+        backend = os.environ.get("LUNAR_STORAGE", "memory")
+        if backend == "memory":
+            return None
+        if backend != "sqlite":
+            raise ValueError(f"Unknown storage backend: {backend}")
+        defaults = cls()
+        return cls(
+            path=os.environ.get("LUNAR_STORAGE_PATH", defaults.path),
+            batch_size=int(os.environ.get("LUNAR_STORAGE_BATCH_SIZE", defaults.batch_size)),
+            flush_interval=float(os.environ.get("LUNAR_STORAGE_FLUSH_INTERVAL", defaults.flush_interval))
+        )
+
+    def for_partition(self, index: int, partition_count: int) -> "StorageOptions":
+        """Returns the options of one of the partitions of the fleet, each stored in its own database."""
+        return StorageOptions(f"{self.path}.{index}", self.batch_size, self.flush_interval, partition_count)
+
+    def open(self, shard_count: int = DEFAULT_SHARD_COUNT) -> "SQLiteFleetRegistry":
+        """Returns the registry storing the fleet with these options, see SQLiteFleetRegistry.load."""
+        return SQLiteFleetRegistry(self.path, shard_count, self.batch_size, self.flush_interval, self.partition_count)
+
+    def check_partition_count(self):
+        """
+        Checks that the database, if it exists, stores rockets of a fleet split in as many partitions.
+
+        Raises:
+            ValueError: If the database stores rockets of a fleet split differently
+        """
+        if not os.path.exists(self.path):
+            return
+        connection = sqlite3.connect(self.path)
+        try:
+            _check_partition_count(connection, self.path, self.partition_count)
+        finally:
+            connection.close()
+
+class SQLiteFleetRegistry(FleetRegistry):
+    """
+    Registry of the rockets in the fleet, stored in a SQLite database that outlives the process.
+
+    Rockets stay in the registry's memory, where messages are applied to them under their locks,
+    and the database is written behind: saving a rocket only records it as changed, and a background
+    thread writes the changed rockets every flush interval. A rocket saved many times between two
+    flushes is written once, so the changes waiting never outgrow the fleet. Each batch of rockets
+    is a single transaction of upserts, with the statement prepared once, into a database in WAL
+    mode, so other processes can read it while it is written. Rows are indexed by launch time, the
+    order in which they are loaded, and by mission, for the processes reading the database. The
+    control center still answers its queries from memory, where the rockets are up to date.
+
+    A partition of the fleet holds the rockets whose channel hashes to it, so its database is only
+    valid for the same number of partitions. That number is kept in the database, and loading it
+    with another one fails rather than losing rockets to other partitions.
+
+    A rocket is read without its lock when flushed: a change racing with the read saves the
+    rocket again, so the next flush writes its final state. The changes of the last flush
+    interval are lost if the process is killed, see close.
+    """
+
+    def __init__(self, path: str, shard_count: int = DEFAULT_SHARD_COUNT,
+                 batch_size: int = DEFAULT_STORAGE_BATCH_SIZE, flush_interval: float = DEFAULT_STORAGE_FLUSH_INTERVAL,
+                 partition_count: int | None = None):
+        """
+        Args:
+            path (str): SQLite database of the fleet, opened by load
+            shard_count (int): Number of shards of the registry
+            batch_size (int): Changed rockets written per transaction
+            flush_interval (float): Seconds between two flushes of the changes
+            partition_count (int | None): Number of partitions of the fleet, if the database stores one of them
+        """
+        super().__init__(shard_count)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.partition_count = partition_count
+        # Rockets changed since the last flush by ID, None for the rockets removed from the registry
+        self._changes: dict[str, Rocket | None] = {}
+        self._changes_lock = threading.Lock()
+        # Held while writing to the database, by a single flush at a time
+        self._flush_lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._closed = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._transactions = 0
+        self._written = 0
+
+    def get_or_create(self, channel_id: str, factory: Callable[[], Rocket]) -> tuple[Rocket, bool]:
+        """Returns the rocket for a channel ID, creating and saving it with the factory if it doesn't exist."""
+        rocket, created = super().get_or_create(channel_id, factory)
+        if created:
+            self.save(rocket)
+        return (rocket, created)
+
+    def remove(self, rocket: Rocket) -> bool:
+        """Removes a rocket from the registry and the database, unless its channel ID now maps to another rocket."""
+        removed = super().remove(rocket)
+        if removed:
+            with self._changes_lock:
+                self._changes[rocket.id] = None
+        return removed
+
+    def save(self, rocket: Rocket):
+        """Records that a rocket changed, it is written by the next flush."""
+        with self._changes_lock:
+            self._changes[rocket.id] = rocket
+
+    def load(self) -> list[Rocket]:
+        """
+        Opens the database, adds the rockets it stores to the empty registry with their buffered
+        messages, and starts writing the changes in the background.
+
+        Returns:
+            list[Rocket]: The loaded rockets, in launch time order
+
+        Raises:
+            ValueError: If the database stores rockets of a fleet split in another number of partitions
+        """
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            _check_partition_count(connection, self.path, self.partition_count)
+            with connection:
+                connection.execute("PRAGMA journal_mode = WAL")
+                # Committed transactions survive a crash of the process, checkpoints wait for the disk
+                connection.execute("PRAGMA synchronous = NORMAL")
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {ROCKETS_TABLE}")
+                for index in ROCKETS_INDEXES:
+                    connection.execute(f"CREATE INDEX IF NOT EXISTS {index}")
+                connection.execute(f"PRAGMA user_version = {self.partition_count or 0}")
+        except BaseException:
+            connection.close()
+            raise
+
+        rockets = []
+        for record, in connection.execute("SELECT record FROM rockets ORDER BY launch_us, id"):
+            record = json.loads(record)
+            rocket = Rocket.from_snapshot(record)
+            for values in record[-1]:
+                msg_number, *message = stored_message(values)
+                rocket.append_message_to_buffer(msg_number, tuple(message), estimate_message_size(tuple(message)))
+            index = self._shard_index(rocket.id)
+            with self._shard_locks[index]:
+                self._shards[index][rocket.id] = rocket
+            rockets.append(rocket)
+
+        self._connection = connection
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+        return rockets
+
+    def flush(self) -> int:
+        """
+        Writes the rockets changed since the last flush, a batch per transaction, once the database is loaded.
+        If a batch fails, it and the following ones are kept for the next flush.
+        """
+        with self._flush_lock:
+            if self._connection is None:
+                return 0
+            with self._changes_lock:
+                changes, self._changes = self._changes, {}
+            changes = list(changes.items())
+            start = 0
+            try:
+                for start in range(0, len(changes), self.batch_size):
+                    batch = changes[start:start + self.batch_size]
+                    upserts = [record_row(rocket.to_snapshot()) for _, rocket in batch if rocket is not None]
+                    deletes = [(rocket_id,) for rocket_id, rocket in batch if rocket is None]
+                    with self._connection:
+                        self._connection.executemany(_UPSERT, upserts)
+                        self._connection.executemany(_DELETE, deletes)
+                    self._transactions += 1
+                    self._written += len(batch)
+            except Exception:
+                with self._changes_lock:
+                    for rocket_id, rocket in changes[start:]:
+                        # A rocket saved again since the swap has a newer state to write
+                        self._changes.setdefault(rocket_id, rocket)
+                raise
+            return len(changes)
+
+    def close(self):
+        """Stops the background flushes, writes the last changes and closes the database."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._flush_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def clear(self):
+        """Removes all rockets from the registry and the database."""
+        super().clear()
+        with self._flush_lock:
+            with self._changes_lock:
+                self._changes.clear()
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM rockets")
+
+    def stats(self) -> dict:
+        """Returns the number of rockets waiting to be written, and the transactions and rockets written so far."""
+        return {"pending": len(self._changes), "transactions": self._transactions, "written": self._written}
+
+    def _flush_periodically(self):
+        """Flushes every flush interval until closed."""
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error storing the fleet: {e}")
+
+def _check_partition_count(connection: sqlite3.Connection, path: str, partition_count: int | None):
+    """
+    Checks that a database stores rockets of a fleet split in as many partitions, 0 standing for an unsplit fleet.
+
+    Raises:
+        ValueError: If the database stores rockets of a fleet split differently
+    """
+    expected = partition_count or 0
+    stored = connection.execute("PRAGMA user_version").fetchone()[0]
+    if stored == expected:
+        return
+    table = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'rockets'").fetchone()
+    if table is None or connection.execute("SELECT 1 FROM rockets LIMIT 1").fetchone() is None:
+        return # Nothing stored yet
+    stored_fleet = f"a fleet of {stored} partitions" if stored else "an unpartitioned fleet"
+    expected_fleet = f"a fleet of {expected} partitions" if expected else "an unpartitioned fleet"
+    raise ValueError(f"{path} stores rockets of {stored_fleet}, not of {expected_fleet}")
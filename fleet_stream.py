@@ -0,0 +1,129 @@
+import threading
+import time
+from fleet_indexes import mission_key
+from rocket import Rocket
+
+# Minimum seconds between two deliveries to a subscriber, the changes of a rocket in between are coalesced
+DEFAULT_COALESCE_WINDOW = 0.1
+
+# Changed rockets waiting to be delivered to a subscriber, beyond which it has to resync
+DEFAULT_MAX_PENDING = 10000
+
+class Subscription:
+    """
+    Changes of the fleet waiting to be delivered to a subscriber, optionally filtered by
+    rocket ID or mission. Only the rockets that changed are kept, not each of their states,
+    so a slow subscriber receives the latest state of each rocket and skips the intermediate
+    ones. If more rockets change than it may hold, the pending changes are dropped and the
+    subscriber is told to resync, e.g. by reading the fleet again.
+    """
+
+    def __init__(self, rocket_ids: frozenset[str] | None, mission: str | None,
+                 coalesce_window: float, max_pending: int):
+        self.rocket_ids = rocket_ids
+        # Missions are matched by the keys of the mission index, so both agree on a rocket's mission
+        self.mission = mission_key(mission) if mission is not None else None
+        self.coalesce_window = coalesce_window
+        self.max_pending = max_pending
+
+        # Changed rockets by ID, in order of their first change since the last delivery
+        self._pending: dict[str, Rocket] = {}
+        self._resync = False
+        self._closed = False
+        self._last_delivery = 0.0
+        self._condition = threading.Condition(threading.Lock())
+        # Changes merged into the pending change of the same rocket
+        self.coalesced = 0
+
+    def matches(self, rocket: Rocket, previous_mission: str | None = None) -> bool:
+        """Returns whether a change of a rocket is delivered to the subscriber, a rocket leaving the mission included."""
+        if self.rocket_ids is not None and rocket.id not in self.rocket_ids:
+            return False
+        if self.mission is not None:
+            missions = (rocket.mission, previous_mission)
+            return any(isinstance(mission, str) and mission_key(mission) == self.mission for mission in missions)
+        return True
+
+    def offer(self, rocket: Rocket):
+        """Records the change of a rocket."""
+        with self._condition:
+            if self._resync or self._closed:
+                return # The subscriber will read the whole fleet again
+            if rocket.id in self._pending:
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self._pending.clear()
+                self._resync = True
+            else:
+                self._pending[rocket.id] = rocket
+            self._condition.notify()
+
+    def next_changes(self, timeout: float | None = None) -> tuple[list[Rocket], bool]:
+        """
+        Waits for changes, at most once per coalescing window, and takes them.
+
+        Args:
+            timeout (float | None): Seconds to wait for a change, forever if None
+
+        Returns:
+            tuple[list[Rocket], bool]: The changed rockets, to be read for their latest state, and
+            whether the subscriber has to resync. Both are empty on timeout or once closed.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pending or self._resync or self._closed, timeout):
+                return ([], False)
+            if self._closed:
+                return ([], False)
+        # Let the changes arriving within the window coalesce
+        delay = self._last_delivery + self.coalesce_window - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        with self._condition:
+            rockets, resync = list(self._pending.values()), self._resync
+            self._pending, self._resync = {}, False
+        if rockets or resync:
+            self._last_delivery = time.monotonic()
+        return (rockets, resync)
+
+    def close(self):
+        """Stops recording changes and wakes up the subscriber."""
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+class FleetStream:
+    """
+    Publishes the changes of the fleet's rockets to subscribers, e.g. dashboards streaming
+    them instead of polling the fleet. Publishing without subscribers only reads an empty tuple.
+    """
+
+    def __init__(self, coalesce_window: float = DEFAULT_COALESCE_WINDOW, max_pending: int = DEFAULT_MAX_PENDING):
+        self.coalesce_window = coalesce_window
+        self.max_pending = max_pending
+        # Replaced rather than mutated, so that publishing reads it without locking
+        self._subscriptions: tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, rocket_ids: frozenset[str] | None = None, mission: str | None = None) -> Subscription:
+        """Subscribes to the changes of the fleet, or of the given rockets or mission."""
+        subscription = Subscription(rocket_ids, mission, self.coalesce_window, self.max_pending)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Removes a subscription, and closes it."""
+        with self._lock:
+            self._subscriptions = tuple(other for other in self._subscriptions if other is not subscription)
+        subscription.close()
+
+    def publish(self, rocket: Rocket, previous_mission: str | None = None):
+        """Notifies the subscribers interested in a rocket that it changed."""
+        for subscription in self._subscriptions:
+            if subscription.matches(rocket, previous_mission):
+                subscription.offer(rocket)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
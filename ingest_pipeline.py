@@ -0,0 +1,161 @@
+from contextlib import ExitStack, contextmanager
+import logging
+import queue
+import threading
+import time
+from control_center import ControlCenter
+from message_codec import parse_message
+
+DEFAULT_WORKER_COUNT = 4
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_SWEEP_INTERVAL = 1.0
+
+# Outcomes reported for each submitted message
+MESSAGE_QUEUED = "queued"
+MESSAGE_REJECTED = "rejected"
+MESSAGE_INVALID = "invalid"
+
+class IngestPipeline:
+    """
+    Applies messages asynchronously with a fixed pool of single-writer workers.
+
+    Messages are partitioned by a hash of their channel into bounded queues, each one
+    drained by its own worker thread. Since every message of a rocket is applied by the
+    same worker, rockets are updated without taking their locks. When a queue is full,
+    the message is rejected so the producer can back off and retry. Each worker also
+    periodically sweeps the reorder buffers of the rockets it owns.
+    """
+
+    def __init__(self, control_center: ControlCenter, worker_count: int = DEFAULT_WORKER_COUNT,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, sweep_interval: float = DEFAULT_SWEEP_INTERVAL):
+        if worker_count < 1:
+            raise ValueError("worker_count must be at least 1")
+
+        self.control_center = control_center
+        self.control_center.single_writer = True
+        self.queue_size = queue_size
+        self.sweep_interval = sweep_interval
+        self._queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in range(worker_count)]
+
+        self._stats_lock = threading.Lock()
+        self._enqueued = 0
+        self._rejected = 0
+        # Each worker only counts in its own slot, so it never takes the stats lock
+        self._processed = [0] * worker_count
+        # Held by each worker while it writes to the fleet, see paused
+        self._worker_locks = [threading.Lock() for _ in range(worker_count)]
+
+        self._workers = [
+            threading.Thread(target=self._work, args=(index,), name=f"ingest-worker-{index}", daemon=True)
+            for index in range(worker_count)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, message: any) -> str:
+        """
+        Validates a message and enqueues it for the worker owning its channel.
+
+        Returns:
+            str: The outcome of the message: queued, rejected if the queue of the channel is full, or invalid
+        """
+        parsed = parse_message(message)
+        if parsed is None:
+            return MESSAGE_INVALID
+
+        # Enqueued parsed, so the worker applies it without parsing it again
+        partition = self._queues[self._partition_index(parsed[0])]
+        try:
+            partition.put_nowait(parsed)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            return MESSAGE_REJECTED
+
+        with self._stats_lock:
+            self._enqueued += 1
+        return MESSAGE_QUEUED
+
+    def submit_batch(self, messages: list) -> dict[str, int]:
+        """
+        Validates and enqueues a batch of messages.
+
+        Returns:
+            dict[str, int]: The number of messages for each outcome
+        """
+        outcomes = {MESSAGE_QUEUED: 0, MESSAGE_REJECTED: 0, MESSAGE_INVALID: 0}
+        for message in messages:
+            outcomes[self.submit(message)] += 1
+        return outcomes
+
+    def join(self):
+        """Blocks until every enqueued message has been applied."""
+        for partition in self._queues:
+            partition.join()
+
+    def stop(self):
+        """Applies the enqueued messages, then stops the workers."""
+        for partition in self._queues:
+            partition.put(None)
+        for worker in self._workers:
+            worker.join()
+        self.control_center.single_writer = False
+
+    @contextmanager
+    def paused(self):
+        """Pauses the workers between two messages, so the fleet can be read consistently, e.g. for a snapshot."""
+        with ExitStack() as stack:
+            for worker_lock in self._worker_locks:
+                stack.enter_context(worker_lock)
+            yield
+
+    def stats(self) -> dict:
+        """Returns the queue depths and the number of enqueued, rejected and processed messages."""
+        with self._stats_lock:
+            return {
+                "workers": len(self._queues),
+                "queue_capacity": self.queue_size,
+                "queue_depths": [partition.qsize() for partition in self._queues],
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "processed": sum(self._processed)
+            }
+
+    def _work(self, index: int):
+        """Applies the messages of a partition until stopped, sweeping the partition's buffers periodically."""
+        partition = self._queues[index]
+        next_sweep = time.monotonic() + self.sweep_interval
+        while True:
+            try:
+                message = partition.get(timeout=self.sweep_interval)
+            except queue.Empty:
+                message = False # Idle, only sweep
+
+            if time.monotonic() >= next_sweep:
+                with self._worker_locks[index]:
+                    self._sweep(index)
+                next_sweep = time.monotonic() + self.sweep_interval
+            if message is False:
+                continue
+
+            try:
+                if message is None:
+                    return
+                with self._worker_locks[index]:
+                    self.control_center.process_parsed_message(*message)
+                self._processed[index] += 1
+            except Exception as e:
+                logging.error(f"Error processing queued message: {e}")
+            finally:
+                partition.task_done()
+
+    def _sweep(self, index: int):
+        """Sweeps the reorder buffers of the rockets owned by a worker."""
+        try:
+            self.control_center.sweep_buffers(owns=lambda rocket_id: self._partition_index(rocket_id) == index)
+        except Exception as e:
+            logging.error(f"Error sweeping buffers: {e}")
+
+    def _partition_index(self, channel_id: str) -> int:
+        """Returns the index of the partition owning a channel."""
+        return hash(channel_id) % len(self._queues)
@@ -0,0 +1,145 @@
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import sys
+import threading
+import time
+
+# Logger of the logs written for each message, e.g. a message buffered or a speed change
+MESSAGE_LOGGER = "lunar.messages"
+
+# Logger of the logs written for each request
+REQUEST_LOGGER = "lunar.requests"
+
+# Records waiting to be written, the ones logged while the queue is full are dropped
+DEFAULT_LOG_QUEUE_SIZE = 10000
+
+# Burst of logs allowed per rocket before sampling, when sampling is enabled
+DEFAULT_SAMPLE_BURST = 10
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes of every log record, the other ones are passed by `extra` and written in JSON lines mode
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class RocketLogSampler(logging.Filter):
+    """
+    Rate limits the logs of each rocket, identified by the `rocket` attribute of the records.
+    A rocket may log a burst of records, then `rate` records per second; the others are
+    dropped, and their number is added to the next record of the rocket that is written.
+    Records without a rocket are never dropped.
+    """
+
+    def __init__(self, rate: float, burst: int = DEFAULT_SAMPLE_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # [tokens, time of the last refill, records dropped since the last one written] by rocket ID
+        self._buckets: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rocket_id = getattr(record, "rocket", None)
+        if rocket_id is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(rocket_id)
+            if bucket is None:
+                bucket = self._buckets[rocket_id] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.dropped += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as JSON objects, one per line, with the attributes passed by `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Formats records as text, noting the logs of the same rocket dropped by sampling."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", None)
+        return f"{text} ({suppressed} earlier log(s) of this rocket suppressed)" if suppressed else text
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records over to a queue without formatting them, so the logging thread neither
+    formats nor writes them. Records logged while the queue is full are dropped and counted.
+    The arguments of the records must not be mutated once logged, they are formatted later.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(level: int | str = logging.INFO, json_lines: bool = False,
+                      queue_size: int = DEFAULT_LOG_QUEUE_SIZE, sample_rate: float | None = None,
+                      sample_burst: int = DEFAULT_SAMPLE_BURST) -> QueueListener:
+    """
+    Configures the root logger to write to stderr from a background thread.
+
+    Args:
+        level (int | str): The level of the root logger
+        json_lines (bool): Whether to write records as JSON lines rather than text
+        queue_size (int): The number of records waiting to be written before records are dropped
+        sample_rate (float | None): The logs per second allowed per rocket after a burst, unlimited if None
+        sample_burst (int): The burst of logs allowed per rocket
+
+    Returns:
+        QueueListener: The started listener writing the records, to be stopped on shutdown to flush them
+    """
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonLinesFormatter() if json_lines else TextFormatter(TEXT_FORMAT))
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    if sample_rate is not None:
+        # Filters of the queue handler run in the thread logging the record, before it is queued,
+        # so dropped records never take a place in the queue. The sampler locks its buckets for that
+        queue_handler.addFilter(RocketLogSampler(sample_rate, sample_burst))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
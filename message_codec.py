@@ -0,0 +1,94 @@
+import json
+from rocket_history import parse_time
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library decoder is used without it
+    orjson = None
+
+# A message reduced to the fields needed to apply it: (message_number, message_type, message_time,
+# message_time_us, payload). The time is kept as received, to be served, and parsed into microseconds
+# since the epoch once, when the message is validated
+CompactMessage = tuple[int, str, str, int, dict]
+
+def loads(data: bytes | str) -> any:
+    """Decodes JSON, with orjson if it is installed. Raises ValueError if the data isn't valid JSON."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def decode_message(data: bytes) -> any:
+    """
+    Decodes the body of a single message.
+
+    Returns:
+        any: The decoded message, or None if the body isn't valid JSON
+    """
+    try:
+        return loads(data)
+    except ValueError:
+        return None
+
+def parse_message(message: any) -> tuple[str, CompactMessage] | None:
+    """
+    Validates a decoded message and extracts the fields needed to apply it, in a single pass.
+    The metadata must hold a channel, an integer message number, a message type and an ISO 8601
+    message time, and the payload, if any, must be an object.
+
+    Returns:
+        tuple[str, CompactMessage] | None: The channel and the compact message, or None if the message is invalid
+    """
+    if type(message) is not dict:
+        return None
+    metadata = message.get("metadata")
+    payload = message.get("message", {})
+    if type(metadata) is not dict or type(payload) is not dict:
+        return None
+    channel_id = metadata.get("channel")
+    msg_number = metadata.get("messageNumber")
+    msg_type = metadata.get("messageType")
+    msg_time = metadata.get("messageTime")
+    if not channel_id or not isinstance(msg_number, int) or not msg_type or not msg_time or type(msg_time) is not str:
+        return None
+    try:
+        msg_time_us = parse_time(msg_time)
+    except ValueError:
+        return None
+    return (channel_id, (msg_number, msg_type, msg_time, msg_time_us, payload))
+
+def stored_message(values: list | tuple) -> CompactMessage:
+    """
+    Rebuilds a compact message read back from the event log or a snapshot. Messages stored
+    without their parsed time, as they were before it was kept, have their time parsed again.
+    """
+    if len(values) == 4:
+        msg_number, msg_type, msg_time, payload = values
+        return (msg_number, msg_type, msg_time, parse_time(msg_time), payload)
+    return tuple(values)
+
+def decode_batch(data: bytes, ndjson: bool) -> list | None:
+    """
+    Decodes the body of a batch of messages.
+
+    Args:
+        data (bytes): The request body
+        ndjson (bool): Whether the body holds one JSON message per line, rather than a JSON array
+
+    Returns:
+        list | None: The decoded messages, or None if the body is not a JSON array. NDJSON lines
+        that can't be decoded are kept as None, to be counted as invalid messages.
+    """
+    if not ndjson:
+        try:
+            messages = loads(data)
+        except ValueError:
+            return None
+        return messages if isinstance(messages, list) else None
+
+    messages = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            messages.append(loads(line))
+        except ValueError:
+            messages.append(None)
+    return messages
@@ -0,0 +1,206 @@
+import bisect
+import math
+import threading
+import time
+from typing import Callable
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+# Upper bounds of the reorder buffer depth histogram buckets, in messages
+DEPTH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+Labels = tuple[str, ...]
+
+class _ThreadShards:
+    """
+    Values of a metric split by thread, so that recording a value only writes the
+    calling thread's own shard, without any lock. Shards are merged when collected.
+    """
+
+    def __init__(self, factory: Callable[[], dict], merge: Callable[[dict, dict], None]):
+        self._factory = factory
+        self._merge = merge
+        self._local = threading.local()
+        # Shards of the live threads, the shards of finished threads are merged into the retired one
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired: dict = factory()
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        """Returns the calling thread's shard."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._factory()
+            with self._lock:
+                # Threads come and go, e.g. one per request, so finished threads are folded on registration
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def collect(self) -> dict:
+        """Returns the values of all shards merged."""
+        merged = self._factory()
+        with self._lock:
+            self._retire_finished()
+            for shard in [self._retired] + [shard for _, shard in self._shards]:
+                # Copying a dictionary is atomic, the owning thread may keep writing to it
+                self._merge(merged, dict(shard))
+        return merged
+
+    def _retire_finished(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+class Counter:
+    """Monotonic counter, by label values."""
+
+    def __init__(self, name: str, help: str, label_names: Labels = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._shards = _ThreadShards(dict, self._merge)
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        """Increments the counter of label values."""
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        """Returns the counters by label values."""
+        return self._shards.collect()
+
+    @staticmethod
+    def _merge(target: dict, source: dict):
+        for labels, value in source.items():
+            target[labels] = target.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Distribution of observed values in fixed buckets, by label values."""
+
+    def __init__(self, name: str, help: str, label_names: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._shards = _ThreadShards(dict, self._merge)
+
+    def observe(self, value: float, labels: Labels = ()):
+        """Records a value for label values."""
+        shard = self._shards.get()
+        counts = shard.get(labels)
+        if counts is None:
+            # Count of each bucket, then the count above the last bucket, then the sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> dict[Labels, list[float]]:
+        """Returns the bucket counts and the sum of the observed values, by label values."""
+        return self._shards.collect()
+
+    @staticmethod
+    def _merge(target: dict, source: dict):
+        for labels, counts in source.items():
+            merged = target.setdefault(labels, [0] * len(counts))
+            for index, count in enumerate(list(counts)):
+                merged[index] += count
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class Gauge:
+    """Value computed when collected, by label values."""
+
+    def __init__(self, name: str, help: str, label_names: Labels, collect: Callable[[], dict[Labels, float]]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+class MetricsRegistry:
+    """Metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram | Gauge] = []
+
+    def counter(self, name: str, help: str, label_names: Labels = ()) -> Counter:
+        return self._register(Counter(name, help, label_names))
+
+    def histogram(self, name: str, help: str, label_names: Labels = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, label_names, buckets))
+
+    def gauge(self, name: str, help: str, label_names: Labels, collect: Callable[[], dict[Labels, float]]) -> Gauge:
+        return self._register(Gauge(name, help, label_names, collect))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+class TimedLock:
+    """
+    Context manager acquiring a lock, recording in a histogram how long it waited for it.
+    Only contended acquisitions are recorded, uncontended ones don't read the clock.
+    """
+    __slots__ = ("_lock", "_wait", "_labels")
+
+    def __init__(self, lock, wait: Histogram, labels: Labels):
+        self._lock = lock
+        self._wait = wait
+        self._labels = labels
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            start = time.perf_counter()
+            self._lock.acquire()
+            self._wait.observe(time.perf_counter() - start, self._labels)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
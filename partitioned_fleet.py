@@ -0,0 +1,504 @@
+"""
+Multi-process ingestion: the fleet is split by channel across worker processes.
+
+Each worker process owns a ControlCenter holding the rockets of its channels, so messages
+are applied on as many cores as there are workers, without sharing any state. The front
+process validates messages and routes them by a hash of their channel. Reads fan out to
+every worker, which serializes its own rockets, and the front process merges the results.
+"""
+from collections import Counter
+from contextlib import ExitStack
+import functools
+import heapq
+import itertools
+import logging
+import multiprocessing
+from operator import itemgetter
+import queue
+import threading
+import time
+from typing import Any, Iterator
+import zlib
+from cold_store import ArchivePolicy
+from control_center import ControlCenter, ROCKET_SORT_KEYS
+from fleet_analytics import FleetColumns
+from fleet_indexes import LaunchKey, decode_cursor, encode_cursor
+from fleet_storage import StorageOptions
+from ingest_pipeline import (
+    DEFAULT_QUEUE_SIZE, DEFAULT_SWEEP_INTERVAL, DEFAULT_WORKER_COUNT, MESSAGE_INVALID, MESSAGE_QUEUED, MESSAGE_REJECTED
+)
+from log_config import configure_logging
+from message_codec import parse_message
+from reorder_buffers import BufferLimits
+from rocket_history import HistoryRetention, parse_time
+from snapshot_cache import SnapshotCache
+
+def partition_index(channel_id: str, partition_count: int) -> int:
+    """Returns the index of the partition owning a channel, the same in every process and across restarts."""
+    return zlib.crc32(str(channel_id).encode()) % partition_count
+
+class RemoteRocket:
+    """
+    A rocket owned by a worker process, as served by the front process: its launch key,
+    and its state serialized by the worker, tagged with its version like Rocket.json_cache.
+    """
+    __slots__ = ("id", "launch_us", "mission", "version", "json_cache")
+
+    def __init__(self, id: str, launch_us: int, mission: str, version: int, serialized: bytes):
+        self.id = id
+        self.launch_us = launch_us
+        self.mission = mission
+        self.version = version
+        self.json_cache: tuple[int, bytes] = (version, serialized)
+
+    def launch_key(self) -> LaunchKey:
+        return (self.launch_us, self.id)
+
+class _Partition:
+    """The queries a worker process answers about its partition of the fleet."""
+
+    def __init__(self, control_center: ControlCenter, snapshot_cache: SnapshotCache):
+        self.control_center = control_center
+        self.snapshot_cache = snapshot_cache
+        self.processed = 0
+        self.outcomes: Counter = Counter()
+
+    def _remote(self, rocket) -> tuple:
+        # Read the version first, like SnapshotCache.rocket_json
+        version = rocket.version
+        return (rocket.id, rocket.launch_us, rocket.mission, version, self.snapshot_cache.rocket_json(rocket))
+
+    def version(self) -> int:
+        return self.control_center.fleet_version
+
+    def rockets(self, mission: str | None, after: LaunchKey | None, limit: int | None,
+                include_archived: bool = False) -> list[tuple]:
+        if limit is not None:
+            rockets, _ = self.control_center.rockets_page(
+                limit, encode_cursor(after) if after else None, mission, include_archived
+            )
+        elif mission is not None:
+            rockets = self.control_center.rockets_of_mission(mission)
+        else:
+            rockets = self.control_center.rockets_in_launch_order()
+        return [self._remote(rocket) for rocket in rockets]
+
+    def query(self, status: str | None, rocket_type: str | None, min_speed: float | None, max_speed: float | None,
+              sort: str, descending: bool, limit: int | None, include_archived: bool = False) -> list[tuple]:
+        rockets = self.control_center.query_rockets(
+            status, rocket_type, min_speed, max_speed, sort, descending, limit, include_archived
+        )
+        sort_key = ROCKET_SORT_KEYS[sort]
+        return [(sort_key(rocket), self._remote(rocket)) for rocket in rockets]
+
+    def rocket(self, rocket_id: str) -> tuple | None:
+        rocket = self.control_center.get_rocket(rocket_id)
+        return self._remote(rocket) if rocket is not None else None
+
+    def history(self, rocket_id: str, start: str | None, end: str | None, resolution: float | None) -> dict | None:
+        return self.control_center.get_rocket_history(rocket_id, start, end, resolution)
+
+    def missions(self) -> list[str]:
+        return self.control_center.list_missions()
+
+    def columns(self) -> FleetColumns:
+        return self.control_center.fleet_columns()
+
+    def mission_stats(self, mission: str) -> dict | None:
+        return self.control_center.get_mission_stats(mission)
+
+    def buffer_stats(self, top: int) -> dict:
+        return self.control_center.buffer_stats(top)
+
+    def metrics(self) -> str:
+        return self.control_center.metrics.render()
+
+    def stats(self) -> dict:
+        return {"processed": self.processed, "outcomes": dict(self.outcomes)}
+
+    def clear(self):
+        self.control_center.clear_fleet()
+
+def _serve_queries(partition: _Partition, connection):
+    """Answers the queries of the front process until its end of the connection is closed."""
+    while True:
+        try:
+            method, args = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            if method.startswith("_"):
+                raise ValueError(f"Unknown query: {method}")
+            result = (True, getattr(partition, method)(*args))
+        except Exception as e:
+            result = (False, f"{type(e).__name__}: {e}")
+        connection.send(result)
+
+def _run_partition(messages: multiprocessing.Queue, connection, buffer_limits: BufferLimits,
+                   history_retention: HistoryRetention | None, sweep_interval: float,
+                   log_level: int | str, message_log_level: int, archive_policy: ArchivePolicy | None = None,
+                   storage: StorageOptions | None = None):
+    """Applies the batches of messages of a partition until stopped, answering queries from another thread."""
+    log_listener = configure_logging(log_level)
+    from flask import Flask # Serializes rockets like the front process' Flask app
+    dumps = functools.partial(Flask(__name__).json.dumps, separators=(",", ":"))
+
+    control_center = ControlCenter(
+        buffer_limits=buffer_limits, history_retention=history_retention, archive_policy=archive_policy,
+        storage=storage
+    )
+    control_center.message_log_level = message_log_level
+    loaded = control_center.load_stored_fleet()
+    if loaded:
+        logging.info(f"Loaded {loaded} stored rocket(s).")
+    partition = _Partition(control_center, SnapshotCache(dumps))
+    threading.Thread(target=_serve_queries, args=(partition, connection), daemon=True).start()
+
+    next_sweep = time.monotonic() + sweep_interval
+    while True:
+        try:
+            batch = messages.get(timeout=sweep_interval)
+        except queue.Empty:
+            batch = False # Idle, only sweep
+
+        if time.monotonic() >= next_sweep:
+            try:
+                control_center.sweep_buffers()
+            except Exception as e:
+                logging.error(f"Error sweeping buffers: {e}")
+            next_sweep = time.monotonic() + sweep_interval
+        if batch is False:
+            continue
+        if batch is None:
+            break
+
+        try:
+            partition.outcomes.update(control_center.process_parsed_batch(batch))
+        except Exception as e:
+            logging.error(f"Error processing queued messages: {e}")
+        partition.processed += len(batch)
+    control_center.close()
+    log_listener.stop()
+
+class PartitionedMetrics:
+    """Metrics of every partition, rendered together with a `partition` label."""
+
+    def __init__(self, fleet: "PartitionedFleet"):
+        self._fleet = fleet
+
+    def render(self) -> str:
+        """Renders the metrics of the partitions in the Prometheus text exposition format."""
+        # Samples of each metric family, grouped under the family's HELP and TYPE lines
+        families: dict[str, list[str]] = {}
+        for index, text in enumerate(self._fleet._call_all("metrics")):
+            lines, new_family = None, False
+            for line in text.splitlines():
+                if line.startswith("# HELP "):
+                    name = line.split(" ", 3)[2]
+                    new_family = name not in families
+                    lines = families.setdefault(name, [])
+                if line.startswith("#"):
+                    if new_family:
+                        lines.append(line)
+                elif line and lines is not None:
+                    series, value = line.rsplit(" ", 1)
+                    if series.endswith("}"):
+                        series = f'{series[:-1]},partition="{index}"}}'
+                    else:
+                        series = f'{series}{{partition="{index}"}}'
+                    lines.append(f"{series} {value}")
+        return "\n".join(line for lines in families.values() for line in lines) + "\n"
+
+class PartitionedFleet:
+    """
+    Fleet split across worker processes by a hash of the channel, each owning its own ControlCenter.
+
+    Messages are validated, then enqueued to the bounded queue of the worker owning their
+    channel, one batch per request; a batch is rejected when the queue is full, like in
+    IngestPipeline. Reads fan out to every worker and are merged: rockets by launch time,
+    missions by union and counts by sum. Each worker sweeps its own reorder buffers, and
+    the fleet-wide buffer limits are shared evenly between the workers. Each worker
+    archives its own rockets, to its own cold store.
+
+    It serves the reads of the API like a ControlCenter, and ingests messages like an
+    IngestPipeline. The changes of the rockets are not streamed across processes.
+    """
+
+    def __init__(self, partition_count: int = DEFAULT_WORKER_COUNT, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 sweep_interval: float = DEFAULT_SWEEP_INTERVAL, buffer_limits: BufferLimits | None = None,
+                 log_level: int | str = logging.WARNING, message_log_level: int = logging.INFO,
+                 history_retention: HistoryRetention | None = None, archive_policy: ArchivePolicy | None = None,
+                 storage: StorageOptions | None = None):
+        """
+        Args:
+            partition_count (int): Number of worker processes
+            queue_size (int): Capacity of each worker's queue, in batches of messages
+            sweep_interval (float): Seconds between sweeps of the reorder buffers
+            buffer_limits (BufferLimits | None): Limits of the reorder buffers of the whole fleet
+            log_level (int | str): Level of the logs of the workers
+            message_log_level (int): Level of the logs written for each message by the workers
+            history_retention (HistoryRetention | None): Retention of the history of each rocket
+            archive_policy (ArchivePolicy | None): Rockets moved to the cold store, see ControlCenter.archive_rockets
+            storage (StorageOptions | None): Where each partition is stored beyond memory, in its own database.
+            The rockets of a partition are only found again with the same number of partitions
+
+        Raises:
+            ValueError: If the partition count is not positive, or the stored fleet has another one
+        """
+        if partition_count < 1:
+            raise ValueError("partition_count must be at least 1")
+        if storage is not None:
+            # Fails before starting any worker, rather than in each of them
+            for index in range(partition_count):
+                storage.for_partition(index, partition_count).check_partition_count()
+
+        self.queue_size = queue_size
+        # Changes are applied in the workers, they can't be streamed from this process
+        self.fleet_stream = None
+        self.metrics = PartitionedMetrics(self)
+
+        # Spawned rather than forked, this process already runs threads
+        context = multiprocessing.get_context("spawn")
+        limits = (buffer_limits or BufferLimits()).split(partition_count)
+        self._queues: list[multiprocessing.Queue] = [context.Queue(queue_size) for _ in range(partition_count)]
+        self._connections = []
+        self._processes = []
+        for index, partition_queue in enumerate(self._queues):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=_run_partition,
+                args=(
+                    partition_queue, worker_connection, limits, history_retention, sweep_interval,
+                    log_level, message_log_level, archive_policy.for_partition(index) if archive_policy else None,
+                    storage.for_partition(index, partition_count) if storage else None
+                ),
+                name=f"fleet-partition-{index}",
+                daemon=True
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        # Each connection carries one query at a time
+        self._connection_locks = [threading.Lock() for _ in range(partition_count)]
+
+        self._stats_lock = threading.Lock()
+        self._enqueued = 0
+        self._rejected = 0
+
+    def _partition_of(self, channel_id: str) -> int:
+        return partition_index(channel_id, len(self._queues))
+
+    def submit(self, message: any) -> str:
+        """
+        Validates a message and enqueues it for the worker owning its channel.
+
+        Returns:
+            str: The outcome of the message: queued, rejected if the queue of the channel is full, or invalid
+        """
+        parsed = parse_message(message)
+        if parsed is None:
+            return MESSAGE_INVALID
+        return MESSAGE_QUEUED if self._enqueue(self._partition_of(parsed[0]), [parsed]) else MESSAGE_REJECTED
+
+    def submit_batch(self, messages: list) -> dict[str, int]:
+        """
+        Validates a batch of messages and enqueues them, in one batch per worker.
+
+        Returns:
+            dict[str, int]: The number of messages for each outcome
+        """
+        outcomes = {MESSAGE_QUEUED: 0, MESSAGE_REJECTED: 0, MESSAGE_INVALID: 0}
+        batches: dict[int, list] = {}
+        for message in messages:
+            parsed = parse_message(message)
+            if parsed is None:
+                outcomes[MESSAGE_INVALID] += 1
+            else:
+                # Enqueued parsed, so the worker applies it without parsing it again
+                batches.setdefault(self._partition_of(parsed[0]), []).append(parsed)
+        for index, batch in batches.items():
+            outcomes[MESSAGE_QUEUED if self._enqueue(index, batch) else MESSAGE_REJECTED] += len(batch)
+        return outcomes
+
+    def _enqueue(self, index: int, batch: list) -> bool:
+        """Enqueues a batch of messages for a worker, returns False if its queue is full."""
+        try:
+            self._queues[index].put_nowait(batch)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += len(batch)
+            return False
+        with self._stats_lock:
+            self._enqueued += len(batch)
+        return True
+
+    def _call(self, index: int, method: str, *args):
+        """Runs a query in a worker and returns its result."""
+        with self._connection_locks[index]:
+            self._connections[index].send((method, args))
+            return self._result(self._connections[index].recv())
+
+    def _call_all(self, method: str, *args) -> list:
+        """Runs a query in every worker, in parallel, and returns their results in partition order."""
+        with ExitStack() as stack:
+            for lock in self._connection_locks:
+                stack.enter_context(lock)
+            for connection in self._connections:
+                connection.send((method, args))
+            # Every response is read before raising a failure, or it would answer the next query
+            responses = [connection.recv() for connection in self._connections]
+        return [self._result(response) for response in responses]
+
+    @staticmethod
+    def _result(response: tuple[bool, Any]):
+        succeeded, result = response
+        if not succeeded:
+            raise RuntimeError(f"Partition query failed: {result}")
+        return result
+
+    def _merged_rockets(self, results: list[list[tuple]]) -> Iterator[RemoteRocket]:
+        """Merges the rockets of every worker, each in launch time order, into launch time order."""
+        partitions = [[RemoteRocket(*rocket) for rocket in rockets] for rockets in results]
+        return heapq.merge(*partitions, key=RemoteRocket.launch_key)
+
+    @property
+    def fleet_version(self) -> int:
+        """Version of the whole fleet: every change of a partition increases the sum of their versions."""
+        return sum(self._call_all("version"))
+
+    def rockets_in_launch_order(self) -> list[RemoteRocket]:
+        """Returns all rockets in the fleet, ordered by launch time."""
+        return list(self._merged_rockets(self._call_all("rockets", None, None, None)))
+
+    def rockets_page(self, limit: int, cursor: str | None = None, mission: str | None = None,
+                     include_archived: bool = False) -> tuple[list[RemoteRocket], str | None]:
+        """
+        Returns a page of rockets in the fleet, ordered by launch time, see ControlCenter.rockets_page.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # Fetch one more rocket than requested from each worker, to know whether there is a next page
+        results = self._call_all("rockets", mission, after, limit + 1, include_archived)
+        rockets = list(itertools.islice(self._merged_rockets(results), limit + 1))
+        next_cursor = encode_cursor(rockets[limit - 1].launch_key()) if len(rockets) > limit else None
+        return (rockets[:limit], next_cursor)
+
+    def rockets_of_mission(self, mission: str) -> list[RemoteRocket]:
+        """Returns the rockets of a specific mission, case insensitive, ordered by launch time."""
+        return list(self._merged_rockets(self._call_all("rockets", mission, None, None)))
+
+    def query_rockets(self, status: str | None = None, rocket_type: str | None = None,
+                      min_speed: int | float | None = None, max_speed: int | float | None = None,
+                      sort: str = "launch_time", descending: bool = False, limit: int | None = None,
+                      include_archived: bool = False) -> list[RemoteRocket]:
+        """
+        Returns the rockets matching filters, sorted by a key, see ControlCenter.query_rockets.
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in ROCKET_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        # Each worker returns its first rockets with their sort keys, merged without sorting them again
+        results = self._call_all(
+            "query", status, rocket_type, min_speed, max_speed, sort, descending, limit, include_archived
+        )
+        merged = heapq.merge(*results, key=itemgetter(0), reverse=descending)
+        return [RemoteRocket(*rocket) for _, rocket in itertools.islice(merged, limit)]
+
+    def get_rocket(self, rocket_id: str) -> RemoteRocket | None:
+        """Returns a specific rocket by its ID, from the fleet or else from the archive, or None if not found."""
+        rocket = self._call(self._partition_of(rocket_id), "rocket", rocket_id)
+        return RemoteRocket(*rocket) if rocket is not None else None
+
+    def get_rocket_history(self, rocket_id: str, start: str | None = None, end: str | None = None,
+                           resolution: float | None = None) -> dict | None:
+        """
+        Returns the speeds and missions of a specific rocket over time, see ControlCenter.get_rocket_history.
+
+        Raises:
+            ValueError: If a time is malformed
+        """
+        for time_str in (start, end):
+            if time_str:
+                parse_time(time_str) # Rejected here, the worker's errors aren't ValueErrors
+        return self._call(self._partition_of(rocket_id), "history", rocket_id, start, end, resolution)
+
+    def list_missions(self) -> list[str]:
+        """Returns the names of the missions of every worker, sorted alphabetically."""
+        return sorted(set().union(*self._call_all("missions")))
+
+    def get_mission_stats(self, mission: str) -> dict | None:
+        """Returns the number of rockets of a mission per status, summed over the workers, or None if it has none."""
+        totals: Counter = Counter()
+        for counts in self._call_all("mission_stats", mission):
+            totals.update(counts or {})
+        return dict(totals) if totals else None
+
+    def buffer_stats(self, top: int = 10) -> dict:
+        """Returns the occupancy of the reorder buffers of every worker, see ControlCenter.buffer_stats."""
+        partitions = self._call_all("buffer_stats", top)
+
+        def total(key: str) -> dict:
+            summed = Counter()
+            for stats in partitions:
+                summed.update(stats[key])
+            return dict(summed)
+
+        largest = [buffer for stats in partitions for buffer in stats["largest_buffers"]]
+        return {
+            "limits": partitions[0]["limits"],
+            "partitions": len(partitions),
+            "totals": total("totals"),
+            "pending": total("pending"),
+            "buffering_rockets": sum(stats["buffering_rockets"] for stats in partitions),
+            "degraded_rockets": sorted(rocket_id for stats in partitions for rocket_id in stats["degraded_rockets"]),
+            "largest_buffers": heapq.nlargest(top, largest, key=lambda buffer: buffer["bytes"])
+        }
+
+    def fleet_columns(self) -> FleetColumns:
+        """Returns a columnar snapshot of the fleet, concatenating the snapshots taken by every worker."""
+        return FleetColumns.concatenate(self._call_all("columns"))
+
+    def clear_fleet(self):
+        """Removes all rockets from every worker."""
+        self._call_all("clear")
+
+    def stats(self) -> dict:
+        """Returns the queue depths in batches, and the number of enqueued, rejected and processed messages."""
+        partitions = self._call_all("stats")
+        outcomes = Counter()
+        for stats in partitions:
+            outcomes.update(stats["outcomes"])
+        with self._stats_lock:
+            return {
+                "mode": "processes",
+                "workers": len(self._queues),
+                "queue_capacity": self.queue_size,
+                "queue_depths": [partition.qsize() for partition in self._queues],
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "processed": sum(stats["processed"] for stats in partitions),
+                "outcomes": dict(outcomes)
+            }
+
+    def join(self, poll_interval: float = 0.01):
+        """Blocks until every enqueued message has been applied."""
+        while True:
+            with self._stats_lock:
+                enqueued = self._enqueued
+            if sum(stats["processed"] for stats in self._call_all("stats")) >= enqueued:
+                return
+            time.sleep(poll_interval)
+
+    def stop(self):
+        """Applies the enqueued messages, then stops the workers."""
+        for partition_queue in self._queues:
+            partition_queue.put(None)
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
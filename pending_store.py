@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import threading
+import time
+
+# Compact form of a message held until it can be applied, see message_codec.CompactMessage:
+# (message_number, message_type, message_time, message_time_us, payload)
+PendingMessage = tuple[int, str, str, int, dict]
+
+# Outcomes of adding a message to the store
+PENDING_ADDED = "added"
+PENDING_DUPLICATE = "duplicate"
+PENDING_DROPPED = "dropped"
+
+class PendingStore:
+    """
+    Messages of channels whose RocketLaunched message hasn't arrived yet.
+
+    Since messages arrive out of order, a channel's first messages may precede its launch.
+    They are held here in compact form until the rocket is created, then replayed in one
+    batch. The store is bounded in channels and messages per channel, and channels whose
+    launch doesn't arrive within the TTL are evicted.
+    """
+
+    def __init__(self, max_channels: int = 10_000, max_messages_per_channel: int = 1_000, ttl: float = 60.0):
+        """
+        Args:
+            max_channels (int): Channels held at once, the oldest channel is evicted to make room
+            max_messages_per_channel (int): Messages held for a channel, further ones are dropped
+            ttl (float): Seconds a channel is held waiting for its launch
+        """
+        self.max_channels = max_channels
+        self.max_messages_per_channel = max_messages_per_channel
+        self.ttl = ttl
+
+        # Channels in arrival order, with the monotonic time of their first message and their messages by number
+        self._channels: OrderedDict[str, tuple[float, dict[int, PendingMessage]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._messages = 0
+        self._dropped = 0
+        self._evicted = 0
+        self._replayed = 0
+
+    def add(self, channel_id: str, message: PendingMessage, now: float | None = None) -> str:
+        """
+        Holds a message of a channel until its launch.
+
+        Returns:
+            str: added, duplicate if the message is already held, or dropped if the channel is full
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+
+            entry = self._channels.get(channel_id)
+            if entry is None:
+                if len(self._channels) >= self.max_channels:
+                    self._evict_oldest()
+                entry = (now, {})
+                self._channels[channel_id] = entry
+
+            messages = entry[1]
+            if message[0] in messages:
+                return PENDING_DUPLICATE
+            if len(messages) >= self.max_messages_per_channel:
+                self._dropped += 1
+                return PENDING_DROPPED
+            messages[message[0]] = message
+            self._messages += 1
+            return PENDING_ADDED
+
+    def pop(self, channel_id: str) -> list[PendingMessage]:
+        """Removes and returns the messages held for a channel, ordered by message number."""
+        with self._lock:
+            entry = self._channels.pop(channel_id, None)
+            if entry is None:
+                return []
+            self._messages -= len(entry[1])
+            self._replayed += len(entry[1])
+        return [entry[1][number] for number in sorted(entry[1])]
+
+    def items(self) -> list[tuple[str, list[PendingMessage]]]:
+        """Returns the held channels in arrival order, with their messages ordered by message number."""
+        with self._lock:
+            channels = [(channel_id, dict(messages)) for channel_id, (_, messages) in self._channels.items()]
+        return [(channel_id, [messages[number] for number in sorted(messages)]) for channel_id, messages in channels]
+
+    def expire(self, now: float | None = None):
+        """Evicts the channels held for longer than the TTL."""
+        with self._lock:
+            self._expire(time.monotonic() if now is None else now)
+
+    def clear(self):
+        """Removes all held messages."""
+        with self._lock:
+            self._channels.clear()
+            self._messages = 0
+
+    def stats(self) -> dict:
+        """Returns the number of held channels and messages, and of dropped, evicted and replayed messages."""
+        with self._lock:
+            return {
+                "channels": len(self._channels),
+                "messages": self._messages,
+                "dropped": self._dropped,
+                "evicted": self._evicted,
+                "replayed": self._replayed
+            }
+
+    def _expire(self, now: float):
+        # Channels are ordered by the time of their first message, so expired ones come first
+        while self._channels:
+            first_seen, _ = next(iter(self._channels.values()))
+            if now - first_seen < self.ttl:
+                return
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        _, (_, messages) = self._channels.popitem(last=False)
+        self._messages -= len(messages)
+        self._evicted += len(messages)
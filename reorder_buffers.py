@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+
+# What to do when a gap in the message numbers stays open for longer than the gap timeout
+GAP_POLICY_SKIP = "skip"        # Give up on the missing messages and apply the buffered ones
+GAP_POLICY_DEGRADE = "degrade"  # Keep waiting, but mark the rocket as degraded
+
+class BufferLimits:
+    """Limits of the reorder buffers holding out-of-order messages. None disables a limit."""
+
+    def __init__(self, max_messages_per_rocket: int | None = 10_000,
+                 max_bytes_per_rocket: int | None = 8 * 1024 * 1024,
+                 max_total_messages: int | None = None,
+                 max_total_bytes: int | None = 256 * 1024 * 1024,
+                 gap_timeout: float | None = 60.0,
+                 gap_policy: str = GAP_POLICY_SKIP,
+                 pending_max_channels: int = 10_000,
+                 pending_max_messages_per_channel: int = 1_000,
+                 pending_ttl: float = 60.0):
+        """
+        Args:
+            max_messages_per_rocket (int | None): Messages buffered for a single rocket
+            max_bytes_per_rocket (int | None): Estimated bytes buffered for a single rocket
+            max_total_messages (int | None): Messages buffered across the fleet
+            max_total_bytes (int | None): Estimated bytes buffered across the fleet
+            gap_timeout (float | None): Seconds a rocket may wait for a missing message
+            gap_policy (str): Applied when the gap timeout expires, "skip" or "degrade"
+            pending_max_channels (int): Channels whose messages are held until their launch
+            pending_max_messages_per_channel (int): Messages held for a channel until its launch
+            pending_ttl (float): Seconds a channel's messages are held waiting for its launch
+
+        Raises:
+            ValueError: If the gap policy is unknown
+        """
+        if gap_policy not in (GAP_POLICY_SKIP, GAP_POLICY_DEGRADE):
+            raise ValueError(f"Unknown gap policy: {gap_policy}")
+        self.max_messages_per_rocket = max_messages_per_rocket
+        self.max_bytes_per_rocket = max_bytes_per_rocket
+        self.max_total_messages = max_total_messages
+        self.max_total_bytes = max_total_bytes
+        self.gap_timeout = gap_timeout
+        self.gap_policy = gap_policy
+        self.pending_max_channels = pending_max_channels
+        self.pending_max_messages_per_channel = pending_max_messages_per_channel
+        self.pending_ttl = pending_ttl
+
+    @classmethod
+    def from_env(cls) -> "BufferLimits":
+        """
+        Builds the limits from environment variables, defaults are used for unset ones.
+        A variable set to an empty string disables the limit.
+        """
+        defaults = cls()
+
+        def read(name: str, default, parse):
+            value = os.environ.get(name)
+            if value is None:
+                return default
+            return parse(value) if value else None
+
+        return cls(
+            max_messages_per_rocket=read("LUNAR_BUFFER_MAX_MESSAGES", defaults.max_messages_per_rocket, int),
+            max_bytes_per_rocket=read("LUNAR_BUFFER_MAX_BYTES", defaults.max_bytes_per_rocket, int),
+            max_total_messages=read("LUNAR_BUFFER_MAX_TOTAL_MESSAGES", defaults.max_total_messages, int),
+            max_total_bytes=read("LUNAR_BUFFER_MAX_TOTAL_BYTES", defaults.max_total_bytes, int),
+            gap_timeout=read("LUNAR_GAP_TIMEOUT", defaults.gap_timeout, float),
+            gap_policy=os.environ.get("LUNAR_GAP_POLICY", defaults.gap_policy),
+            pending_max_channels=int(os.environ.get("LUNAR_PENDING_MAX_CHANNELS", defaults.pending_max_channels)),
+            pending_max_messages_per_channel=int(
+                os.environ.get("LUNAR_PENDING_MAX_MESSAGES", defaults.pending_max_messages_per_channel)
+            ),
+            pending_ttl=float(os.environ.get("LUNAR_PENDING_TTL", defaults.pending_ttl))
+        )
+
+    def split(self, parts: int) -> "BufferLimits":
+        """Returns the limits of one of a number of partitions of the fleet, sharing the fleet-wide limits evenly."""
+        def share(limit: int | None) -> int | None:
+            return -(-limit // parts) if limit is not None else None
+
+        limits = BufferLimits(**self.to_dict())
+        limits.max_total_messages = share(self.max_total_messages)
+        limits.max_total_bytes = share(self.max_total_bytes)
+        limits.pending_max_channels = share(self.pending_max_channels)
+        return limits
+
+    def to_dict(self) -> dict:
+        """Serializes the limits to a dictionary for API responses."""
+        return dict(vars(self))
+
+class BufferAccounting:
+    """Totals across the reorder buffers of the whole fleet."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages: int = 0
+        self.bytes: int = 0
+        self.skipped_messages: int = 0
+        self.evictions: int = 0
+        self.gap_timeouts: int = 0
+
+    def add(self, messages: int, size: int):
+        """Records messages entering (or, negative, leaving) the buffers."""
+        with self._lock:
+            self.messages += messages
+            self.bytes += size
+
+    def record_skip(self, skipped_messages: int, eviction: bool = False, gap_timeout: bool = False):
+        """Records missing messages given up on, and why."""
+        with self._lock:
+            self.skipped_messages += skipped_messages
+            self.evictions += eviction
+            self.gap_timeouts += gap_timeout
+
+    def record_gap_timeout(self):
+        """Records a gap timeout that didn't skip messages."""
+        with self._lock:
+            self.gap_timeouts += 1
+
+    def exceeds(self, limits: BufferLimits) -> bool:
+        """Returns whether the totals exceed the global limits."""
+        return (
+            (limits.max_total_messages is not None and self.messages > limits.max_total_messages)
+            or (limits.max_total_bytes is not None and self.bytes > limits.max_total_bytes)
+        )
+
+    def clear(self):
+        """Resets the buffered totals, when the whole fleet is removed."""
+        with self._lock:
+            self.messages = 0
+            self.bytes = 0
+
+    def to_dict(self) -> dict:
+        """Serializes the totals to a dictionary for API responses."""
+        with self._lock:
+            return {
+                "messages": self.messages,
+                "bytes": self.bytes,
+                "skipped_messages": self.skipped_messages,
+                "evictions": self.evictions,
+                "gap_timeouts": self.gap_timeouts
+            }
+
+def estimate_message_size(message: dict | tuple) -> int:
+    """Estimates the memory held by a decoded message: its containers, keys and values."""
+    size = 0
+    pending = [message]
+    while pending:
+        value = pending.pop()
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            for key, item in value.items():
+                size += sys.getsizeof(key)
+                pending.append(item)
+        elif isinstance(value, (tuple, list)):
+            pending.extend(value)
+    return size
@@ -0,0 +1,170 @@
+"""
+Replays a capture of messages through the control center, in process, without HTTP.
+
+The capture is a JSONL file, each line holding a message or a batch (a JSON array) of
+messages. It is memory-mapped and decoded line by line, so large captures are not read
+at once. Messages can be shuffled, duplicated and replayed by parallel threads, to
+reproduce production traffic offline and profile the hot path.
+
+Usage:
+    python replay.py capture.jsonl [--shuffle] [--seed S] [--duplicates RATE] [--threads N] [--fleet]
+"""
+import argparse
+from array import array
+from collections import Counter
+import json
+import logging
+import mmap
+import random
+import threading
+import time
+from typing import Iterable, Iterator
+from control_center import ControlCenter, MESSAGE_INVALID
+
+def read_capture(path: str) -> Iterator[any]:
+    """
+    Reads the messages of a JSONL capture, memory-mapped. Batches are flattened, and
+    lines that aren't valid JSON are returned as None so they count as invalid messages.
+
+    Yields:
+        any: The decoded messages, in capture order
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return # Empty files can't be memory-mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as capture:
+            start = 0
+            while start < len(capture):
+                end = capture.find(b"\n", start)
+                if end == -1:
+                    end = len(capture)
+                line = capture[start:end].strip()
+                start = end + 1
+                if not line:
+                    continue
+                try:
+                    decoded = json.loads(line)
+                except ValueError:
+                    yield None
+                    continue
+                if isinstance(decoded, list):
+                    yield from decoded
+                else:
+                    yield decoded
+
+def inject_duplicates(messages: list, rate: float, rng: random.Random) -> list:
+    """Returns the messages with a copy of a fraction of them inserted at random later positions."""
+    # Positions are drawn as sort keys, instead of inserting into the list one copy at a time
+    keyed = list(enumerate(messages))
+    keyed += [
+        (rng.uniform(index, len(messages)), messages[index])
+        for index in rng.sample(range(len(messages)), int(len(messages) * rate))
+    ]
+    # The sort is stable, so a copy drawn at its original's position still follows it
+    keyed.sort(key=lambda item: item[0])
+    return [message for _, message in keyed]
+
+def _apply(control_center: ControlCenter, messages: Iterable, latencies: array, outcomes: Counter):
+    """Applies messages one at a time, recording the latency of each in nanoseconds."""
+    for message in messages:
+        start = time.perf_counter_ns()
+        outcome = control_center.process_incoming_message(message) if isinstance(message, dict) else MESSAGE_INVALID
+        latencies.append(time.perf_counter_ns() - start)
+        outcomes[outcome] += 1
+
+def replay(control_center: ControlCenter, messages: Iterable, threads: int = 1) -> dict:
+    """
+    Replays messages through a control center.
+
+    Args:
+        control_center (ControlCenter): The control center applying the messages
+        messages (Iterable): The messages, streamed if replayed by a single thread
+        threads (int): Number of replay threads, each one applying every n-th message
+
+    Returns:
+        dict: The number of messages, the elapsed seconds, the messages per second,
+        the p50 and p99 apply latencies in microseconds and the number of messages per outcome
+    """
+    if threads > 1:
+        messages = list(messages)
+    latencies = [array("q") for _ in range(threads)]
+    outcomes = [Counter() for _ in range(threads)]
+
+    start = time.perf_counter()
+    if threads == 1:
+        _apply(control_center, messages, latencies[0], outcomes[0])
+    else:
+        workers = [
+            threading.Thread(target=_apply, args=(control_center, messages[index::threads], latencies[index], outcomes[index]))
+            for index in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for thread_latencies in latencies for latency in thread_latencies]
+    count = len(all_latencies)
+    return {
+        "messages": count,
+        "seconds": elapsed,
+        "messages_per_second": count / elapsed if elapsed else 0.0,
+        **latency_percentiles(all_latencies),
+        "outcomes": dict(sum(outcomes, Counter()))
+    }
+
+def latency_percentiles(latencies: Iterable[int]) -> dict:
+    """Returns the p50 and p99 of latencies in nanoseconds, in microseconds."""
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] / 1000 if ordered else 0.0
+
+    return {"p50_us": percentile(0.50), "p99_us": percentile(0.99)}
+
+def fleet_summary(control_center: ControlCenter) -> dict:
+    """Returns the final state of the fleet: rockets per status, missions, buffered and pending messages."""
+    rockets = control_center.rockets_fleet.values()
+    return {
+        "rockets": len(rockets),
+        "statuses": dict(Counter(rocket.status for rocket in rockets)),
+        "missions": len(control_center.list_missions()),
+        "buffered_messages": control_center.buffer_accounting.to_dict()["messages"],
+        "pending_messages": control_center.pending_store.stats()["messages"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="JSONL file of messages, or of batches of messages")
+    parser.add_argument("--shuffle", action="store_true", help="replay the messages in random order")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the shuffle and duplicates")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="fraction of the messages sent twice")
+    parser.add_argument("--threads", type=int, default=1, help="parallel replay threads")
+    parser.add_argument("--fleet", action="store_true", help="print the final state of every rocket")
+    parser.add_argument("--log-level", default="ERROR", help="level of the control center logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    messages = read_capture(args.capture)
+    if args.shuffle or args.duplicates:
+        rng = random.Random(args.seed)
+        messages = list(messages)
+        if args.duplicates:
+            messages = inject_duplicates(messages, args.duplicates, rng)
+        if args.shuffle:
+            rng.shuffle(messages)
+
+    control_center = ControlCenter()
+    result = replay(control_center, messages, max(args.threads, 1))
+    print(
+        f"{result['messages']} messages in {result['seconds']:.3f}s: {result['messages_per_second']:.0f} messages/s, "
+        f"apply latency p50 {result['p50_us']:.1f}us, p99 {result['p99_us']:.1f}us"
+    )
+    print(f"Outcomes: {json.dumps(result['outcomes'], sort_keys=True)}")
+    print(f"Fleet: {json.dumps(fleet_summary(control_center), sort_keys=True)}")
+    if args.fleet:
+        print(json.dumps(control_center.list_rockets_in_fleet(), default=str, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+from typing import Callable, Iterable, Iterator
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Optional, streamed responses are only compressed with gzip without it
+    zstandard = None
+
+# Rockets read from the fleet and serialized at a time in a streamed response
+DEFAULT_STREAM_PAGE_SIZE = 1000
+
+# Compression levels of streamed responses, fast ones since collections are compressed on every request
+GZIP_LEVEL = 4
+ZSTD_LEVEL = 3
+
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def content_encodings() -> list[str]:
+    """Returns the content encodings streamed responses can be compressed with, preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+def pages_of(read_page: Callable[[int, str | None], tuple[list, str | None]],
+             page_size: int = DEFAULT_STREAM_PAGE_SIZE) -> Iterator[list]:
+    """
+    Yields the pages of a paginated collection, reading each one when the previous one has been consumed.
+
+    Args:
+        read_page (Callable[[int, str | None], tuple[list, str | None]]): Reads a page from its size and cursor,
+            and returns its items and the cursor of the next page, e.g. ControlCenter.rockets_page
+        page_size (int): Maximum number of items of a page
+    """
+    cursor = None
+    while True:
+        items, cursor = read_page(page_size, cursor)
+        yield items
+        if cursor is None:
+            return
+
+def json_array_stream(pages: Iterable[list[bytes]], opening: bytes = b"[", closing: bytes = b"]") -> Iterator[bytes]:
+    """
+    Yields a JSON array of serialized values, one chunk per page of values.
+
+    Args:
+        pages (Iterable[list[bytes]]): Pages of serialized values
+        opening (bytes): Opens the array, e.g. with the start of an object holding it
+        closing (bytes): Closes the array, and the object holding it
+    """
+    separator = opening
+    for page in pages:
+        if page:
+            yield separator + b",".join(page)
+            separator = b","
+    yield closing if separator is not opening else opening + closing
+
+def ndjson_stream(pages: Iterable[list[bytes]]) -> Iterator[bytes]:
+    """Yields serialized values as newline-delimited JSON, one chunk per page of values."""
+    for page in pages:
+        if page:
+            yield b"\n".join(page) + b"\n"
+
+def compress_stream(chunks: Iterable[bytes], encoding: str | None) -> Iterator[bytes]:
+    """
+    Compresses chunks with a content encoding, flushing the compressor after each chunk
+    so that the client can decode it as soon as it is received.
+
+    Args:
+        chunks (Iterable[bytes]): Chunks of the response body
+        encoding (str | None): One of content_encodings, or None to leave the chunks uncompressed
+
+    Raises:
+        ValueError: If the encoding is not supported
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "gzip":
+        # A window of 16 + 15 bits writes a gzip header and trailer
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        flush_chunk = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    elif encoding == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        flush_chunk = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    for chunk in chunks:
+        # Empty chunks would end a chunked transfer encoding
+        if compressed := compressor.compress(chunk) + flush_chunk():
+            yield compressed
+    yield compressor.flush()
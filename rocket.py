@@ -1,62 +1,194 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone, tzinfo
 import heapq
+import itertools
+import sys
 import threading
+from rocket_history import from_epoch_us, parse_time, to_epoch_us
+
+# Versions are drawn from a single counter, so a version identifies one state of one rocket
+_versions = itertools.count(1)
+
+# Guards the lazy allocation of the rockets' locks
+_lock_allocation_lock = threading.Lock()
+
+# Time zones shared by all rockets, by UTC offset
+_time_zones: dict[timedelta, tzinfo] = {}
+
+def _parse_launch_time(time_str: str) -> tuple[int, tzinfo | None]:
+    """
+    Parses an ISO 8601 time into microseconds since the epoch and its time zone, shared by the rockets.
+    Times without time zone are counted as UTC, and returned without time zone.
+    """
+    time = datetime.fromisoformat(time_str)
+    time_zone = time.tzinfo
+    if time_zone is not None:
+        offset = time.utcoffset()
+        time_zone = _time_zones.setdefault(offset, timezone(offset))
+    return (to_epoch_us(time), time_zone)
+
+def next_version() -> int:
+    """Returns a version newer than the version of every rocket so far."""
+    return next(_versions)
+
+def _intern(value: str | None) -> str | None:
+    """Interns a string, so rockets share the repeated types, missions and statuses."""
+    return sys.intern(value) if isinstance(value, str) else value
+
 class Rocket:
-    def __init__(self, id: str, launch_time: str, last_update_time: str, last_message_number: int, 
-                 speed: int, rocket_type: str, mission: str):
+    # Fixed attributes instead of a per-instance dictionary, to keep large fleets compact
+    __slots__ = (
+        "id", "_launch_us", "_launch_tz", "_last_update_time", "_last_update_us", "last_message_number",
+        "speed", "rocket_type", "mission", "status", "explosion_reason", "version", "json_cache",
+        "history", "_message_buffer", "_buffered_sizes", "buffered_bytes", "gap_started_at", "degraded", "_lock"
+    )
+
+    def __init__(self, id: str, launch_time: str, last_update_time: str, last_message_number: int,
+                 speed: int, rocket_type: str, mission: str, last_update_us: int | None = None):
         self.id: str = id
-        self.launch_time: datetime = datetime.fromisoformat(launch_time)
-        self.last_update_time: datetime = datetime.fromisoformat(last_update_time)
+        # The launch time is stored as microseconds since the epoch, with its time zone
+        self._launch_us, self._launch_tz = _parse_launch_time(launch_time)
+        # The last update time changes with every message, so it is stored as received, to be served,
+        # next to the microseconds since the epoch parsed once when the message was validated
+        self._last_update_time: str = last_update_time
+        self._last_update_us: int = parse_time(last_update_time) if last_update_us is None else last_update_us
         self.last_message_number: int = last_message_number
         self.speed: int = speed
-        self.rocket_type: str = rocket_type
-        self.mission: str = mission
-        self.status: str = "Launched"
+        self.rocket_type: str = _intern(rocket_type)
+        self.mission: str = _intern(mission)
+        self.status: str = _intern("Launched")
         self.explosion_reason: str | None = None
-        
-        # Buffer for messages that arrive out of order
-        # Stores tuples of (message_number, original_message_dict)
-        self.message_buffer: list[tuple[int, dict]] = []
-
-        # Individual reentrant lock for each rocket. RLock allows a thread to acquire the lock multiple times. Useful in recursive functions
-        self.lock: threading.RLock = threading.RLock()
-
-    def append_message_to_buffer(self, message_number: int, message: dict):
-        """Append a message to the buffer."""
-        message = (message_number, message)
-        # Append to buffer
-        heapq.heappush(self.message_buffer, message)
-
-    def pop_message_from_buffer(self):
-        """Pop the next message from the buffer."""
-        if self.message_buffer:
-            heapq.heappop(self.message_buffer)
-        
-    def increase_speed(self, increment: int, msg_time_str: str, msg_number: int):
+
+        # Bumped on every state change, used to reuse the serialized state while it is unchanged
+        self.version: int = next(_versions)
+        # Serialized JSON of the rocket and the version it was serialized at, managed by the API layer
+        self.json_cache: tuple[int, bytes] | None = None
+        # Speeds and missions over time, managed by the control center, see RocketHistory
+        self.history = None
+
+        # Buffer for messages that arrive out of order, a heap ordered by message number
+        # Stores tuples of (message_number, (message_type, message_time, message_time_us, payload))
+        # Only allocated while messages are buffered, see message_buffer
+        self._message_buffer: list[tuple[int, tuple]] | None = None
+        # Estimated size of each buffered message by message number, to detect duplicates in constant time
+        self._buffered_sizes: dict[int, int] | None = None
+        # Estimated memory held by the buffered messages, in bytes
+        self.buffered_bytes: int = 0
+        # Monotonic time since which buffered messages have been waiting for a missing message
+        self.gap_started_at: float | None = None
+        # Set when a gap has been open for too long, cleared when the buffer drains
+        self.degraded: bool = False
+
+        # Individual reentrant lock for each rocket, allocated on first use, see lock
+        self._lock: threading.RLock | None = None
+
+    @property
+    def launch_time(self) -> datetime:
+        """Time at which the first message for this rocket was sent."""
+        return from_epoch_us(self._launch_us, self._launch_tz)
+
+    @property
+    def launch_us(self) -> int:
+        """Launch time as microseconds since the epoch, comparable across time zones."""
+        return self._launch_us
+
+    @property
+    def last_update_time(self) -> datetime:
+        """Time at which the last processed message for this rocket was sent."""
+        return datetime.fromisoformat(self._last_update_time)
+
+    @property
+    def last_update_us(self) -> int:
+        """Last update time as microseconds since the epoch, comparable across time zones."""
+        return self._last_update_us
+
+    @property
+    def message_buffer(self) -> list[tuple[int, tuple]] | tuple:
+        """Messages waiting to be processed, empty when no message is buffered."""
+        return self._message_buffer or ()
+
+    @property
+    def buffered_sizes(self) -> dict[int, int]:
+        """Estimated size of each buffered message, by message number."""
+        return self._buffered_sizes or {}
+
+    @property
+    def lock(self) -> threading.RLock:
+        """
+        Reentrant lock of the rocket. RLock allows a thread to acquire the lock multiple times.
+        It is only allocated when first needed, rockets written by a single thread never need it.
+        """
+        lock = self._lock
+        if lock is None:
+            with _lock_allocation_lock:
+                if self._lock is None:
+                    self._lock = threading.RLock()
+                lock = self._lock
+        return lock
+
+    def append_message_to_buffer(self, message_number: int, message: tuple, size: int = 0) -> bool:
+        """
+        Append a message to the buffer.
+
+        Args:
+            message_number (int): The number of the message
+            message (tuple): The message, as (message_type, message_time, message_time_us, payload)
+            size (int): Estimated memory held by the message, in bytes
+
+        Returns:
+            bool: False if a message with the same number is already buffered
+        """
+        if self._message_buffer is None:
+            self._message_buffer = []
+            self._buffered_sizes = {}
+        elif message_number in self._buffered_sizes:
+            return False
+        self._buffered_sizes[message_number] = size
+        self.buffered_bytes += size
+        heapq.heappush(self._message_buffer, (message_number, message))
+        return True
+
+    def pop_message_from_buffer(self) -> tuple[int, tuple] | None:
+        """Pop the message with the smallest number from the buffer."""
+        if not self._message_buffer:
+            return None
+        message_number, message = heapq.heappop(self._message_buffer)
+        self.buffered_bytes -= self._buffered_sizes.pop(message_number)
+        if not self._message_buffer:
+            # Release the buffer until messages arrive out of order again
+            self._message_buffer = None
+            self._buffered_sizes = None
+        return (message_number, message)
+
+    def increase_speed(self, increment: int, msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Increase the speed of the rocket by a given increment."""
         self.speed += increment
-        self._update_time_and_message_number(msg_time_str, msg_number)
+        self._update_time_and_message_number(msg_time_str, msg_number, msg_time_us)
 
-    def decrease_speed(self, decrement: int, msg_time_str: str, msg_number: int):
+    def decrease_speed(self, decrement: int, msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Decrease the speed of the rocket by a given decrement."""
         self.speed -= decrement
-        self._update_time_and_message_number(msg_time_str, msg_number)
+        self._update_time_and_message_number(msg_time_str, msg_number, msg_time_us)
 
-    def explode(self, explosion_reason: str, msg_time_str: str, msg_number: int):
+    def explode(self, explosion_reason: str, msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Set the status of the rocket to 'Exploded' and record the explosion reason."""
-        self.status = "Exploded"
-        self.explosion_reason = explosion_reason
-        self._update_time_and_message_number(msg_time_str, msg_number)
+        self.status = _intern("Exploded")
+        self.explosion_reason = _intern(explosion_reason)
+        self._update_time_and_message_number(msg_time_str, msg_number, msg_time_us)
 
-    def update_mission(self, new_mission: str, msg_time_str: str, msg_number: int):
+    def update_mission(self, new_mission: str, msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
         """Update the mission of the rocket."""
-        self.mission = new_mission
-        self._update_time_and_message_number(msg_time_str, msg_number)
+        self.mission = _intern(new_mission)
+        self._update_time_and_message_number(msg_time_str, msg_number, msg_time_us)
 
-    def _update_time_and_message_number(self, msg_time_str: str, msg_number: int):
-        """Update the last update time and message number of the rocket."""
-        self.last_update_time = datetime.fromisoformat(msg_time_str)
+    def _update_time_and_message_number(self, msg_time_str: str, msg_number: int, msg_time_us: int | None = None):
+        """
+        Update the last update time and message number of the rocket. The time is passed parsed,
+        as microseconds since the epoch, by the control center, and only parsed here if it isn't.
+        """
+        self._last_update_time = msg_time_str
+        self._last_update_us = parse_time(msg_time_str) if msg_time_us is None else msg_time_us
         self.last_message_number = msg_number
+        self.version = next(_versions)
 
     def to_dict(self) -> dict:
         """Serializes the rocket state to a dictionary for API responses."""
@@ -71,3 +203,25 @@ class Rocket:
             "status": self.status,
             "explosion_reason": self.explosion_reason
         }
+
+    def to_snapshot(self) -> list:
+        """Serializes the full rocket state, including its buffered messages, to a compact record."""
+        return [
+            self.id, self.launch_time.isoformat(), self.last_update_time.isoformat(), self.last_message_number,
+            self.speed, self.rocket_type, self.mission, self.status, self.explosion_reason, self.degraded,
+            [[number, *message] for number, message in sorted(self.message_buffer, key=lambda item: item[0])]
+        ]
+
+    @classmethod
+    def from_snapshot(cls, record: list) -> "Rocket":
+        """
+        Rebuilds a rocket from a record of to_snapshot. The buffered messages are not
+        restored, since they are accounted for by the control center.
+        """
+        (id, launch_time, last_update_time, last_message_number, speed, rocket_type, mission,
+         status, explosion_reason, degraded, _) = record
+        rocket = cls(id, launch_time, last_update_time, last_message_number, speed, rocket_type, mission)
+        rocket.status = _intern(status)
+        rocket.explosion_reason = _intern(explosion_reason)
+        rocket.degraded = degraded
+        return rocket
@@ -0,0 +1,265 @@
+from array import array
+from collections import deque
+from datetime import datetime, timedelta, timezone, tzinfo
+import os
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Fields of a speed sample: time, speed
+_SAMPLE_FIELDS = 2
+# Fields of a bucket of samples: start time, minimum, maximum and sum of the speeds, number of samples
+_BUCKET_FIELDS = 5
+# Bytes held by a field, they are stored as doubles
+_FIELD_BYTES = array("d").itemsize
+
+class HistoryRetention:
+    """
+    Retention of the history of each rocket. The latest speeds are kept as samples, then as
+    they age they are folded into buckets of increasing duration, keeping the minimum, maximum
+    and average speed of each bucket. Every tier keeps a fixed number of entries, so the
+    memory of a rocket's history is bounded however long it flies.
+    """
+
+    def __init__(self, samples: int = 120, tiers: tuple[tuple[int, int], ...] = ((10, 60), (60, 60), (600, 144)),
+                 mission_changes: int = 32):
+        """
+        Args:
+            samples (int): Latest speed samples kept as received
+            tiers (tuple[tuple[int, int], ...]): Seconds covered by each bucket and number of buckets kept,
+                of each tier from the finest to the coarsest, older buckets are dropped
+            mission_changes (int): Latest mission changes kept
+
+        Raises:
+            ValueError: If a number is not positive, or a tier's buckets are not a multiple of the previous tier's
+        """
+        if samples < 1 or mission_changes < 1:
+            raise ValueError("samples and mission_changes must be positive")
+        previous_seconds = 1
+        for seconds, buckets in tiers:
+            if seconds < 1 or buckets < 1:
+                raise ValueError(f"Invalid history tier: {seconds}:{buckets}")
+            if seconds % previous_seconds:
+                raise ValueError(f"History tier of {seconds}s is not a multiple of the previous one of {previous_seconds}s")
+            previous_seconds = seconds
+        self.samples = samples
+        self.tiers = tuple((seconds, buckets) for seconds, buckets in tiers)
+        self.mission_changes = mission_changes
+        # Duration of the buckets of each tier, in microseconds
+        self.bucket_us = tuple(seconds * 1_000_000 for seconds, _ in self.tiers)
+
+    @classmethod
+    def from_env(cls) -> "HistoryRetention":
+        """
+        Builds the retention from environment variables, defaults are used for unset ones.
+        The tiers are given as `seconds:buckets` pairs separated by commas, e.g. `10:60,60:60`.
+        """
+        defaults = cls()
+        tiers = os.environ.get("LUNAR_HISTORY_TIERS")
+        return cls(
+            samples=int(os.environ.get("LUNAR_HISTORY_SAMPLES", defaults.samples)),
+            tiers=defaults.tiers if tiers is None else tuple(
+                tuple(int(value) for value in tier.split(":")) for tier in tiers.split(",") if tier.strip()
+            ),
+            mission_changes=int(os.environ.get("LUNAR_HISTORY_MISSION_CHANGES", defaults.mission_changes))
+        )
+
+    @property
+    def max_bytes(self) -> int:
+        """Bytes held by the speed samples and buckets of a rocket once every tier is full."""
+        buckets = sum(buckets for _, buckets in self.tiers)
+        return (self.samples * _SAMPLE_FIELDS + buckets * _BUCKET_FIELDS) * _FIELD_BYTES
+
+
+class _Ring:
+    """
+    Records of a fixed number of fields, stored one after the other in a single array of doubles.
+    The array grows as records are appended, up to its capacity, then the oldest record is overwritten.
+    """
+    __slots__ = ("values", "fields", "capacity", "head")
+
+    def __init__(self, fields: int, capacity: int):
+        self.values = array("d")
+        self.fields = fields
+        self.capacity = capacity
+        # Index of the oldest record once the ring is full
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.values) // self.fields
+
+    def append(self, *record: float) -> tuple[float, ...] | None:
+        """Appends a record, and returns the oldest one if it was overwritten."""
+        values, fields = self.values, self.fields
+        if len(values) < self.capacity * fields:
+            values.extend(record)
+            return None
+        offset = self.head * fields
+        evicted = tuple(values[offset:offset + fields])
+        values[offset:offset + fields] = array("d", record)
+        self.head = (self.head + 1) % self.capacity
+        return evicted
+
+    def records(self) -> list[tuple[float, ...]]:
+        """Returns the records, from the oldest to the newest."""
+        # Copy the array first, so that records appended meanwhile don't shift the others
+        head, values, fields = self.head, self.values[:], self.fields
+        records = [tuple(values[offset:offset + fields]) for offset in range(0, len(values), fields)]
+        return records[head:] + records[:head]
+
+def parse_time(time_str: str) -> int:
+    """
+    Parses an ISO 8601 time into microseconds since the epoch, times without time zone are counted as UTC.
+
+    Raises:
+        ValueError: If the time is malformed
+    """
+    return to_epoch_us(datetime.fromisoformat(time_str))
+
+def to_epoch_us(time: datetime) -> int:
+    """Returns the microseconds since the epoch of a time, times without time zone are counted as UTC."""
+    return (time - (_EPOCH if time.tzinfo is not None else _NAIVE_EPOCH)) // _MICROSECOND
+
+def from_epoch_us(epoch_us: int, time_zone: tzinfo | None = None) -> datetime:
+    """Builds the time of microseconds since the epoch in a time zone, or without time zone if None, counted as UTC."""
+    if time_zone is None:
+        return _NAIVE_EPOCH + timedelta(microseconds=epoch_us)
+    return (_EPOCH + timedelta(microseconds=epoch_us)).astimezone(time_zone)
+
+def _time(epoch_us: float) -> str:
+    """Formats microseconds since the epoch as an ISO 8601 UTC time."""
+    return from_epoch_us(int(epoch_us), timezone.utc).isoformat()
+
+def _number(value: float) -> int | float:
+    """Returns whole numbers as integers, since speeds are stored as doubles."""
+    return int(value) if value.is_integer() else value
+
+class RocketHistory:
+    """
+    Speeds of a rocket over time, downsampled as they age, and its latest mission changes.
+    Times are microseconds since the epoch, speeds are stored as doubles like the times.
+    """
+    __slots__ = ("_retention", "_samples", "_tiers", "_missions")
+
+    def __init__(self, retention: HistoryRetention):
+        self._retention = retention
+        self._samples = _Ring(_SAMPLE_FIELDS, retention.samples)
+        # Allocated once samples age out of the latest ones
+        self._tiers: list[_Ring] | None = None
+        # Allocated on the first recorded mission, holds (time, mission) pairs
+        self._missions: deque[tuple[int, str]] | None = None
+
+    def record_speed(self, time_us: int, speed: int | float):
+        """Records the speed of the rocket at the time of a message, in microseconds since the epoch."""
+        # Every message of a rocket records a sample, so the ring is written in place rather than through _Ring.append
+        samples = self._samples
+        values = samples.values
+        if len(values) < samples.capacity * _SAMPLE_FIELDS:
+            values.append(time_us)
+            values.append(speed)
+            return
+        offset = samples.head * _SAMPLE_FIELDS
+        evicted_time, evicted_speed = values[offset], values[offset + 1]
+        values[offset], values[offset + 1] = time_us, speed
+        samples.head = (samples.head + 1) % samples.capacity
+        self._fold(0, evicted_time, evicted_speed, evicted_speed, evicted_speed, 1)
+
+    def record_mission(self, time_us: int, mission: str):
+        """Records the mission of the rocket from the time of a message on, in microseconds since the epoch."""
+        if self._missions is None:
+            self._missions = deque(maxlen=self._retention.mission_changes)
+        self._missions.append((time_us, mission))
+
+    def _fold(self, tier: int, start: float, minimum: float, maximum: float, total: float, count: float):
+        """Folds an aged sample or bucket into the bucket of a tier covering its start time."""
+        bucket_us = self._retention.bucket_us
+        if tier == len(bucket_us):
+            return # Older than the retention
+        if self._tiers is None:
+            self._tiers = [_Ring(_BUCKET_FIELDS, buckets) for _, buckets in self._retention.tiers]
+        ring = self._tiers[tier]
+        start -= start % bucket_us[tier]
+
+        # Samples age in the order they were received, so only the newest bucket may cover them
+        values = ring.values
+        offset = ((ring.head - 1) % (len(values) // _BUCKET_FIELDS)) * _BUCKET_FIELDS if values else -1
+        if offset >= 0 and start <= values[offset]:
+            if minimum < values[offset + 1]:
+                values[offset + 1] = minimum
+            if maximum > values[offset + 2]:
+                values[offset + 2] = maximum
+            values[offset + 3] += total
+            values[offset + 4] += count
+            return
+        evicted = ring.append(start, minimum, maximum, total, count)
+        if evicted is not None:
+            self._fold(tier + 1, *evicted)
+
+    def speeds(self, start_us: int | None = None, end_us: int | None = None,
+               resolution_us: int | None = None) -> list[dict]:
+        """
+        Returns the speeds between two times, from the oldest to the newest.
+
+        Args:
+            start_us (int | None): Earliest time, from the oldest retained speed if None
+            end_us (int | None): Latest time, included, up to the latest speed if None
+            resolution_us (int | None): Duration of the buckets the speeds are aggregated in, in microseconds.
+                Speeds are returned at their retained resolution if None, or if it is coarser
+
+        Returns:
+            list[dict]: The start `time` and duration in `seconds` of each bucket, 0 for a single sample,
+            with the `min`, `max` and `avg` speeds and the `count` of samples it aggregates
+        """
+        # Tiers are ordered from the finest to the coarsest, so the oldest speeds are in the last tier
+        entries = []
+        for tier, ring in reversed(list(enumerate(self._tiers or ()))):
+            width = self._retention.bucket_us[tier]
+            entries.extend((start, width, *bucket) for start, *bucket in ring.records())
+        entries.extend((time, 0, speed, speed, speed, 1) for time, speed in self._samples.records())
+
+        # Entries overlapping the range, as [start, width, min, max, sum, count]
+        selected = []
+        for start, width, minimum, maximum, total, count in entries:
+            if start_us is not None and (start + width <= start_us if width else start < start_us):
+                continue
+            if end_us is not None and start > end_us:
+                continue
+            if resolution_us:
+                aligned = start - start % resolution_us
+                previous = selected[-1] if selected else None
+                if previous is not None and aligned < previous[0] + previous[1]:
+                    previous[2:] = [min(previous[2], minimum), max(previous[3], maximum),
+                                    previous[4] + total, previous[5] + count]
+                    continue
+                start, width = aligned, max(width, resolution_us)
+            selected.append([start, width, minimum, maximum, total, count])
+
+        return [
+            {
+                "time": _time(start),
+                "seconds": _number(width / 1_000_000),
+                "min": _number(minimum),
+                "max": _number(maximum),
+                "avg": _number(total / count),
+                "count": int(count)
+            }
+            for start, width, minimum, maximum, total, count in selected
+        ]
+
+    def missions(self, start_us: int | None = None, end_us: int | None = None) -> list[dict]:
+        """Returns the missions of the rocket between two times, including the one it had at the start."""
+        changes = list(self._missions or ())
+        if start_us is not None:
+            # The latest change before the start is the mission the rocket had then
+            earlier = [change for change in changes if change[0] < start_us]
+            changes = earlier[-1:] + [change for change in changes if change[0] >= start_us]
+        return [
+            {"time": _time(time), "mission": mission}
+            for time, mission in changes if end_us is None or time <= end_us
+        ]
+
+    @property
+    def sample_count(self) -> int:
+        """Number of speed samples and buckets held."""
+        return len(self._samples) + sum(len(ring) for ring in self._tiers or ())
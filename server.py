@@ -1,11 +1,103 @@
 from flask import Flask, request, jsonify
+import argparse
+import itertools
 import logging
-from control_center import ControlCenter
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Iterator
+from cold_store import ArchivePolicy
+from control_center import ControlCenter, ROCKET_SORT_KEYS
+from event_log import DEFAULT_SYNC_INTERVAL
+import fleet_analytics
+from fleet_analytics import DEFAULT_REFRESH_INTERVAL, FleetAnalytics
+from fleet_journal import DEFAULT_SNAPSHOT_INTERVAL, FleetJournal
+from fleet_storage import StorageOptions
+from fleet_stream import DEFAULT_COALESCE_WINDOW, DEFAULT_MAX_PENDING, FleetStream
+from ingest_pipeline import IngestPipeline, MESSAGE_INVALID, MESSAGE_REJECTED, DEFAULT_QUEUE_SIZE, DEFAULT_WORKER_COUNT
+from log_config import DEFAULT_LOG_QUEUE_SIZE, DEFAULT_SAMPLE_BURST, REQUEST_LOGGER, configure_logging
+from message_codec import decode_batch, decode_message
+from partitioned_fleet import PartitionedFleet
+from reorder_buffers import BufferLimits
+from response_streams import (
+    JSON_MIMETYPE, NDJSON_MIMETYPE, compress_stream, content_encodings, json_array_stream, ndjson_stream, pages_of
+)
+from rocket_history import HistoryRetention
+from snapshot_cache import SnapshotCache
 
 app = Flask(__name__)
-control_center = ControlCenter()  # Create an instance of ControlCenter
+control_center = ControlCenter(  # Create an instance of ControlCenter
+    buffer_limits=BufferLimits.from_env(), history_retention=HistoryRetention.from_env(),
+    archive_policy=ArchivePolicy.from_env(), storage=StorageOptions.from_env()
+)
+# Serialized rockets and views, reused while unchanged. Compact like jsonify responses
+snapshot_cache = SnapshotCache(lambda value: app.json.dumps(value, separators=(",", ":")))
+
+# Changes of the rockets, streamed to the subscribers of /fleet/stream
+fleet_stream = FleetStream()
+control_center.fleet_stream = fleet_stream
+
+# Fleet-wide statistics of /fleet/stats, over snapshots of the fleet refreshed in the background
+fleet_stats = FleetAnalytics(lambda: control_center.fleet_columns())
+
+# Seconds without changes after which a comment is streamed, so that proxies keep the stream open
+STREAM_KEEPALIVE_INTERVAL = 15.0
+
+# Set in pipeline ingest mode: messages are enqueued and applied asynchronously
+ingest_pipeline: IngestPipeline | None = None
+
+# Logs written for each request, at the request log level
+request_logger = logging.getLogger(REQUEST_LOGGER)
+request_log_level: int = logging.INFO
+
+# Set when a data directory is given: the fleet is logged and snapshotted to survive restarts
+fleet_journal: FleetJournal | None = None
+
+def not_modified(etag: str) -> bool:
+    """Returns whether the client already has the version of the resource identified by the entity tag."""
+    return request.if_none_match.contains(etag)
+
+def archived_included() -> bool:
+    """Returns whether the request asks for the archived rockets too, with `include=archived`."""
+    return "archived" in request.args.get('include', "").split(",")
+
+def json_response(body: bytes, etag: str, status: int = 200, headers: dict | None = None):
+    """Builds a response from serialized JSON, tagged with its version."""
+    response = app.response_class(body, status=status, mimetype='application/json', headers=headers)
+    response.set_etag(etag)
+    return response
+
+def stream_response(version: int, pages: Iterator[list], opening: bytes = b"[", closing: bytes = b"]"):
+    """
+    Streams rockets read page by page, so that the memory held by the response doesn't grow with the fleet.
+    The rockets are sent as a JSON array, or as NDJSON if the client accepts it rather than JSON, and
+    compressed with the best content encoding the client accepts.
+
+    Args:
+        version (int): Fleet version the response is tagged with, read before the rockets
+        pages (Iterator[list]): Pages of rockets, see response_streams.pages_of
+        opening (bytes): Opens the JSON array of rockets, e.g. with the start of an object holding it
+        closing (bytes): Closes the JSON array of rockets, and the object holding it
+    """
+    ndjson = request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+    encoding = request.accept_encodings.best_match(content_encodings())
+    # Each representation of the collection has its own entity tag
+    etag = "-".join([snapshot_cache.etag(version)] + (["ndjson"] if ndjson else []) + ([encoding] if encoding else []))
+    if not_modified(etag):
+        return json_response(b"", etag, 304) # Not Modified
+
+    serialized = ([snapshot_cache.rocket_json(rocket) for rocket in page] for page in pages)
+    chunks = ndjson_stream(serialized) if ndjson else json_array_stream(serialized, opening, closing)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    response = app.response_class(
+        compress_stream(chunks, encoding), mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE, headers=headers
+    )
+    response.set_etag(etag)
+    return response
 
 @app.route('/messages', methods=['POST'])
 def receive_message():
@@ -20,9 +112,22 @@ def receive_message():
         logging.error("Request did not contain JSON data.")
         return jsonify({"error": "Request must be JSON"}), 400 # Bad Request
 
-    # Get the JSON data from the request
+    # Decode the JSON data of the request
+    data = decode_message(request.get_data())
+    if data is None:
+        logging.error("Request did not contain valid JSON data.")
+        return jsonify({"error": "Request must be JSON"}), 400 # Bad Request
+
     try:
-        data = request.get_json()
+
+        if ingest_pipeline:
+            outcome = ingest_pipeline.submit(data)
+            if outcome == MESSAGE_INVALID:
+                return jsonify({"error": "Invalid message"}), 400 # Bad Request
+            if outcome == MESSAGE_REJECTED:
+                return jsonify({"error": "Ingest queue is full"}), 429, {"Retry-After": "1"} # Too Many Requests
+            return jsonify({"status": "queued", "message_received": data}), 202 # Accepted
+
         control_center.process_incoming_message(data)
 
         # Return a success response
@@ -32,42 +137,211 @@ def receive_message():
         logging.error(f"Error processing request: {e}")
         return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
 
+@app.route('/messages/batch', methods=['POST'])
+def receive_message_batch():
+    """
+    Handles POST requests to the /messages/batch endpoint.
+    It expects either a JSON array of messages or NDJSON (one message per line),
+    processes them and returns the number of messages for each outcome.
+    """
+
+    ndjson = request.mimetype == 'application/x-ndjson'
+    if not ndjson and not request.is_json:
+        logging.error("Batch request did not contain JSON or NDJSON data.")
+        return jsonify({"error": "Request must be JSON or NDJSON"}), 400 # Bad Request
+
+    messages = decode_batch(request.get_data(), ndjson)
+    if messages is None:
+        logging.error("Batch request did not contain a JSON array.")
+        return jsonify({"error": "Request must be a JSON array of messages"}), 400 # Bad Request
+
+    try:
+        if ingest_pipeline:
+            outcomes = ingest_pipeline.submit_batch(messages)
+            response = {"status": "queued", "messages_received": len(messages), **outcomes}
+            if outcomes[MESSAGE_REJECTED]:
+                return jsonify(response), 429, {"Retry-After": "1"} # Too Many Requests
+            return jsonify(response), 202 # Accepted
+
+        outcomes = control_center.process_incoming_batch(messages)
+
+        # Return a success response
+        return jsonify({"status": "success", "messages_received": len(messages), **outcomes}), 200 # OK
+
+    except Exception as e:
+        logging.error(f"Error processing batch request: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
+
+# Endpoint to get the state of the ingest queues
+@app.route('/ingest/stats', methods=['GET'])
+def get_ingest_stats():
+    """
+    Handles GET requests to the /ingest/stats endpoint.
+    Returns the ingest mode and, in pipeline and processes modes, the depth of each queue
+    and the number of enqueued, rejected and processed messages.
+    When the fleet is journaled, also returns the state of the event log and snapshots.
+    """
+    # In processes mode, the stats report their own mode
+    stats = {"mode": "pipeline", **ingest_pipeline.stats()} if ingest_pipeline else {"mode": "synchronous"}
+    if fleet_journal:
+        stats["journal"] = fleet_journal.stats()
+    return jsonify(stats), 200
+
+# Endpoint to get the occupancy of the reorder buffers
+@app.route('/buffers', methods=['GET'])
+def get_buffer_stats():
+    """
+    Handles GET requests to the /buffers endpoint.
+    Returns the limits and occupancy of the reorder buffers holding out-of-order
+    messages, with the `top` largest buffers detailed (10 by default).
+    """
+    top = request.args.get('top', default=10, type=int)
+    try:
+        return jsonify(control_center.buffer_stats(max(top, 0))), 200
+
+    except Exception as e:
+        logging.error(f"Error retrieving buffer stats: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+
+# Endpoint to get the metrics of the service
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Handles GET requests to the /metrics endpoint.
+    Returns the counters, histograms and gauges of the control center
+    in the Prometheus text exposition format.
+    """
+    return app.response_class(control_center.metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def sweep_buffers_periodically(interval: float):
+    """Applies gap timeouts and global buffer limits every interval, in synchronous ingest mode."""
+    while True:
+        time.sleep(interval)
+        try:
+            control_center.sweep_buffers()
+        except Exception as e:
+            logging.error(f"Error sweeping buffers: {e}")
+
 # Endpoint to get all rockets in the fleet
 @app.route('/rockets', methods=['GET'])
 def get_all_rockets():
     """
     Handles GET requests to the /rockets endpoint.
-    It returns a list of all rockets in the fleet.
+    It streams the list of all rockets in the fleet, see stream_response.
+    With the `limit` query parameter, it returns a page of rockets and the cursor
+    of the next page in the `X-Next-Cursor` header, to be passed as `cursor`.
+    The rockets can be filtered by `status`, `rocket_type`, `min_speed` and `max_speed`,
+    and sorted by `launch_time`, `speed` or `last_update_time` with `sort`, in `asc` or
+    `desc` order with `order`. Filtered or sorted lists return the first `limit` rockets.
+    Archived rockets are only listed with `include=archived`.
     """
-    logging.info("Received request at /rockets endpoint.")
+    request_logger.log(request_log_level, "Received request at /rockets endpoint.")
+
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if 'limit' in request.args and (limit is None or limit < 1):
+        return jsonify({"error": "limit must be a positive integer"}), 400 # Bad Request
+    include_archived = archived_included()
+
+    if any(parameter in request.args for parameter in QUERY_PARAMETERS):
+        return query_rockets(limit, cursor, include_archived)
 
     try:
-        # Get the list of rockets from the control center
-        rockets = control_center.list_rockets_in_fleet()
+        # Read the version before the rockets, so the view is never tagged newer than its content
+        version = control_center.fleet_version
+        if limit is None:
+            # Stream the rockets in launch time order, a page at a time
+            return stream_response(version, pages_of(
+                lambda limit, cursor: control_center.rockets_page(limit, cursor, include_archived=include_archived)
+            ))
+
+        etag = snapshot_cache.etag(version)
+        if not_modified(etag):
+            return json_response(b"", etag, 304) # Not Modified
+
+        def build_page() -> tuple[bytes, dict]:
+            rockets, next_cursor = control_center.rockets_page(limit, cursor, include_archived=include_archived)
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+            return (snapshot_cache.rockets_json(rockets), headers)
 
-        # Return the list of rockets as JSON
-        return jsonify(rockets), 200
+        try:
+            body, headers = snapshot_cache.view(("rockets", limit, cursor, include_archived), version, build_page)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400 # Bad Request
+
+        return json_response(body, etag, headers=headers)
     
     except Exception as e:
         logging.error(f"Error listing rockets: {e}")
         return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
 
+# Query parameters filtering or sorting the rockets of /rockets
+QUERY_PARAMETERS = ("status", "rocket_type", "min_speed", "max_speed", "sort", "order")
+
+def query_rockets(limit: int | None, cursor: str | None, include_archived: bool):
+    """Returns the rockets of /rockets matching its filters, in the requested order."""
+    if cursor is not None:
+        return jsonify({"error": "cursor cannot be combined with filters or sort"}), 400 # Bad Request
+    speeds = {}
+    for parameter in ("min_speed", "max_speed"):
+        speeds[parameter] = request.args.get(parameter, type=float)
+        if parameter in request.args and speeds[parameter] is None:
+            return jsonify({"error": f"{parameter} must be a number"}), 400 # Bad Request
+    sort = request.args.get('sort', "launch_time")
+    if sort not in ROCKET_SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(ROCKET_SORT_KEYS)}"}), 400 # Bad Request
+    order = request.args.get('order', "asc")
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "order must be asc or desc"}), 400 # Bad Request
+    status, rocket_type = request.args.get('status'), request.args.get('rocket_type')
+
+    try:
+        # Read the version before the rockets, so the view is never tagged newer than its content
+        version = control_center.fleet_version
+        etag = snapshot_cache.etag(version)
+        if not_modified(etag):
+            return json_response(b"", etag, 304) # Not Modified
+
+        def build_query() -> tuple[bytes, dict]:
+            rockets = control_center.query_rockets(
+                status, rocket_type, speeds["min_speed"], speeds["max_speed"], sort, order == "desc", limit,
+                include_archived
+            )
+            return (snapshot_cache.rockets_json(rockets), {})
+
+        body, headers = snapshot_cache.view(
+            (
+                "rockets", status, rocket_type, speeds["min_speed"], speeds["max_speed"], sort, order, limit,
+                include_archived
+            ),
+            version, build_query
+        )
+        return json_response(body, etag, headers=headers)
+
+    except Exception as e:
+        logging.error(f"Error querying rockets: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
+
 # Endpoint to get a specific rocket's information by ID
 @app.route('/rockets/<rocket_id>', methods=['GET'])
 def get_rocket(rocket_id):
     """
     Handles GET requests to the /rockets/<rocket_id> endpoint.
-    It returns the details of a specific rocket by its ID.
+    It returns the details of a specific rocket by its ID, archived or not.
     """
-    logging.info(f"Received request at /rockets/{rocket_id} endpoint.")
+    request_logger.log(request_log_level, "Received request at /rockets/%s endpoint.", rocket_id)
 
     try:
-        # Get the rocket details from the control center
-        rocket = control_center.get_rocket_by_id(rocket_id)
+        # Get the rocket from the control center
+        rocket = control_center.get_rocket(rocket_id)
 
         if rocket:
+            etag = snapshot_cache.etag(rocket.version)
+            if not_modified(etag):
+                return json_response(b"", etag, 304) # Not Modified
+
             # Return the rocket details as JSON
-            return jsonify(rocket), 200
+            return json_response(snapshot_cache.rocket_json(rocket), etag)
         else:
             return jsonify({"error": "Rocket not found"}), 404 # Not Found
     
@@ -75,6 +349,36 @@ def get_rocket(rocket_id):
         logging.error(f"Error retrieving rocket: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
 
+# Endpoint to get the speeds and missions of a rocket over time
+@app.route('/rockets/<rocket_id>/history', methods=['GET'])
+def get_rocket_history(rocket_id):
+    """
+    Handles GET requests to the /rockets/<rocket_id>/history endpoint.
+    It returns the speeds of a rocket over time, between the `from` and `to` times,
+    aggregated in buckets of `resolution` seconds, and its missions over the same period.
+    """
+    request_logger.log(request_log_level, "Received request at /rockets/%s/history endpoint.", rocket_id)
+
+    resolution = request.args.get('resolution', type=float)
+    if 'resolution' in request.args and (resolution is None or not 0 < resolution < float("inf")):
+        return jsonify({"error": "resolution must be a positive number of seconds"}), 400 # Bad Request
+
+    try:
+        try:
+            history = control_center.get_rocket_history(
+                rocket_id, request.args.get('from'), request.args.get('to'), resolution
+            )
+        except ValueError:
+            return jsonify({"error": "from and to must be ISO 8601 times"}), 400 # Bad Request
+
+        if history is None:
+            return jsonify({"error": "Rocket not found"}), 404 # Not Found
+        return jsonify(history)
+
+    except Exception as e:
+        logging.error(f"Error retrieving rocket history: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
+
 # Endpoint to get all missions
 @app.route('/missions', methods=['GET'])
 def get_all_missions():
@@ -82,7 +386,7 @@ def get_all_missions():
     Handles GET requests to the /missions endpoint.
     Returns a list of all unique missions across all rockets.
     """
-    logging.info("Received request at /missions endpoint.")
+    request_logger.log(request_log_level, "Received request at /missions endpoint.")
 
     try:
         missions = control_center.list_missions()
@@ -97,23 +401,314 @@ def get_all_missions():
 def get_rockets_by_mission(mission):
     """
     Handles GET requests to the /missions/<mission> endpoint.
-    Returns all rockets assigned to a specific mission.
+    Streams all rockets assigned to a specific mission, see stream_response.
+    Archived rockets are only listed with `include=archived`.
     """
-    logging.info(f"Received request at /missions/{mission} endpoint.")
+    request_logger.log(request_log_level, "Received request at /missions/%s endpoint.", mission)
 
     try:
-        rockets = control_center.get_rockets_by_mission(mission)
-        if rockets:
-            return jsonify({"mission": mission, "rockets": rockets}), 200
+        # Read the version before the rockets, so the view is never tagged newer than its content
+        version = control_center.fleet_version
+        include_archived = archived_included()
+        pages = pages_of(lambda limit, cursor: control_center.rockets_page(limit, cursor, mission, include_archived))
+        # Read the first page before responding, to know whether the mission has rockets
+        first_page = next(pages)
+        if first_page:
+            return stream_response(
+                version, itertools.chain([first_page], pages),
+                b'{"mission":' + snapshot_cache.encode(mission) + b',"rockets":[', b']}'
+            )
         return jsonify({"error": f"No rockets found for mission: {mission}"}), 404
     
     except Exception as e:
         logging.error(f"Error retrieving rockets for mission {mission}: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
+
+# Endpoint to get the number of rockets of a mission per status
+@app.route('/missions/<mission>/stats', methods=['GET'])
+def get_mission_stats(mission):
+    """
+    Handles GET requests to the /missions/<mission>/stats endpoint.
+    Returns the number of rockets of a specific mission, launched and exploded.
+    """
+    request_logger.log(request_log_level, "Received request at /missions/%s/stats endpoint.", mission)
+
+    try:
+        stats = control_center.get_mission_stats(mission)
+        if stats:
+            return jsonify({"mission": mission, **stats}), 200
+        return jsonify({"error": f"No rockets found for mission: {mission}"}), 404
     
+    except Exception as e:
+        logging.error(f"Error retrieving stats for mission {mission}: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    
+# Endpoint to get fleet-wide statistics
+@app.route('/fleet/stats', methods=['GET'])
+def get_fleet_stats():
+    """
+    Handles GET requests to the /fleet/stats endpoint.
+    Returns the speed percentiles, the mean speed and number of exploded rockets of each
+    mission and rocket type, and the number of explosions per reason, over the latest
+    snapshot of the fleet.
+    """
+    request_logger.log(request_log_level, "Received request at /fleet/stats endpoint.")
+    if fleet_analytics.numpy is None:
+        return jsonify({"error": "The fleet statistics require NumPy"}), 501 # Not Implemented
+
+    try:
+        stats = fleet_stats.stats()
+        etag = snapshot_cache.etag(stats["snapshot"]["fleet_version"])
+        if not_modified(etag):
+            return json_response(b"", etag, 304) # Not Modified
+        return json_response(snapshot_cache.encode(stats), etag)
+
+    except Exception as e:
+        logging.error(f"Error computing fleet stats: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500 # Internal Server Error
+
+# Endpoint streaming the changes of the rockets
+@app.route('/fleet/stream', methods=['GET'])
+def stream_fleet():
+    """
+    Handles GET requests to the /fleet/stream endpoint.
+    Streams Server-Sent Events: a `fleet` event with the current rockets, then a `rocket`
+    event with the latest state of each rocket that changes, optionally filtered by the
+    `rocket` (repeatable or comma-separated) and `mission` query parameters. A `resync`
+    event tells a subscriber too slow to keep up to read the fleet again.
+    """
+    request_logger.log(request_log_level, "Received request at /fleet/stream endpoint.")
+    if control_center.fleet_stream is None:
+        return jsonify({"error": "The fleet stream is not available in processes ingest mode"}), 501 # Not Implemented
+
+    rocket_ids = frozenset(
+        rocket_id for value in request.args.getlist('rocket') for rocket_id in value.split(',') if rocket_id
+    ) or None
+    mission = request.args.get('mission') or None
+
+    # Subscribe before reading the fleet, so that no change is missed in between
+    subscription = fleet_stream.subscribe(rocket_ids, mission)
+    if rocket_ids is not None:
+        rockets = [rocket for rocket in map(control_center.get_rocket, sorted(rocket_ids)) if rocket is not None]
+        if mission is not None:
+            rockets = [rocket for rocket in rockets if subscription.matches(rocket)]
+    elif mission is not None:
+        rockets = control_center.rockets_of_mission(mission)
+    else:
+        rockets = control_center.rockets_in_launch_order()
+
+    def events():
+        try:
+            yield b"event: fleet\ndata: " + snapshot_cache.rockets_json(rockets) + b"\n\n"
+            while True:
+                changed, resync = subscription.next_changes(STREAM_KEEPALIVE_INTERVAL)
+                if resync:
+                    yield b"event: resync\ndata: {}\n\n"
+                if changed:
+                    yield b"".join(
+                        b"event: rocket\ndata: " + snapshot_cache.rocket_json(rocket) + b"\n\n" for rocket in changed
+                    )
+                elif not resync:
+                    yield b": keepalive\n\n"
+        finally:
+            fleet_stream.unsubscribe(subscription)
+
+    return app.response_class(
+        events(),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Main execution block
 if __name__ == '__main__':
-    # Run the Flask development server
-    logging.info("Starting Flask server on port 8088...")
-    app.run(host='0.0.0.0', port=8088)
-    logging.info("Flask server stopped.")
+    parser = argparse.ArgumentParser(description="Rockets API server")
+    parser.add_argument(
+        "--server",
+        choices=("flask", "asgi"),
+        default=os.environ.get("LUNAR_SERVER", "flask"),
+        help="Flask development server, or asyncio ASGI server (requires uvicorn). Env: LUNAR_SERVER"
+    )
+    parser.add_argument(
+        "--ingest",
+        choices=("synchronous", "pipeline", "processes"),
+        default=os.environ.get("LUNAR_INGEST_MODE", "synchronous"),
+        help="Apply messages in the request, enqueue them for single-writer worker threads, "
+             "or for worker processes each owning a partition of the fleet. Env: LUNAR_INGEST_MODE"
+    )
+    parser.add_argument(
+        "--ingest-workers",
+        type=int,
+        default=int(os.environ.get("LUNAR_INGEST_WORKERS", DEFAULT_WORKER_COUNT)),
+        help="Number of workers in pipeline and processes modes. Env: LUNAR_INGEST_WORKERS"
+    )
+    parser.add_argument(
+        "--ingest-queue-size",
+        type=int,
+        default=int(os.environ.get("LUNAR_INGEST_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        help="Capacity of each worker queue in pipeline mode, in batches in processes mode. Env: LUNAR_INGEST_QUEUE_SIZE"
+    )
+    parser.add_argument(
+        "--sweep-interval",
+        type=float,
+        default=float(os.environ.get("LUNAR_SWEEP_INTERVAL", 1.0)),
+        help="Seconds between sweeps of the reorder buffers. Env: LUNAR_SWEEP_INTERVAL"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.environ.get("LUNAR_DATA_DIR") or None,
+        help="Directory of the event log and snapshots, the fleet is only kept in memory if unset. Env: LUNAR_DATA_DIR"
+    )
+    parser.add_argument(
+        "--snapshot-interval",
+        type=float,
+        default=float(os.environ.get("LUNAR_SNAPSHOT_INTERVAL", DEFAULT_SNAPSHOT_INTERVAL)),
+        help="Seconds between snapshots of the fleet. Env: LUNAR_SNAPSHOT_INTERVAL"
+    )
+    parser.add_argument(
+        "--log-sync-interval",
+        type=float,
+        default=float(os.environ.get("LUNAR_LOG_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL)),
+        help="Seconds between fsyncs of the event log, 0 to fsync every event. Env: LUNAR_LOG_SYNC_INTERVAL"
+    )
+    parser.add_argument(
+        "--stream-window",
+        type=float,
+        default=float(os.environ.get("LUNAR_STREAM_WINDOW", DEFAULT_COALESCE_WINDOW)),
+        help="Minimum seconds between two events of /fleet/stream, changes of a rocket in between are coalesced. Env: LUNAR_STREAM_WINDOW"
+    )
+    parser.add_argument(
+        "--stream-max-pending",
+        type=int,
+        default=int(os.environ.get("LUNAR_STREAM_MAX_PENDING", DEFAULT_MAX_PENDING)),
+        help="Changed rockets waiting for a /fleet/stream subscriber before it has to resync. Env: LUNAR_STREAM_MAX_PENDING"
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=float(os.environ.get("LUNAR_STATS_INTERVAL", DEFAULT_REFRESH_INTERVAL)),
+        help="Seconds between snapshots of the fleet for /fleet/stats, while it changes. Env: LUNAR_STATS_INTERVAL"
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        default=os.environ.get("LUNAR_LOG_LEVEL", "INFO"),
+        help="Level of the logs. Env: LUNAR_LOG_LEVEL"
+    )
+    parser.add_argument(
+        "--message-log-level",
+        type=str.upper,
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        default=os.environ.get("LUNAR_MESSAGE_LOG_LEVEL", "INFO"),
+        help="Level of the logs written for each message and request, DEBUG to drop them in production. Env: LUNAR_MESSAGE_LOG_LEVEL"
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=("text", "json"),
+        default=os.environ.get("LUNAR_LOG_FORMAT", "text"),
+        help="Logs as text, or as JSON lines. Env: LUNAR_LOG_FORMAT"
+    )
+    parser.add_argument(
+        "--log-sample-rate",
+        type=float,
+        default=float(os.environ["LUNAR_LOG_SAMPLE_RATE"]) if os.environ.get("LUNAR_LOG_SAMPLE_RATE") else None,
+        help="Logs per second allowed per rocket after a burst, unlimited if unset. Env: LUNAR_LOG_SAMPLE_RATE"
+    )
+    parser.add_argument(
+        "--log-sample-burst",
+        type=int,
+        default=int(os.environ.get("LUNAR_LOG_SAMPLE_BURST", DEFAULT_SAMPLE_BURST)),
+        help="Burst of logs allowed per rocket when sampling. Env: LUNAR_LOG_SAMPLE_BURST"
+    )
+    parser.add_argument(
+        "--log-queue-size",
+        type=int,
+        default=int(os.environ.get("LUNAR_LOG_QUEUE_SIZE", DEFAULT_LOG_QUEUE_SIZE)),
+        help="Logs waiting to be written before logs are dropped. Env: LUNAR_LOG_QUEUE_SIZE"
+    )
+    parser.add_argument("--host", default=os.environ.get("LUNAR_HOST", "0.0.0.0"), help="Env: LUNAR_HOST")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("LUNAR_PORT", 8088)), help="Env: LUNAR_PORT")
+    args = parser.parse_args()
+    if args.ingest == "processes" and args.data_dir:
+        parser.error("the fleet can't be journaled in processes ingest mode")
+    storage = control_center.storage
+    if storage is not None and args.data_dir:
+        parser.error("the fleet can't be both journaled and stored in sqlite, unset LUNAR_DATA_DIR or LUNAR_STORAGE")
+    if storage is not None and control_center.archive_policy is not None:
+        parser.error("archived rockets aren't kept by the sqlite storage, unset LUNAR_ARCHIVE or LUNAR_STORAGE")
+
+    # Logs are written by a background thread, so request threads never wait on stderr
+    log_listener = configure_logging(
+        args.log_level, args.log_format == "json", args.log_queue_size, args.log_sample_rate, args.log_sample_burst
+    )
+    fleet_stream.coalesce_window = args.stream_window
+    fleet_stream.max_pending = args.stream_max_pending
+    control_center.message_log_level = request_log_level = logging.getLevelName(args.message_log_level)
+
+    if storage is not None and args.ingest != "processes":
+        # Load the stored fleet before accepting messages, worker processes load their own partition
+        loaded = control_center.load_stored_fleet()
+        logging.info(f"Loaded {loaded} rocket(s) from {storage.path}.")
+
+    if args.data_dir:
+        # Restore the fleet before accepting messages
+        fleet_journal = FleetJournal(control_center, args.data_dir, args.snapshot_interval, args.log_sync_interval)
+        fleet_journal.recover()
+
+    if args.ingest == "pipeline":
+        # Workers sweep the buffers of the rockets they own
+        ingest_pipeline = IngestPipeline(control_center, args.ingest_workers, args.ingest_queue_size, args.sweep_interval)
+        logging.info(f"Ingesting messages with {args.ingest_workers} pipeline workers.")
+    elif args.ingest == "processes":
+        # Each worker process owns a partition of the fleet and sweeps its buffers, reads are fanned out to them
+        control_center = ingest_pipeline = PartitionedFleet(
+            args.ingest_workers, args.ingest_queue_size, args.sweep_interval, control_center.buffer_limits,
+            args.log_level, request_log_level, control_center.history_retention, control_center.archive_policy,
+            storage
+        )
+        logging.info(f"Ingesting messages with {args.ingest_workers} worker processes.")
+    else:
+        threading.Thread(target=sweep_buffers_periodically, args=(args.sweep_interval,), daemon=True).start()
+
+    fleet_stats.refresh_interval = args.stats_interval
+    if fleet_analytics.numpy is not None:
+        # Snapshots of the fleet are taken in the background, /fleet/stats serves the latest one
+        threading.Thread(target=fleet_stats.run, args=(lambda: control_center.fleet_version,), daemon=True).start()
+
+    if fleet_journal:
+        if ingest_pipeline:
+            # Workers apply messages without locking rockets, they are paused while the fleet is snapshotted
+            fleet_journal.pause = ingest_pipeline.paused
+        fleet_journal.start()
+
+    if fleet_journal or storage is not None:
+        # Stop on SIGTERM like on Ctrl+C, so that the last snapshot or changes are written
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        if args.server == "asgi":
+            import asgi_app
+            logging.info(f"Starting ASGI server on port {args.port}...")
+            asgi_app.run(asgi_app.create_asgi_app(app, control_center, ingest_pipeline), args.host, args.port)
+            logging.info("ASGI server stopped.")
+        else:
+            # Run the Flask development server
+            logging.info(f"Starting Flask server on port {args.port}...")
+            app.run(host=args.host, port=args.port)
+            logging.info("Flask server stopped.")
+    finally:
+        if args.ingest == "processes":
+            # Let the worker processes apply the enqueued messages
+            ingest_pipeline.stop()
+        elif fleet_journal:
+            if ingest_pipeline:
+                ingest_pipeline.stop()
+            # A last snapshot, so that the next start doesn't replay the log
+            fleet_journal.close()
+        elif storage is not None:
+            if ingest_pipeline:
+                ingest_pipeline.stop()
+            # Write the changes of the last flush interval
+            control_center.close()
+        # Write the logs still queued
+        log_listener.stop()
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Callable, Hashable
+import uuid
+from rocket import Rocket
+
+DEFAULT_MAX_VIEWS = 1024
+
+class SnapshotCache:
+    """
+    Serialized JSON of rockets and of collection views, reused until their version changes.
+
+    Each rocket keeps its serialized state along with the version it was serialized at,
+    and collection views are cached against the fleet version. Entity tags are built from
+    the same versions, so unchanged resources can be answered without serializing anything.
+    """
+
+    def __init__(self, dumps: Callable[[Any], str], max_views: int = DEFAULT_MAX_VIEWS):
+        """
+        Args:
+            dumps (Callable[[Any], str]): Serializes an object to JSON, e.g. the Flask app's JSON provider
+            max_views (int): Maximum number of collection views kept, least recently used ones are evicted
+        """
+        self._dumps = dumps
+        self._max_views = max_views
+        self._views: OrderedDict[Hashable, tuple[int, bytes, dict]] = OrderedDict()
+        self._views_lock = threading.Lock()
+
+        # Versions restart with the process, so tags are scoped to this cache instance
+        self._tag_prefix = uuid.uuid4().hex[:8]
+
+    def etag(self, version: int) -> str:
+        """Returns the entity tag of a resource at a given version."""
+        return f"{self._tag_prefix}-{version}"
+
+    def encode(self, value: Any) -> bytes:
+        """Serializes a value to JSON."""
+        return self._dumps(value).encode()
+
+    def rocket_json(self, rocket: Rocket) -> bytes:
+        """Returns the serialized state of a rocket, serializing it only if it changed since last time."""
+        # Read the version first, a concurrent update then only makes the cached state newer than its version
+        version = rocket.version
+        cached = rocket.json_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        serialized = self.encode(rocket.to_dict())
+        rocket.json_cache = (version, serialized)
+        return serialized
+
+    def rockets_json(self, rockets: list[Rocket]) -> bytes:
+        """Returns the serialized JSON array of a list of rockets."""
+        return b"[" + b",".join(self.rocket_json(rocket) for rocket in rockets) + b"]"
+
+    def view(self, key: Hashable, version: int,
+             build: Callable[[], tuple[bytes, dict]]) -> tuple[bytes, dict]:
+        """
+        Returns a cached collection view, building it if missing or built at another version.
+
+        Args:
+            key (Hashable): Identifies the view, e.g. the endpoint and its parameters
+            version (int): Current version of the data the view is built from
+            build (Callable[[], tuple[bytes, dict]]): Builds the serialized view and its response headers
+
+        Returns:
+            tuple[bytes, dict]: The serialized view and its response headers
+        """
+        with self._views_lock:
+            cached = self._views.get(key)
+            if cached is not None and cached[0] == version:
+                self._views.move_to_end(key)
+                return (cached[1], cached[2])
+
+        body, headers = build()
+
+        with self._views_lock:
+            self._views[key] = (version, body, headers)
+            self._views.move_to_end(key)
+            while len(self._views) > self._max_views:
+                self._views.popitem(last=False)
+        return (body, headers)
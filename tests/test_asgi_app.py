@@ -0,0 +1,135 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+from asgi_app import create_asgi_app
+from server import app, control_center, fleet_stream
+
+class TestASGIApp(unittest.TestCase):
+    def setUp(self):
+        """Set up the ASGI application before each test."""
+        self.application = create_asgi_app(app, control_center)
+        self.test_time = "2025-05-14T10:00:00"
+        control_center.clear_fleet()
+
+    def _request(self, method: str, path: str, body: bytes = b"", content_type: str = "application/json",
+                 query_string: bytes = b"", headers: list | None = None) -> tuple[int, dict, bytes]:
+        """Sends a request to the ASGI application and returns the status, headers and body of the response."""
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "path": path,
+            "root_path": "",
+            "scheme": "http",
+            "query_string": query_string,
+            "server": ("testserver", 80),
+            "headers": [(b"content-type", content_type.encode())] + (headers or [])
+        }
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+        messages = []
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            # The client stays connected until the response is sent
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        start = messages[0]
+        response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+        return (start["status"], response_headers, b"".join(message.get("body", b"") for message in messages[1:]))
+
+    def _launch_message(self) -> dict:
+        """Builds a rocket launch message."""
+        return {
+            "metadata": {
+                "channel": "rocket_123",
+                "messageNumber": 1,
+                "messageType": "RocketLaunched",
+                "messageTime": self.test_time
+            },
+            "message": {
+                "launchSpeed": 1000,
+                "type": "Falcon",
+                "mission": "MoonLanding"
+            }
+        }
+
+    def test_post_message(self):
+        """Test POST /messages is applied to the control center."""
+        status, _, body = self._request("POST", "/messages", json.dumps(self._launch_message()).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["status"], "success")
+        self.assertIsNotNone(control_center.get_rocket_by_id("rocket_123"))
+
+    def test_post_message_invalid_json(self):
+        """Test POST /messages with a body that is not JSON."""
+        status, _, _ = self._request("POST", "/messages", b"Not json", content_type="text/plain")
+        self.assertEqual(status, 400)
+        status, _, _ = self._request("POST", "/messages", b"Not json")
+        self.assertEqual(status, 400)
+
+    def test_post_message_batch(self):
+        """Test POST /messages/batch with NDJSON messages."""
+        body = json.dumps(self._launch_message()) + "\n" + json.dumps(self._launch_message())
+        status, _, response = self._request("POST", "/messages/batch", body.encode(), "application/x-ndjson")
+        self.assertEqual(status, 200)
+        data = json.loads(response)
+        self.assertEqual(data["accepted"], 1)
+        self.assertEqual(data["duplicate"], 1)
+
+    def test_flask_routes(self):
+        """Test that other routes are served by the Flask app."""
+        self.test_post_message()
+
+        status, headers, body = self._request("GET", "/rockets", query_string=b"limit=1")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)[0]["id"], "rocket_123")
+
+        status, _, _ = self._request("GET", "/rockets", headers=[(b"if-none-match", headers["etag"].encode())])
+        self.assertEqual(status, 304)
+
+        status, _, _ = self._request("GET", "/rockets/nonexistent")
+        self.assertEqual(status, 404)
+
+    def test_stream_client_disconnects(self):
+        """Test that a fleet stream is closed, and its subscription released, when its client disconnects."""
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "path": "/fleet/stream", "root_path": "",
+            "scheme": "http", "query_string": b"", "server": ("testserver", 80), "headers": []
+        }
+        subscribers = fleet_stream.subscriber_count
+
+        async def stream() -> list[dict]:
+            messages = []
+            requests = [{"type": "http.request", "body": b"", "more_body": False}]
+            disconnect = asyncio.Event()
+
+            async def receive():
+                if requests:
+                    return requests.pop(0)
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                messages.append(message)
+                if message.get("body", b"").startswith(b"event: fleet"):
+                    self.assertEqual(fleet_stream.subscriber_count, subscribers + 1)
+                    disconnect.set()
+
+            # Never ends unless the bridge notices the disconnection
+            await asyncio.wait_for(self.application(scope, receive, send), timeout=5)
+            return messages
+
+        # Streams wait for changes up to the keepalive interval, keep the test short
+        with mock.patch("server.STREAM_KEEPALIVE_INTERVAL", 0.05):
+            messages = asyncio.run(stream())
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertEqual(fleet_stream.subscriber_count, subscribers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from cold_store import ArchivePolicy, ColdStore
+from rocket import Rocket
+
+def rocket_record(rocket_id: str, second: int, speed: int, mission: str = "ARTEMIS",
+                  status: str = "Exploded") -> list:
+    rocket = Rocket(rocket_id, f"2025-05-14T10:00:{second:02}", f"2025-05-14T10:01:{second:02}", 3, speed, "Falcon-9", mission)
+    rocket.status = status
+    return rocket.to_snapshot()
+
+class TestColdStore(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.store = ColdStore(cache_size=2)
+        self.store.archive([
+            rocket_record("rocket_c", 3, 300),
+            rocket_record("rocket_a", 1, 100, mission="apollo"),
+            rocket_record("rocket_b", 2, 200, status="Launched")
+        ])
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_get_through_cache(self):
+        """Test reading archived rockets by ID, the latest ones from the cache."""
+        rocket = self.store.get("rocket_a")
+        self.assertEqual((rocket.speed, rocket.mission, rocket.status), (100, "apollo", "Exploded"))
+        self.assertIs(self.store.get("rocket_a"), rocket)
+        self.store.get("rocket_b")
+        self.store.get("rocket_c")
+        self.assertIsNone(self.store.get("rocket_d"))
+        self.assertEqual(self.store.stats(), {"rockets": 3, "cached": 2, "cache_hits": 1, "cache_misses": 4})
+        # The least recently read rocket has been evicted
+        self.assertIsNot(self.store.get("rocket_a"), rocket)
+
+    def test_archive_replaces(self):
+        """Test archiving a rocket again, dropping the cached state."""
+        self.store.get("rocket_a")
+        self.store.archive([rocket_record("rocket_a", 1, 150)])
+        self.assertEqual(self.store.get("rocket_a").speed, 150)
+        self.assertEqual(len(self.store), 3)
+
+    def test_pop(self):
+        """Test removing a rocket from the store."""
+        self.assertEqual(self.store.pop("rocket_b").id, "rocket_b")
+        self.assertIsNone(self.store.pop("rocket_b"))
+        self.assertNotIn("rocket_b", self.store)
+        self.assertIn("rocket_a", self.store)
+
+    def test_page(self):
+        """Test paging archived rockets in launch time order."""
+        first = self.store.page(limit=2)
+        self.assertEqual([rocket.id for rocket in first], ["rocket_a", "rocket_b"])
+        after = (first[-1].launch_us, first[-1].id)
+        self.assertEqual([rocket.id for rocket in self.store.page(after)], ["rocket_c"])
+        self.assertEqual([rocket.id for rocket in self.store.page(mission="APOLLO")], ["rocket_a"])
+
+    def test_query(self):
+        """Test filtering and sorting archived rockets."""
+        def query(**kwargs) -> list[str]:
+            return [rocket.id for rocket in self.store.query(**kwargs)]
+
+        self.assertEqual(query(status="exploded", sort="speed", descending=True), ["rocket_c", "rocket_a"])
+        self.assertEqual(query(min_speed=150, max_speed=300, limit=1), ["rocket_b"])
+        self.assertEqual(query(rocket_type="FALCON-9", sort="last_update_time", descending=True, limit=1), ["rocket_c"])
+        with self.assertRaises(ValueError):
+            query(sort="mission")
+
+    def test_records_and_clear(self):
+        """Test reading every archived record, then removing them."""
+        self.assertEqual(sorted(record[0] for record in self.store.records()), ["rocket_a", "rocket_b", "rocket_c"])
+        self.store.clear()
+        self.assertEqual(list(self.store.records()), [])
+        self.assertEqual(len(self.store), 0)
+
+class TestArchivePolicy(unittest.TestCase):
+    def test_for_partition(self):
+        """Test that each partition archives to its own database."""
+        self.assertEqual(ArchivePolicy(path="archive.db").for_partition(2).path, "archive.db.2")
+        self.assertEqual(ArchivePolicy().for_partition(2).path, "")
+
+    def test_invalid_idle_time(self):
+        """Test rejecting a non-positive idle time."""
+        with self.assertRaises(ValueError):
+            ArchivePolicy(idle_after=0)
+
+if __name__ == '__main__':
+    unittest.main()
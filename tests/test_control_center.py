@@ -1,6 +1,11 @@
+import logging
 import unittest
 from datetime import datetime
-from control_center import ControlCenter
+from cold_store import ArchivePolicy
+from control_center import (
+    ControlCenter, MESSAGE_ACCEPTED, MESSAGE_BUFFERED, MESSAGE_DUPLICATE, MESSAGE_INVALID, MESSAGE_PENDING
+)
+from reorder_buffers import BufferLimits, GAP_POLICY_DEGRADE
 
 class TestControlCenter(unittest.TestCase):
     def setUp(self):
@@ -96,6 +101,32 @@ class TestControlCenter(unittest.TestCase):
         self.assertEqual(rocket.last_message_number, 3)  # Message 2 and 3 processed 
         self.assertEqual(rocket.speed, 1600)  # Speed should be updated
 
+    def test_rocket_history(self):
+        """Test that the speeds and missions of a rocket are recorded at the time of their messages."""
+        self.test_process_speed_increase()
+        mission_message = {
+            "metadata": {
+                "channel": self.channel_id,
+                "messageNumber": 3,
+                "messageType": "RocketMissionChanged",
+                "messageTime": "2025-05-14T10:00:05"
+            },
+            "message": {"newMission": "Mars"}
+        }
+        self.control_center.process_incoming_message(mission_message)
+
+        history = self.control_center.get_rocket_history(self.channel_id)
+        self.assertEqual([speed["avg"] for speed in history["speeds"]], [1000, 1500])
+        self.assertEqual([mission["mission"] for mission in history["missions"]], ["Moon Landing", "Mars"])
+
+        history = self.control_center.get_rocket_history(self.channel_id, start="2025-05-14T10:00:01")
+        self.assertEqual(history["speeds"], [])
+        self.assertEqual([mission["mission"] for mission in history["missions"]], ["Moon Landing", "Mars"])
+
+        self.assertIsNone(self.control_center.get_rocket_history("unknown"))
+        with self.assertRaises(ValueError):
+            self.control_center.get_rocket_history(self.channel_id, end="yesterday")
+
     def test_ignore_duplicates(self):
         """Test handling duplicate messages."""
         # First launch the rocket
@@ -167,6 +198,46 @@ class TestControlCenter(unittest.TestCase):
         self.control_center.process_incoming_message(invalid_message)
         self.assertEqual(len(self.control_center.rockets_fleet), 0)
 
+    def test_malformed_message_time(self):
+        """Test that a message with a malformed time is invalid and leaves its rocket readable."""
+        self.launch_rockets(self.control_center, 1)
+        mission_change = {
+            "metadata": {"channel": "rocket_0", "messageNumber": 2,
+                         "messageType": "RocketMissionChanged", "messageTime": "garbage"},
+            "message": {"newMission": "APOLLO"}
+        }
+        self.assertEqual(self.control_center.process_incoming_message(mission_change), MESSAGE_INVALID)
+        self.assertEqual(self.control_center.get_rocket_by_id("rocket_0")["mission"], "ARTEMIS")
+
+    def test_mixed_time_zones(self):
+        """Test indexing and paging rockets launched at times with and without time zone, in launch order."""
+        for channel_id, launch_time in (("rocket_utc", "2025-05-14T10:00:00"), ("rocket_paris", "2025-05-14T11:30:00+02:00")):
+            self.control_center.process_incoming_message({
+                "metadata": {"channel": channel_id, "messageNumber": 1,
+                             "messageType": "RocketLaunched", "messageTime": launch_time},
+                "message": {"launchSpeed": 500, "type": "Falcon-9", "mission": "ARTEMIS"}
+            })
+        page, cursor = self.control_center.rockets_page(1)
+        self.assertEqual([rocket.id for rocket in page], ["rocket_paris"])
+        self.assertEqual([rocket.id for rocket in self.control_center.rockets_page(1, cursor)[0]], ["rocket_utc"])
+        self.assertEqual([rocket.id for rocket in self.control_center.rockets_of_mission("artemis")],
+                         ["rocket_paris", "rocket_utc"])
+        self.assertEqual([rocket.id for rocket in self.control_center.query_rockets(sort="launch_time")],
+                         ["rocket_paris", "rocket_utc"])
+
+    def test_rocket_indexed_before_reachable(self):
+        """Test that a new rocket is in the indexes before other messages can find it in the fleet."""
+        reachable = []
+        add = self.control_center.mission_index.add
+
+        def add_to_mission(mission, launch_key, status):
+            reachable.append("rocket_0" in self.control_center.rockets_fleet)
+            add(mission, launch_key, status)
+
+        self.control_center.mission_index.add = add_to_mission
+        self.launch_rockets(self.control_center, 1)
+        self.assertEqual(reachable, [False])
+
     def test_message_for_nonexistent_rocket(self):
         """Test handling message for rocket that hasn't launched."""
         speed_message = {
@@ -184,6 +255,30 @@ class TestControlCenter(unittest.TestCase):
         self.control_center.process_incoming_message(speed_message)
         self.assertNotIn("nonexistent_rocket", self.control_center.rockets_fleet)
 
+    def test_messages_before_launch_replayed(self):
+        """Test that messages arriving before the launch are applied once it arrives."""
+        for msg_number in (3, 2, 3):
+            self.control_center.process_incoming_message(self._speed_message(msg_number, 100))
+        self.assertNotIn(self.channel_id, self.control_center.rockets_fleet)
+        self.assertEqual(self.control_center.pending_store.stats()["messages"], 2)
+
+        self.control_center.process_incoming_message({
+            "metadata": {
+                "channel": self.channel_id,
+                "messageNumber": 1,
+                "messageType": "RocketLaunched",
+                "messageTime": self.test_time
+            },
+            "message": {"launchSpeed": 1000, "type": "Falcon", "mission": "Moon Landing"}
+        })
+
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+        self.assertEqual(rocket.speed, 1200)
+        self.assertEqual(rocket.last_message_number, 3)
+        stats = self.control_center.pending_store.stats()
+        self.assertEqual(stats["messages"], 0)
+        self.assertEqual(stats["replayed"], 2)
+
     def test_handle_speed_increase(self):
         """Test handling of speed increase message."""
         # First launch the rocket
@@ -263,5 +358,322 @@ class TestControlCenter(unittest.TestCase):
         self.assertEqual(rocket.last_message_number, 2)
         self.assertEqual(rocket.last_update_time, datetime.fromisoformat(self.test_time))
 
+    def _speed_message(self, msg_number: int, increment: int, channel_id: str | None = None) -> dict:
+        """Builds a speed increase message."""
+        return {
+            "metadata": {
+                "channel": channel_id or self.channel_id,
+                "messageNumber": msg_number,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {
+                "by": increment
+            }
+        }
+
+    def test_long_gap_drained_iteratively(self):
+        """Test that closing a gap of 100k buffered messages drains them in one pass."""
+        self.control_center = ControlCenter(buffer_limits=BufferLimits(
+            max_messages_per_rocket=None,
+            max_bytes_per_rocket=None,
+            max_total_bytes=None,
+            gap_timeout=None
+        ))
+        self.test_process_launch_message()
+        message_count = 100_000
+
+        logging.disable(logging.INFO)
+        try:
+            for msg_number in range(message_count + 1, 2, -1):
+                self.control_center.process_incoming_message(self._speed_message(msg_number, 1))
+            rocket = self.control_center.rockets_fleet.get(self.channel_id)
+            self.assertEqual(len(rocket.message_buffer), message_count - 1)
+
+            self.control_center.process_incoming_message(self._speed_message(2, 1))
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.assertEqual(len(rocket.message_buffer), 0)
+        self.assertEqual(rocket.last_message_number, message_count + 1)
+        self.assertEqual(rocket.speed, 1000 + message_count)
+
+    def test_buffer_accounting(self):
+        """Test that buffered messages are accounted for until drained."""
+        self.test_process_launch_message()
+        self.control_center.process_incoming_message(self._speed_message(3, 100))
+        self.control_center.process_incoming_message(self._speed_message(4, 100))
+
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+        totals = self.control_center.buffer_accounting.to_dict()
+        self.assertEqual(totals["messages"], 2)
+        self.assertEqual(totals["bytes"], rocket.buffered_bytes)
+        self.assertIsNotNone(rocket.gap_started_at)
+
+        self.control_center.process_incoming_message(self._speed_message(2, 100))
+        totals = self.control_center.buffer_accounting.to_dict()
+        self.assertEqual(totals["messages"], 0)
+        self.assertEqual(totals["bytes"], 0)
+        self.assertIsNone(rocket.gap_started_at)
+
+    def test_buffer_limit_per_rocket(self):
+        """Test that a full buffer skips the missing messages."""
+        self.control_center = ControlCenter(buffer_limits=BufferLimits(max_messages_per_rocket=2))
+        self.test_process_launch_message()
+
+        for msg_number in (4, 5, 7):
+            self.control_center.process_incoming_message(self._speed_message(msg_number, 100))
+
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+        self.assertEqual(rocket.last_message_number, 5)
+        self.assertEqual(rocket.speed, 1200)
+        self.assertEqual(len(rocket.message_buffer), 1)
+        totals = self.control_center.buffer_accounting.to_dict()
+        self.assertEqual(totals["skipped_messages"], 2)
+        self.assertEqual(totals["evictions"], 1)
+
+    def test_gap_timeout_skip(self):
+        """Test that an expired gap is skipped by the sweep."""
+        self.control_center = ControlCenter(buffer_limits=BufferLimits(gap_timeout=10))
+        self.test_process_launch_message()
+        self.control_center.process_incoming_message(self._speed_message(3, 100))
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+
+        self.control_center.sweep_buffers(now=rocket.gap_started_at + 5)
+        self.assertEqual(rocket.last_message_number, 1)
+
+        self.control_center.sweep_buffers(now=rocket.gap_started_at + 10)
+        self.assertEqual(rocket.last_message_number, 3)
+        self.assertEqual(len(rocket.message_buffer), 0)
+        self.assertEqual(self.control_center.buffer_accounting.to_dict()["gap_timeouts"], 1)
+
+    def test_gap_timeout_degrade(self):
+        """Test that an expired gap marks the rocket as degraded until it closes."""
+        self.control_center = ControlCenter(buffer_limits=BufferLimits(gap_timeout=10, gap_policy=GAP_POLICY_DEGRADE))
+        self.test_process_launch_message()
+        self.control_center.process_incoming_message(self._speed_message(3, 100))
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+
+        self.control_center.sweep_buffers(now=rocket.gap_started_at + 10)
+        self.assertTrue(rocket.degraded)
+        self.assertEqual(rocket.last_message_number, 1)
+        self.assertEqual(self.control_center.buffer_stats()["degraded_rockets"], [self.channel_id])
+
+        self.control_center.process_incoming_message(self._speed_message(2, 100))
+        self.assertFalse(rocket.degraded)
+        self.assertEqual(rocket.last_message_number, 3)
+
+    def test_global_buffer_limit_evicts_largest(self):
+        """Test that the sweep evicts the largest buffers under global memory pressure."""
+        self.control_center = ControlCenter(buffer_limits=BufferLimits(max_total_messages=3))
+        self.test_process_launch_message()
+        self.control_center.process_incoming_message({
+            "metadata": {
+                "channel": "rocket_456",
+                "messageNumber": 1,
+                "messageType": "RocketLaunched",
+                "messageTime": self.test_time
+            },
+            "message": {"launchSpeed": 1000, "type": "Falcon", "mission": "Moon Landing"}
+        })
+        for msg_number in (3, 4, 5):
+            self.control_center.process_incoming_message(self._speed_message(msg_number, 100))
+        self.control_center.process_incoming_message(self._speed_message(3, 100, "rocket_456"))
+
+        self.control_center.sweep_buffers()
+
+        largest = self.control_center.rockets_fleet.get(self.channel_id)
+        smallest = self.control_center.rockets_fleet.get("rocket_456")
+        self.assertEqual(len(largest.message_buffer), 0)
+        self.assertEqual(largest.last_message_number, 5)
+        self.assertEqual(len(smallest.message_buffer), 1)
+
+        stats = self.control_center.buffer_stats()
+        self.assertEqual(stats["totals"]["messages"], 1)
+        self.assertEqual(stats["buffering_rockets"], 1)
+        self.assertEqual(stats["largest_buffers"][0]["id"], "rocket_456")
+
+    def test_process_incoming_message_outcomes(self):
+        """Test the outcome returned for each incoming message."""
+        self.test_process_launch_message()
+
+        self.assertEqual(self.control_center.process_incoming_message(self._speed_message(3, 100)), MESSAGE_BUFFERED)
+        self.assertEqual(self.control_center.process_incoming_message(self._speed_message(3, 100)), MESSAGE_DUPLICATE)
+        self.assertEqual(self.control_center.process_incoming_message(self._speed_message(2, 100)), MESSAGE_ACCEPTED)
+        self.assertEqual(self.control_center.process_incoming_message(self._speed_message(2, 100)), MESSAGE_DUPLICATE)
+        self.assertEqual(
+            self.control_center.process_incoming_message(self._speed_message(2, 100, "nonexistent_rocket")),
+            MESSAGE_PENDING
+        )
+
+    def test_process_incoming_batch(self):
+        """Test processing a batch of out-of-order messages across channels."""
+        launch_message = {
+            "metadata": {
+                "channel": self.channel_id,
+                "messageNumber": 1,
+                "messageType": "RocketLaunched",
+                "messageTime": self.test_time
+            },
+            "message": {
+                "launchSpeed": 1000,
+                "type": "Falcon",
+                "mission": "Moon Landing"
+            }
+        }
+        batch = [
+            self._speed_message(3, 300),
+            self._speed_message(2, 200),
+            launch_message,
+            self._speed_message(2, 200),
+            self._speed_message(1, 100, "nonexistent_rocket"),
+            {"metadata": {}}
+        ]
+
+        outcomes = self.control_center.process_incoming_batch(batch)
+
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+        self.assertEqual(rocket.speed, 1500)
+        self.assertEqual(rocket.last_message_number, 3)
+        self.assertEqual(len(rocket.message_buffer), 0)
+        self.assertEqual(outcomes, {
+            "accepted": 3,
+            "duplicate": 1,
+            "buffered": 0,
+            "pending": 1,
+            "dropped": 0,
+            "invalid": 1
+        })
+
+    def test_mission_queries(self):
+        """Test mission queries follow mission changes and explosions."""
+        self.test_process_launch_message()
+        self.assertEqual(self.control_center.list_missions(), ["Moon Landing"])
+        self.assertEqual(len(self.control_center.get_rockets_by_mission("MOON LANDING")), 1)
+
+        rocket = self.control_center.rockets_fleet.get(self.channel_id)
+        self.control_center._handle_mission_change(rocket, {"newMission": "Mars Landing"}, self.test_time, 2)
+        self.control_center._handle_explosion(rocket, {"reason": "Fuel tank rupture"}, self.test_time, 3)
+
+        self.assertEqual(self.control_center.list_missions(), ["Mars Landing"])
+        self.assertEqual(self.control_center.get_rockets_by_mission("Moon Landing"), [])
+        self.assertEqual(self.control_center.get_rockets_by_mission("mars landing")[0]["id"], self.channel_id)
+        self.assertIsNone(self.control_center.get_mission_stats("Moon Landing"))
+        self.assertEqual(
+            self.control_center.get_mission_stats("Mars Landing"),
+            {"total": 1, "launched": 0, "exploded": 1}
+        )
+
+    def test_query_rockets(self):
+        """Test filtering and sorting rockets, through the index chosen for each query."""
+        for number, (rocket_type, speed) in enumerate((("Falcon-9", 300), ("Falcon-9", 100), ("Atlas", 500),
+                                                        ("falcon-9", 200), ("Falcon-9", 400))):
+            self.control_center.process_incoming_message({
+                "metadata": {"channel": f"rocket_{number}", "messageNumber": 1,
+                             "messageType": "RocketLaunched", "messageTime": f"2025-05-14T10:00:0{number}"},
+                "message": {"launchSpeed": speed, "type": rocket_type, "mission": "ARTEMIS"}
+            })
+        rocket = self.control_center.get_rocket("rocket_4")
+        self.control_center._handle_explosion(rocket, {"reason": "Engine failure"}, "2025-05-14T10:01:00", 2)
+        rocket = self.control_center.get_rocket("rocket_1")
+        self.control_center._handle_speed_increase(rocket, {"by": 250}, "2025-05-14T10:00:30", 2)
+
+        def query(**kwargs) -> list[str]:
+            return [rocket.id for rocket in self.control_center.query_rockets(**kwargs)]
+
+        self.assertEqual(query(), ["rocket_0", "rocket_1", "rocket_2", "rocket_3", "rocket_4"])
+        self.assertEqual(query(rocket_type="FALCON-9", status="launched", sort="speed", descending=True, limit=2),
+                         ["rocket_1", "rocket_0"])
+        self.assertEqual(query(sort="speed", limit=2), ["rocket_3", "rocket_0"])
+        self.assertEqual(query(min_speed=300, max_speed=400, descending=True), ["rocket_4", "rocket_1", "rocket_0"])
+        self.assertEqual(query(status="Exploded"), ["rocket_4"])
+        self.assertEqual(query(sort="last_update_time", descending=True, limit=2), ["rocket_4", "rocket_1"])
+        self.assertEqual(query(rocket_type="Delta"), [])
+        with self.assertRaises(ValueError):
+            query(sort="mission")
+
+    def launch_rockets(self, control_center: ControlCenter, count: int):
+        for number in range(count):
+            control_center.process_incoming_message({
+                "metadata": {"channel": f"rocket_{number}", "messageNumber": 1,
+                             "messageType": "RocketLaunched", "messageTime": f"2025-05-14T10:00:0{number}"},
+                "message": {"launchSpeed": number * 100, "type": "Falcon-9", "mission": "ARTEMIS"}
+            })
+
+    def test_archive_exploded_rockets(self):
+        """Test moving exploded rockets to the cold store, out of the fleet and its queries."""
+        control_center = ControlCenter(archive_policy=ArchivePolicy())
+        self.launch_rockets(control_center, 3)
+        control_center._handle_explosion(control_center.get_rocket("rocket_1"), {"reason": "Engine failure"},
+                                         "2025-05-14T10:01:00", 2)
+        control_center.sweep_buffers()
+
+        self.assertNotIn("rocket_1", control_center.rockets_fleet)
+        self.assertEqual(control_center.get_rocket_by_id("rocket_1")["status"], "Exploded")
+        self.assertEqual([rocket.id for rocket in control_center.rockets_page(10)[0]], ["rocket_0", "rocket_2"])
+        self.assertEqual([rocket.id for rocket in control_center.query_rockets(sort="speed")], ["rocket_0", "rocket_2"])
+        self.assertEqual(control_center.get_mission_stats("artemis"), {"total": 3, "launched": 2, "exploded": 1})
+
+        # Paging through the fleet and the archive together
+        page, cursor = control_center.rockets_page(2, include_archived=True)
+        self.assertEqual([rocket.id for rocket in page], ["rocket_0", "rocket_1"])
+        page, cursor = control_center.rockets_page(2, cursor, "artemis", include_archived=True)
+        self.assertEqual(([rocket.id for rocket in page], cursor), (["rocket_2"], None))
+        self.assertEqual(
+            [rocket.id for rocket in control_center.query_rockets(sort="speed", descending=True, include_archived=True)],
+            ["rocket_2", "rocket_1", "rocket_0"]
+        )
+
+    def test_archived_rocket_moves_back(self):
+        """Test that a message for an archived rocket moves it back to the fleet."""
+        control_center = ControlCenter(archive_policy=ArchivePolicy())
+        self.launch_rockets(control_center, 2)
+        control_center._handle_explosion(control_center.get_rocket("rocket_0"), {"reason": "Engine failure"},
+                                         "2025-05-14T10:01:00", 2)
+        self.assertEqual(control_center.archive_rockets(), 1)
+
+        outcome = control_center.process_incoming_message({
+            "metadata": {"channel": "rocket_0", "messageNumber": 3,
+                         "messageType": "RocketMissionChanged", "messageTime": "2025-05-14T10:02:00"},
+            "message": {"newMission": "APOLLO"}
+        })
+        self.assertEqual(outcome, MESSAGE_ACCEPTED)
+        self.assertEqual(control_center.rockets_fleet.get("rocket_0").mission, "APOLLO")
+        self.assertEqual(len(control_center.cold_store), 0)
+        self.assertEqual(control_center.get_mission_stats("apollo"), {"total": 1, "launched": 0, "exploded": 1})
+        self.assertEqual([rocket.id for rocket in control_center.rockets_of_mission("apollo")], ["rocket_0"])
+
+    def test_archive_idle_rockets(self):
+        """Test archiving the rockets unchanged for the idle time."""
+        control_center = ControlCenter(archive_policy=ArchivePolicy(exploded=False, idle_after=60))
+        self.launch_rockets(control_center, 2)
+        self.assertEqual(control_center.archive_rockets(now=0), 0)
+        control_center._handle_speed_increase(control_center.get_rocket("rocket_1"), {"by": 10},
+                                              "2025-05-14T10:01:00", 2)
+        self.assertEqual(control_center.archive_rockets(now=30), 0)
+        # Only the rocket unchanged since the first pass
+        self.assertEqual(control_center.archive_rockets(now=60), 1)
+        self.assertEqual(list(control_center.rockets_fleet), ["rocket_1"])
+        self.assertEqual(control_center.archive_rockets(now=90), 1)
+
+    def test_snapshot_keeps_archived_rockets(self):
+        """Test restoring archived rockets from a snapshot, into the archive or the fleet."""
+        control_center = ControlCenter(archive_policy=ArchivePolicy())
+        self.launch_rockets(control_center, 2)
+        control_center._handle_explosion(control_center.get_rocket("rocket_0"), {"reason": "Engine failure"},
+                                         "2025-05-14T10:01:00", 2)
+        control_center.archive_rockets()
+        records = list(control_center.snapshot_records())
+
+        restored = ControlCenter(archive_policy=ArchivePolicy())
+        restored.restore_snapshot(records)
+        self.assertEqual(list(restored.rockets_fleet), ["rocket_1"])
+        self.assertEqual(restored.get_rocket("rocket_0").explosion_reason, "Engine failure")
+        self.assertEqual(restored.get_mission_stats("artemis"), {"total": 2, "launched": 1, "exploded": 1})
+
+        unarchived = ControlCenter()
+        unarchived.restore_snapshot(records)
+        self.assertEqual(sorted(unarchived.rockets_fleet), ["rocket_0", "rocket_1"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
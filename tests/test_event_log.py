@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from event_log import EventLog, read_latest_snapshot, write_snapshot
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_append_and_read(self):
+        """Test that events are read back in order, after a sequence number."""
+        event_log = EventLog(self.directory.name, sync_interval=0)
+        for number in range(1, 4):
+            self.assertEqual(event_log.append(["m", "rocket_1", number]), number)
+        event_log.close()
+
+        reopened = EventLog(self.directory.name, sync_interval=0)
+        self.assertEqual(reopened.last_sequence, 3)
+        self.assertEqual(list(reopened.read(after=1)), [(2, ["m", "rocket_1", 2]), (3, ["m", "rocket_1", 3])])
+        reopened.close()
+
+    def test_torn_tail_discarded(self):
+        """Test that a torn event at the end of the log is discarded on open."""
+        event_log = EventLog(self.directory.name, sync_interval=0)
+        event_log.append(["m", "rocket_1", 1])
+        event_log.append(["m", "rocket_1", 2])
+        event_log.close()
+        segment = os.path.join(self.directory.name, os.listdir(self.directory.name)[0])
+        with open(segment, "r+b") as file:
+            file.truncate(os.path.getsize(segment) - 3)
+
+        reopened = EventLog(self.directory.name, sync_interval=0)
+        self.assertEqual(reopened.last_sequence, 1)
+        self.assertEqual(reopened.append(["m", "rocket_1", 2]), 2)
+        self.assertEqual([sequence for sequence, _ in reopened.read()], [1, 2])
+        reopened.close()
+
+    def test_rotate_and_remove_segments(self):
+        """Test that the segments covered by a sequence number are removed."""
+        event_log = EventLog(self.directory.name, sync_interval=0)
+        event_log.append(["m", "rocket_1", 1])
+        self.assertEqual(event_log.rotate(), 1)
+        event_log.append(["m", "rocket_1", 2])
+        event_log.remove_segments(1)
+
+        self.assertEqual(event_log.stats()["segments"], 1)
+        self.assertEqual(list(event_log.read()), [(2, ["m", "rocket_1", 2])])
+        event_log.close()
+
+    def test_snapshot(self):
+        """Test that the latest snapshot is read back, and previous ones are removed."""
+        write_snapshot(self.directory.name, 5, [["r", "rocket_1"]])
+        write_snapshot(self.directory.name, 9, [["r", "rocket_1"], ["r", "rocket_2"]])
+
+        self.assertEqual(read_latest_snapshot(self.directory.name), (9, [["r", "rocket_1"], ["r", "rocket_2"]]))
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test_no_snapshot(self):
+        """Test that a missing snapshot reads as an empty fleet."""
+        self.assertEqual(read_latest_snapshot(self.directory.name), (0, []))
+
+if __name__ == '__main__':
+    unittest.main()
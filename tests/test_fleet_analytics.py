@@ -0,0 +1,86 @@
+import unittest
+from control_center import ControlCenter
+from fleet_analytics import FleetAnalytics, FleetColumns, numpy
+
+def launch_message(channel: str, speed: int | None, rocket_type: str, mission: str) -> dict:
+    return {
+        "metadata": {
+            "channel": channel,
+            "messageNumber": 1,
+            "messageType": "RocketLaunched",
+            "messageTime": "2025-05-14T10:00:00"
+        },
+        "message": {"launchSpeed": speed, "type": rocket_type, "mission": mission}
+    }
+
+def explosion_message(channel: str, reason: str) -> dict:
+    return {
+        "metadata": {
+            "channel": channel,
+            "messageNumber": 2,
+            "messageType": "RocketExploded",
+            "messageTime": "2025-05-14T10:00:01"
+        },
+        "message": {"reason": reason}
+    }
+
+@unittest.skipUnless(numpy, "NumPy is not installed")
+class TestFleetColumns(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.control_center = ControlCenter()
+        self.control_center.process_incoming_batch([
+            launch_message("rocket_1", 1000, "Falcon", "ARTEMIS"),
+            launch_message("rocket_2", 3000, "Falcon", "ARTEMIS"),
+            launch_message("rocket_3", 2000, "Saturn", "APOLLO"),
+            launch_message("rocket_4", None, "Saturn", "APOLLO"),
+            explosion_message("rocket_2", "PRESSURE_VESSEL_FAILURE"),
+            explosion_message("rocket_3", "PRESSURE_VESSEL_FAILURE")
+        ])
+
+    def test_stats(self):
+        """Test the fleet-wide statistics, rockets without speed are counted but not averaged."""
+        columns = self.control_center.fleet_columns()
+        self.assertEqual(columns.fleet_version, self.control_center.fleet_version)
+
+        stats = columns.stats()
+        self.assertEqual((stats["rockets"], stats["exploded"], stats["exploded_ratio"]), (4, 2, 0.5))
+        self.assertEqual(stats["speed"]["mean"], 2000)
+        self.assertEqual(stats["speed"]["percentiles"]["p50"], 2000)
+        self.assertEqual(stats["missions"]["APOLLO"], {"rockets": 2, "exploded": 1, "mean_speed": 2000})
+        self.assertEqual(stats["rocket_types"]["Falcon"], {"rockets": 2, "exploded": 1, "mean_speed": 2000})
+        self.assertEqual(stats["explosion_reasons"], {"PRESSURE_VESSEL_FAILURE": 2})
+
+    def test_empty_fleet(self):
+        """Test the statistics of a fleet without rockets."""
+        stats = ControlCenter().fleet_columns().stats()
+        self.assertEqual(stats["rockets"], 0)
+        self.assertIsNone(stats["exploded_ratio"])
+        self.assertIsNone(stats["speed"]["percentiles"]["p99"])
+
+    def test_concatenate(self):
+        """Test that the categories of partitions are merged by value."""
+        other = ControlCenter()
+        other.process_incoming_batch([
+            launch_message("rocket_5", 4000, "Atlas", "APOLLO"),
+            explosion_message("rocket_5", "ENGINE_FAILURE")
+        ])
+
+        stats = FleetColumns.concatenate([self.control_center.fleet_columns(), other.fleet_columns()]).stats()
+        self.assertEqual(stats["rockets"], 5)
+        self.assertEqual(stats["missions"]["APOLLO"], {"rockets": 3, "exploded": 2, "mean_speed": 3000})
+        self.assertEqual(stats["explosion_reasons"], {"PRESSURE_VESSEL_FAILURE": 2, "ENGINE_FAILURE": 1})
+
+    def test_analytics_refresh(self):
+        """Test that the statistics of the latest snapshot are served until the next refresh."""
+        analytics = FleetAnalytics(self.control_center.fleet_columns)
+        self.assertEqual(analytics.stats()["rockets"], 4)
+
+        self.control_center.process_incoming_message(launch_message("rocket_5", 4000, "Atlas", "APOLLO"))
+        self.assertEqual(analytics.stats()["rockets"], 4)
+        stats = analytics.refresh()
+        self.assertEqual(stats["rockets"], 5)
+        self.assertEqual(stats["snapshot"]["fleet_version"], self.control_center.fleet_version)
+
+if __name__ == '__main__':
+    unittest.main()
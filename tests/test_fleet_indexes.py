@@ -0,0 +1,196 @@
+import unittest
+from fleet_indexes import LaunchTimeIndex, MissionIndex, SpeedIndex, StatusTypeIndex, decode_cursor, encode_cursor
+from rocket_history import parse_time
+
+class TestLaunchTimeIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.index = LaunchTimeIndex()
+        for rocket_id, launch_time in (("rocket_c", "10:00:03"), ("rocket_a", "10:00:01"), ("rocket_b", "10:00:02")):
+            self.index.add(parse_time(f"2025-05-14T{launch_time}"), rocket_id)
+
+    def test_keys_in_launch_order(self):
+        """Test that keys are returned ordered by launch time."""
+        self.assertEqual([rocket_id for _, rocket_id in self.index.keys()], ["rocket_a", "rocket_b", "rocket_c"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_keys_after_and_limit(self):
+        """Test reading a range of keys."""
+        first_key = self.index.keys(limit=1)[0]
+        self.assertEqual(first_key[1], "rocket_a")
+        self.assertEqual([rocket_id for _, rocket_id in self.index.keys(after=first_key, limit=1)], ["rocket_b"])
+
+    def test_keys_descending(self):
+        """Test reading keys from the latest launch."""
+        keys = self.index.keys(limit=2, descending=True)
+        self.assertEqual([rocket_id for _, rocket_id in keys], ["rocket_c", "rocket_b"])
+        self.assertEqual([rocket_id for _, rocket_id in self.index.keys(after=keys[-1], descending=True)], ["rocket_a"])
+
+    def test_clear(self):
+        """Test removing all keys."""
+        self.index.clear()
+        self.assertEqual(self.index.keys(), [])
+
+    def test_remove(self):
+        """Test removing rockets, a few at a time or all at once."""
+        self.index.remove([(parse_time("2025-05-14T10:00:02"), "rocket_b"), self.index.keys()[0]])
+        self.assertEqual([rocket_id for _, rocket_id in self.index.keys()], ["rocket_c"])
+        self.index.remove([(parse_time("2025-05-14T10:00:03"), "rocket_c")])
+        self.assertEqual(self.index.keys(), [])
+
+    def test_cursor_round_trip(self):
+        """Test encoding and decoding pagination cursors."""
+        key = (parse_time("2022-02-02T19:39:05.86337+01:00"), "rocket|a")
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+    def test_invalid_cursor(self):
+        """Test decoding a malformed cursor."""
+        with self.assertRaises(ValueError):
+            decode_cursor("invalid")
+
+class TestSpeedIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Small chunks, so that the keys span several chunks
+        self.index = SpeedIndex(chunk_size=2)
+        self.speeds = {f"rocket_{number:02}": number * 10 % 70 for number in range(20)}
+        for rocket_id, speed in self.speeds.items():
+            self.index.add(speed, rocket_id)
+
+    def expected_keys(self, low: float | None = None, high: float | None = None) -> list[tuple[float, str]]:
+        return sorted(
+            (speed, rocket_id) for rocket_id, speed in self.speeds.items()
+            if (low is None or speed >= low) and (high is None or speed <= high)
+        )
+
+    def test_keys_in_speed_order(self):
+        """Test that keys are ordered by speed, then by ID."""
+        self.assertEqual(self.index.keys(), self.expected_keys())
+        self.assertEqual(self.index.keys(descending=True), self.expected_keys()[::-1])
+        self.assertEqual(len(self.index), 20)
+
+    def test_range_count_and_limit(self):
+        """Test reading and counting the keys of a speed range."""
+        self.assertEqual(self.index.keys(20, 40), self.expected_keys(20, 40))
+        self.assertEqual(self.index.count(20, 40), 9)
+        self.assertEqual(self.index.count(high=0), 3)
+        self.assertEqual(self.index.count(100), 0)
+        self.assertEqual(self.index.keys(20, 40, limit=4, descending=True), self.expected_keys(20, 40)[::-1][:4])
+
+    def test_keys_after(self):
+        """Test reading the keys following a key, in both orders."""
+        keys = self.expected_keys()
+        self.assertEqual(self.index.keys(after=keys[4], limit=3), keys[5:8])
+        self.assertEqual(self.index.keys(after=keys[4], descending=True), keys[:4][::-1])
+
+    def test_move(self):
+        """Test moving rockets, recorded until the index is read."""
+        self.index.move(self.speeds["rocket_03"], 100, "rocket_03")
+        self.index.move(100, 5, "rocket_03")
+        self.index.move(self.speeds["rocket_04"], None, "rocket_04")
+        self.index.add("fast", "rocket_20")
+        self.speeds["rocket_03"] = 5
+        del self.speeds["rocket_04"]
+        self.assertEqual(self.index.keys(), self.expected_keys())
+        self.assertEqual(len(self.index), 19)
+
+    def test_rebuild(self):
+        """Test applying the changes of most rockets at once."""
+        for rocket_id, speed in list(self.speeds.items()):
+            self.index.move(speed, speed + 1, rocket_id)
+            self.speeds[rocket_id] = speed + 1
+        self.assertEqual(self.index.keys(), self.expected_keys())
+        self.assertEqual(self.index.count(21, 41), 9)
+
+    def test_clear(self):
+        """Test removing all keys."""
+        self.index.clear()
+        self.assertEqual(self.index.keys(), [])
+        self.assertEqual(self.index.count(), 0)
+
+class TestStatusTypeIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.index = StatusTypeIndex()
+        self.index.add("Launched", "Falcon-9", "rocket_a")
+        self.index.add("Launched", "falcon-9", "rocket_b")
+        self.index.add("Launched", "Atlas", "rocket_c")
+
+    def test_case_insensitive_groups(self):
+        """Test selecting rockets by status, type or both."""
+        self.assertEqual(sorted(self.index.ids(rocket_type="FALCON-9")), ["rocket_a", "rocket_b"])
+        self.assertEqual(self.index.count(status="launched"), 3)
+        self.assertEqual(self.index.count("Launched", "Atlas"), 1)
+        self.assertEqual(self.index.ids("Exploded"), [])
+
+    def test_move(self):
+        """Test moving a rocket to another status."""
+        self.index.move("Launched", "Exploded", "Falcon-9", "rocket_a")
+        self.assertEqual(self.index.ids("exploded", "falcon-9"), ["rocket_a"])
+        self.assertEqual(self.index.ids("launched", "falcon-9"), ["rocket_b"])
+        self.assertEqual(self.index.count(), 3)
+
+    def test_remove(self):
+        """Test removing a rocket."""
+        self.index.remove("launched", "ATLAS", "rocket_c")
+        self.assertEqual(self.index.ids(rocket_type="atlas"), [])
+        self.assertEqual(self.index.count(), 2)
+
+class TestMissionIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.index = MissionIndex()
+        self.first_key = (parse_time("2025-05-14T10:00:01"), "rocket_a")
+        self.second_key = (parse_time("2025-05-14T10:00:02"), "rocket_b")
+        self.index.add("ARTEMIS", self.second_key, "Launched")
+        self.index.add("artemis", self.first_key, "Launched")
+
+    def test_case_insensitive_keys(self):
+        """Test that rockets are grouped by case-insensitive mission, in launch time order."""
+        self.assertEqual(self.index.keys("Artemis"), [self.first_key, self.second_key])
+        self.assertEqual(self.index.missions(), ["ARTEMIS", "artemis"])
+        self.assertEqual(self.index.counts("ARTEMIS"), {"total": 2, "launched": 2, "exploded": 0})
+
+    def test_keys_after_and_limit(self):
+        """Test reading a range of the keys of a mission."""
+        self.assertEqual(self.index.keys("artemis", limit=1), [self.first_key])
+        self.assertEqual(self.index.keys("artemis", after=self.first_key), [self.second_key])
+        self.assertEqual(self.index.keys("apollo", after=self.first_key, limit=1), [])
+
+    def test_move(self):
+        """Test moving a rocket to another mission."""
+        self.index.move("artemis", "APOLLO", self.first_key, "Launched")
+        self.assertEqual(self.index.keys("apollo"), [self.first_key])
+        self.assertEqual(self.index.keys("artemis"), [self.second_key])
+        self.assertEqual(self.index.missions(), ["APOLLO", "ARTEMIS"])
+
+        self.index.move("ARTEMIS", "APOLLO", self.second_key, "Launched")
+        self.assertEqual(self.index.keys("artemis"), [])
+        self.assertIsNone(self.index.counts("artemis"))
+        self.assertEqual(self.index.missions(), ["APOLLO"])
+
+    def test_move_missing_key(self):
+        """Test that moving a rocket missing from the keys of its mission leaves the other rockets."""
+        missing_key = (parse_time("2025-05-14T10:00:00"), "rocket_0")
+        self.index.move("artemis", "APOLLO", missing_key, "Launched")
+        self.assertEqual(self.index.keys("artemis"), [self.first_key, self.second_key])
+        self.assertEqual(self.index.keys("apollo"), [missing_key])
+
+    def test_archive(self):
+        """Test that archived rockets leave the keys of their mission but are still counted."""
+        self.index.archive("artemis", [self.first_key, self.second_key])
+        self.assertEqual(self.index.keys("artemis"), [])
+        self.assertEqual(self.index.counts("artemis"), {"total": 2, "launched": 2, "exploded": 0})
+
+        self.index.unarchive("ARTEMIS", self.second_key)
+        self.index.move("ARTEMIS", "APOLLO", self.second_key, "Launched")
+        self.assertEqual(self.index.counts("artemis"), {"total": 1, "launched": 1, "exploded": 0})
+        self.assertEqual(self.index.missions(), ["APOLLO", "artemis"])
+
+    def test_update_status(self):
+        """Test counting an explosion."""
+        self.index.update_status("artemis", "Launched", "Exploded")
+        self.assertEqual(self.index.counts("artemis"), {"total": 2, "launched": 1, "exploded": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from control_center import ControlCenter
+from fleet_journal import FleetJournal
+
+class TestFleetJournal(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.test_time = "2025-05-14T10:00:00"
+
+    def _message(self, channel_id: str, msg_number: int) -> dict:
+        """Builds a launch message for the first message number, a speed increase otherwise."""
+        if msg_number == 1:
+            return {
+                "metadata": {
+                    "channel": channel_id,
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": self.test_time
+                },
+                "message": {"type": "Falcon-9", "launchSpeed": 500, "mission": "ARTEMIS"}
+            }
+        return {
+            "metadata": {
+                "channel": channel_id,
+                "messageNumber": msg_number,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+
+    def _journaled_control_center(self) -> tuple[ControlCenter, FleetJournal]:
+        """Builds a control center recovered from the journal directory."""
+        control_center = ControlCenter()
+        journal = FleetJournal(control_center, self.directory.name, sync_interval=0)
+        journal.recover()
+        return (control_center, journal)
+
+    def test_recover_from_log(self):
+        """Test that the fleet, its reorder buffers and pending messages are rebuilt from the log alone."""
+        control_center, journal = self._journaled_control_center()
+        for channel_id, msg_number in (("rocket_1", 1), ("rocket_1", 2), ("rocket_1", 4), ("rocket_2", 3)):
+            control_center.process_incoming_message(self._message(channel_id, msg_number))
+        journal.close(snapshot=False)
+
+        recovered, journal = self._journaled_control_center()
+        rocket = recovered.get_rocket("rocket_1")
+        self.assertEqual(rocket.speed, 600)
+        self.assertEqual(len(rocket.message_buffer), 1)
+        self.assertEqual(recovered.pending_store.stats()["messages"], 1)
+
+        # The gap and the launch arrive after the restart
+        recovered.process_incoming_message(self._message("rocket_1", 3))
+        recovered.process_incoming_message(self._message("rocket_2", 1))
+        self.assertEqual(rocket.speed, 800)
+        self.assertEqual(len(recovered.get_rocket("rocket_2").message_buffer), 1)
+        journal.close()
+
+    def test_recover_from_snapshot_and_tail(self):
+        """Test that only the events following the snapshot are replayed."""
+        control_center, journal = self._journaled_control_center()
+        for msg_number in (1, 2, 4):
+            control_center.process_incoming_message(self._message("rocket_1", msg_number))
+        control_center.get_rocket("rocket_1").explode("Engine failure", self.test_time, 2)
+        sequence = journal.snapshot()
+        control_center.process_incoming_message(self._message("rocket_1", 3))
+        journal.close(snapshot=False)
+
+        recovered, journal = self._journaled_control_center()
+        rocket = recovered.get_rocket("rocket_1")
+        self.assertEqual(journal.stats()["last_snapshot_sequence"], sequence)
+        self.assertEqual(rocket.status, "Exploded")
+        self.assertEqual(rocket.last_message_number, 4)
+        self.assertEqual(rocket.speed, 800)
+        self.assertEqual(recovered.get_mission_stats("ARTEMIS")["exploded"], 1)
+        journal.close()
+
+    def test_replay_is_idempotent(self):
+        """Test that events already reflected in the snapshot have no effect when replayed."""
+        control_center, journal = self._journaled_control_center()
+        for msg_number in (1, 2, 3):
+            control_center.process_incoming_message(self._message("rocket_1", msg_number))
+        journal.snapshot()
+        for _, event in journal.event_log.read():
+            control_center.replay_event(event)
+        self.assertEqual(control_center.get_rocket("rocket_1").speed, 700)
+        journal.close()
+
+    def test_skip_replayed(self):
+        """Test that a skipped gap is skipped again on recovery."""
+        control_center, journal = self._journaled_control_center()
+        for msg_number in (1, 3):
+            control_center.process_incoming_message(self._message("rocket_1", msg_number))
+        control_center._skip_gap(control_center.get_rocket("rocket_1"))
+        journal.close(snapshot=False)
+
+        recovered, journal = self._journaled_control_center()
+        rocket = recovered.get_rocket("rocket_1")
+        self.assertEqual(rocket.last_message_number, 3)
+        self.assertEqual(rocket.speed, 600)
+        self.assertEqual(len(rocket.message_buffer), 0)
+        journal.close()
+
+if __name__ == '__main__':
+    unittest.main()
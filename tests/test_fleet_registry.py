@@ -0,0 +1,86 @@
+import threading
+import unittest
+from fleet_registry import FleetRegistry
+from rocket import Rocket
+
+class TestFleetRegistry(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.registry = FleetRegistry(shard_count=4)
+
+    def _create_rocket(self, rocket_id: str) -> Rocket:
+        """Builds a rocket for the given ID."""
+        return Rocket(
+            id=rocket_id,
+            launch_time="2025-05-14T10:00:00",
+            last_update_time="2025-05-14T10:00:00",
+            last_message_number=1,
+            speed=1000,
+            rocket_type="Falcon",
+            mission="Moon Landing"
+        )
+
+    def test_get_or_create(self):
+        """Test that a rocket is only created once per channel."""
+        rocket, created = self.registry.get_or_create("rocket_1", lambda: self._create_rocket("rocket_1"))
+        self.assertTrue(created)
+
+        same_rocket, created = self.registry.get_or_create("rocket_1", lambda: self._create_rocket("rocket_1"))
+        self.assertFalse(created)
+        self.assertIs(same_rocket, rocket)
+        self.assertIs(self.registry.get("rocket_1"), rocket)
+        self.assertIs(self.registry["rocket_1"], rocket)
+
+    def test_remove(self):
+        """Test that a rocket is only removed while its channel maps to it."""
+        rocket, _ = self.registry.get_or_create("rocket_1", lambda: self._create_rocket("rocket_1"))
+        self.assertFalse(self.registry.remove(self._create_rocket("rocket_1")))
+        self.assertTrue(self.registry.remove(rocket))
+        self.assertNotIn("rocket_1", self.registry)
+        self.assertFalse(self.registry.remove(rocket))
+
+    def test_missing_rocket(self):
+        """Test lookups of a channel without rocket."""
+        self.assertIsNone(self.registry.get("nonexistent"))
+        self.assertNotIn("nonexistent", self.registry)
+        with self.assertRaises(KeyError):
+            self.registry["nonexistent"]
+
+    def test_fleet_wide_reads(self):
+        """Test that fleet-wide reads see the rockets of every shard."""
+        rocket_ids = {f"rocket_{i}" for i in range(20)}
+        for rocket_id in rocket_ids:
+            self.registry.get_or_create(rocket_id, lambda rocket_id=rocket_id: self._create_rocket(rocket_id))
+
+        self.assertEqual(len(self.registry), 20)
+        self.assertEqual(set(self.registry), rocket_ids)
+        self.assertEqual({rocket.id for rocket in self.registry.values()}, rocket_ids)
+
+        self.registry.clear()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_concurrent_creation(self):
+        """Test that concurrent creations of the same channel yield a single rocket."""
+        created_rockets = []
+
+        def create():
+            rocket, created = self.registry.get_or_create("rocket_1", lambda: self._create_rocket("rocket_1"))
+            if created:
+                created_rockets.append(rocket)
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(created_rockets), 1)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_invalid_shard_count(self):
+        """Test that a registry needs at least one shard."""
+        with self.assertRaises(ValueError):
+            FleetRegistry(shard_count=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from cold_store import record_row
+from control_center import ControlCenter
+from fleet_indexes import mission_key
+from fleet_storage import SQLiteFleetRegistry, StorageOptions
+from rocket import Rocket
+
+class TestSQLiteFleetRegistry(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "fleet.db")
+        self.test_time = "2025-05-14T10:00:00"
+
+    def _message(self, channel_id: str, msg_number: int, mission: str = "ARTEMIS") -> dict:
+        """Builds a launch message for the first message number, a speed increase otherwise."""
+        if msg_number == 1:
+            return {
+                "metadata": {
+                    "channel": channel_id,
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": self.test_time
+                },
+                "message": {"type": "Falcon-9", "launchSpeed": 500, "mission": mission}
+            }
+        return {
+            "metadata": {
+                "channel": channel_id,
+                "messageNumber": msg_number,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+
+    def _stored_control_center(self) -> ControlCenter:
+        """Builds a control center loaded from the database."""
+        # Flushed only when asked to, or when closed
+        control_center = ControlCenter(storage=StorageOptions(self.path, flush_interval=3600))
+        control_center.load_stored_fleet()
+        self.addCleanup(control_center.close)
+        return control_center
+
+    def _stored_ids(self) -> list[str]:
+        with sqlite3.connect(self.path) as connection:
+            return [rocket_id for rocket_id, in connection.execute("SELECT id FROM rockets ORDER BY id")]
+
+    def test_fleet_outlives_the_process(self):
+        """Test loading the rockets, their buffered messages and indexes, as they were when closed."""
+        control_center = self._stored_control_center()
+        control_center.process_incoming_batch([
+            self._message("rocket_a", 1, "APOLLO"), self._message("rocket_a", 2),
+            self._message("rocket_b", 1), self._message("rocket_b", 4)
+        ])
+        control_center.close()
+
+        loaded = self._stored_control_center()
+        self.assertEqual(loaded.get_rocket("rocket_a").speed, 600)
+        self.assertEqual([rocket.id for rocket in loaded.rockets_page(10)[0]], ["rocket_a", "rocket_b"])
+        self.assertEqual(loaded.get_mission_stats("apollo"), {"total": 1, "launched": 1, "exploded": 0})
+        self.assertEqual(loaded.buffer_accounting.messages, 1)
+
+        # The buffered message is applied once the gap is filled
+        loaded.process_incoming_batch([self._message("rocket_b", 2), self._message("rocket_b", 3)])
+        self.assertEqual(loaded.get_rocket("rocket_b").speed, 800)
+        self.assertEqual(loaded.buffer_accounting.messages, 0)
+
+    def test_indexed_by_launch_time_and_mission(self):
+        """Test that the stored rockets can be read by launch time and by mission through indexes."""
+        control_center = self._stored_control_center()
+        control_center.process_incoming_batch([self._message("rocket_a", 1, "APOLLO"), self._message("rocket_b", 1)])
+        control_center.rockets_fleet.flush()
+
+        with sqlite3.connect(self.path) as connection:
+            indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            # Missions are stored by their key, like in the mission index
+            query = "SELECT id FROM rockets WHERE mission = ? ORDER BY launch_us, id"
+            plan = connection.execute(f"EXPLAIN QUERY PLAN {query}", (mission_key("apollo"),)).fetchall()
+            missions = connection.execute(query, (mission_key("apollo"),)).fetchall()
+        self.assertLessEqual({"rockets_launch", "rockets_mission"}, indexes)
+        self.assertIn("rockets_mission", str(plan))
+        self.assertEqual(missions, [("rocket_a",)])
+
+    def test_flush_writes_changed_rockets_once(self):
+        """Test that a rocket changed many times between two flushes is written once."""
+        control_center = self._stored_control_center()
+        control_center.process_incoming_batch([self._message("rocket_a", number) for number in range(1, 11)])
+        self.assertEqual(self._stored_ids(), [])
+        self.assertEqual(control_center.rockets_fleet.stats()["pending"], 1)
+
+        self.assertEqual(control_center.rockets_fleet.flush(), 1)
+        self.assertEqual(self._stored_ids(), ["rocket_a"])
+        self.assertEqual(control_center.rockets_fleet.flush(), 0)
+
+    def test_flush_in_batches(self):
+        """Test writing the changed rockets a batch per transaction."""
+        registry = SQLiteFleetRegistry(self.path, batch_size=2, flush_interval=3600)
+        registry.load()
+        self.addCleanup(registry.close)
+        for rocket_id in ("rocket_a", "rocket_b", "rocket_c"):
+            registry.get_or_create(rocket_id, lambda rocket_id=rocket_id: Rocket(
+                rocket_id, self.test_time, self.test_time, 1, 500, "Falcon-9", "ARTEMIS"
+            ))
+        self.assertEqual(registry.flush(), 3)
+        self.assertEqual(registry.stats(), {"pending": 0, "transactions": 2, "written": 3})
+        self.assertEqual(self._stored_ids(), ["rocket_a", "rocket_b", "rocket_c"])
+
+    def test_failed_flush_keeps_changes(self):
+        """Test that the batches of a failed flush are written by the next one, unless changed since."""
+        registry = SQLiteFleetRegistry(self.path, batch_size=2, flush_interval=3600)
+        registry.load()
+        self.addCleanup(registry.close)
+        for rocket_id in ("rocket_a", "rocket_b", "rocket_c"):
+            registry.get_or_create(rocket_id, lambda rocket_id=rocket_id: Rocket(
+                rocket_id, self.test_time, self.test_time, 1, 500, "Falcon-9", "ARTEMIS"
+            ))
+        changed = Rocket("rocket_c", self.test_time, self.test_time, 2, 900, "Falcon-9", "ARTEMIS")
+
+        def failing_row(record: list) -> tuple:
+            if record[0] == "rocket_c":
+                registry.save(changed) # Saved again while its batch is written
+                raise sqlite3.OperationalError("disk I/O error")
+            return record_row(record)
+
+        with mock.patch("fleet_storage.record_row", side_effect=failing_row):
+            with self.assertRaises(sqlite3.OperationalError):
+                registry.flush()
+        self.assertEqual(self._stored_ids(), ["rocket_a", "rocket_b"])
+        self.assertEqual(registry.stats(), {"pending": 1, "transactions": 1, "written": 2})
+
+        self.assertEqual(registry.flush(), 1)
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(connection.execute("SELECT speed FROM rockets WHERE id = 'rocket_c'").fetchone()[0], 900)
+
+    def test_partition_count_mismatch(self):
+        """Test refusing to load a partition stored with another number of partitions."""
+        registry = StorageOptions(self.path, partition_count=2).open()
+        registry.load()
+        registry.get_or_create("rocket_a", lambda: Rocket(
+            "rocket_a", self.test_time, self.test_time, 1, 500, "Falcon-9", "ARTEMIS"
+        ))
+        registry.close()
+
+        StorageOptions(self.path, partition_count=2).check_partition_count()
+        for partition_count in (None, 3):
+            with self.assertRaises(ValueError):
+                StorageOptions(self.path, partition_count=partition_count).check_partition_count()
+            with self.assertRaises(ValueError):
+                StorageOptions(self.path, partition_count=partition_count).open().load()
+
+    def test_remove_and_clear(self):
+        """Test removing rockets from the database with the registry."""
+        control_center = self._stored_control_center()
+        control_center.process_incoming_batch([self._message("rocket_a", 1), self._message("rocket_b", 1)])
+        control_center.rockets_fleet.flush()
+        control_center.rockets_fleet.remove(control_center.get_rocket("rocket_a"))
+        control_center.rockets_fleet.flush()
+        self.assertEqual(self._stored_ids(), ["rocket_b"])
+
+        control_center.clear_fleet()
+        self.assertEqual(self._stored_ids(), [])
+
+    def test_wal_mode(self):
+        """Test that the database can be read while it is written."""
+        self._stored_control_center()
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+class TestStorageOptions(unittest.TestCase):
+    def test_from_env(self):
+        """Test that the fleet is kept in memory unless the sqlite backend is selected."""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(StorageOptions.from_env())
+        with mock.patch.dict(os.environ, {"LUNAR_STORAGE": "sqlite", "LUNAR_STORAGE_BATCH_SIZE": "10"}):
+            self.assertEqual(StorageOptions.from_env().batch_size, 10)
+        with mock.patch.dict(os.environ, {"LUNAR_STORAGE": "postgres"}):
+            with self.assertRaises(ValueError):
+                StorageOptions.from_env()
+
+    def test_for_partition(self):
+        """Test that each partition is stored in its own database."""
+        options = StorageOptions("fleet.db").for_partition(2, 4)
+        self.assertEqual((options.path, options.partition_count), ("fleet.db.2", 4))
+
+    def test_invalid_batch_size(self):
+        """Test rejecting an empty batch."""
+        with self.assertRaises(ValueError):
+            StorageOptions(batch_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
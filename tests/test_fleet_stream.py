@@ -0,0 +1,92 @@
+import threading
+import unittest
+from control_center import ControlCenter
+from fleet_stream import FleetStream
+
+class TestFleetStream(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.control_center = ControlCenter()
+        self.stream = FleetStream(coalesce_window=0.0)
+        self.control_center.fleet_stream = self.stream
+
+    def _message(self, channel_id: str, msg_number: int, msg_type: str, payload: dict) -> dict:
+        return {
+            "metadata": {
+                "channel": channel_id,
+                "messageNumber": msg_number,
+                "messageTime": f"2024-03-20T10:00:{msg_number:02d}Z",
+                "messageType": msg_type
+            },
+            "message": payload
+        }
+
+    def _launch(self, channel_id: str, mission: str = "ARTEMIS"):
+        self.control_center.process_incoming_message(
+            self._message(channel_id, 1, "RocketLaunched", {"type": "Falcon-9", "launchSpeed": 500, "mission": mission})
+        )
+
+    def test_changes_are_coalesced(self):
+        """Test that the changes of a rocket are delivered once, with its latest state."""
+        subscription = self.stream.subscribe()
+        self._launch("rocket_1")
+        for msg_number in range(2, 5):
+            self.control_center.process_incoming_message(
+                self._message("rocket_1", msg_number, "RocketSpeedIncreased", {"by": 100})
+            )
+
+        rockets, resync = subscription.next_changes(0)
+        self.assertEqual([rocket.id for rocket in rockets], ["rocket_1"])
+        self.assertEqual(rockets[0].speed, 800)
+        self.assertFalse(resync)
+        self.assertEqual(subscription.coalesced, 3)
+        self.assertEqual(subscription.next_changes(0), ([], False))
+
+    def test_filters(self):
+        """Test that subscribers only receive the changes of their rockets or mission, a rocket leaving it included."""
+        by_id = self.stream.subscribe(rocket_ids=frozenset(["rocket_2"]))
+        by_mission = self.stream.subscribe(mission="artemis")
+        self._launch("rocket_1")
+        self._launch("rocket_2", mission="APOLLO")
+
+        self.assertEqual([rocket.id for rocket in by_id.next_changes(0)[0]], ["rocket_2"])
+        self.assertEqual([rocket.id for rocket in by_mission.next_changes(0)[0]], ["rocket_1"])
+
+        self.control_center.process_incoming_message(
+            self._message("rocket_1", 2, "RocketMissionChanged", {"newMission": "APOLLO"})
+        )
+        self.assertEqual([rocket.id for rocket in by_mission.next_changes(0)[0]], ["rocket_1"])
+
+    def test_mission_filter_matches_index(self):
+        """Test that the mission filter groups missions like the mission index, beyond lowercasing."""
+        by_mission = self.stream.subscribe(mission="Straße")
+        self._launch("rocket_1", mission="STRASSE")
+        self.assertEqual([rocket.id for rocket in self.control_center.rockets_of_mission("Straße")], ["rocket_1"])
+        self.assertEqual([rocket.id for rocket in by_mission.next_changes(0)[0]], ["rocket_1"])
+
+    def test_slow_subscriber_resyncs(self):
+        """Test that a subscriber with too many pending changes is told to resync."""
+        self.stream.max_pending = 2
+        subscription = self.stream.subscribe()
+        for channel in range(4):
+            self._launch(f"rocket_{channel}")
+
+        self.assertEqual(subscription.next_changes(0), ([], True))
+        self._launch("rocket_4")
+        self.assertEqual([rocket.id for rocket in subscription.next_changes(0)[0]], ["rocket_4"])
+
+    def test_unsubscribe_wakes_subscriber(self):
+        """Test that unsubscribing stops the delivery of changes and wakes up a waiting subscriber."""
+        subscription = self.stream.subscribe()
+        waiter = threading.Thread(target=subscription.next_changes)
+        waiter.start()
+        self.stream.unsubscribe(subscription)
+        waiter.join(1)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(self.stream.subscriber_count, 0)
+        self._launch("rocket_1")
+        self.assertEqual(subscription.next_changes(0), ([], False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+from control_center import ControlCenter
+from ingest_pipeline import IngestPipeline, MESSAGE_INVALID, MESSAGE_QUEUED, MESSAGE_REJECTED
+
+class BlockingControlCenter(ControlCenter):
+    """Control center whose message processing waits until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def process_incoming_message(self, message: any) -> str:
+        self.release.wait()
+        return super().process_incoming_message(message)
+
+class TestIngestPipeline(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_time = "2025-05-14T10:00:00"
+
+    def _message(self, channel_id: str, msg_number: int) -> dict:
+        """Builds a launch message for the first message number, a speed increase otherwise."""
+        if msg_number == 1:
+            return {
+                "metadata": {
+                    "channel": channel_id,
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": self.test_time
+                },
+                "message": {"launchSpeed": 1000, "type": "Falcon", "mission": "Moon Landing"}
+            }
+        return {
+            "metadata": {
+                "channel": channel_id,
+                "messageNumber": msg_number,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+
+    def test_messages_applied_by_workers(self):
+        """Test that enqueued messages are applied, out of order, across channels."""
+        control_center = ControlCenter()
+        pipeline = IngestPipeline(control_center, worker_count=3)
+        self.assertTrue(control_center.single_writer)
+
+        for channel in range(10):
+            for msg_number in (1, 3, 2):
+                self.assertEqual(pipeline.submit(self._message(f"rocket_{channel}", msg_number)), MESSAGE_QUEUED)
+        pipeline.join()
+
+        for channel in range(10):
+            rocket = control_center.rockets_fleet.get(f"rocket_{channel}")
+            self.assertEqual(rocket.speed, 1200)
+            self.assertEqual(rocket.last_message_number, 3)
+
+        stats = pipeline.stats()
+        self.assertEqual(stats["enqueued"], 30)
+        self.assertEqual(stats["processed"], 30)
+        self.assertEqual(stats["queue_depths"], [0, 0, 0])
+
+        pipeline.stop()
+        self.assertFalse(control_center.single_writer)
+
+    def test_paused(self):
+        """Test that no message is applied while the workers are paused."""
+        control_center = ControlCenter()
+        pipeline = IngestPipeline(control_center, worker_count=2)
+        with pipeline.paused():
+            pipeline.submit(self._message("rocket_1", 1))
+            time.sleep(0.1)
+            self.assertIsNone(control_center.rockets_fleet.get("rocket_1"))
+        pipeline.join()
+        self.assertIsNotNone(control_center.rockets_fleet.get("rocket_1"))
+        pipeline.stop()
+
+    def test_invalid_message(self):
+        """Test that invalid messages are not enqueued."""
+        pipeline = IngestPipeline(ControlCenter(), worker_count=1)
+        self.assertEqual(pipeline.submit({"metadata": {}}), MESSAGE_INVALID)
+        self.assertEqual(pipeline.submit(None), MESSAGE_INVALID)
+        self.assertEqual(pipeline.stats()["enqueued"], 0)
+        pipeline.stop()
+
+    def test_backpressure(self):
+        """Test that messages are rejected when the queue is full."""
+        control_center = BlockingControlCenter()
+        pipeline = IngestPipeline(control_center, worker_count=1, queue_size=1)
+
+        outcomes = pipeline.submit_batch([self._message("rocket_1", msg_number) for msg_number in range(1, 6)])
+        self.assertGreater(outcomes[MESSAGE_REJECTED], 0)
+        self.assertEqual(outcomes[MESSAGE_QUEUED] + outcomes[MESSAGE_REJECTED], 5)
+        self.assertEqual(pipeline.stats()["rejected"], outcomes[MESSAGE_REJECTED])
+
+        control_center.release.set()
+        pipeline.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import logging
+import queue
+import unittest
+from control_center import ControlCenter
+from log_config import MESSAGE_LOGGER, JsonLinesFormatter, NonBlockingQueueHandler, RocketLogSampler, TextFormatter
+
+def make_record(msg: str, *args, rocket: str | None = None) -> logging.LogRecord:
+    record = logging.LogRecord(MESSAGE_LOGGER, logging.INFO, __file__, 1, msg, args, None)
+    if rocket is not None:
+        record.rocket = rocket
+    return record
+
+class TestLogConfig(unittest.TestCase):
+    def test_sampler_limits_each_rocket(self):
+        """Test that each rocket may log a burst, and that the dropped logs are counted on the next one written."""
+        sampler = RocketLogSampler(rate=0.0, burst=2)
+
+        self.assertEqual([sampler.filter(make_record("log", rocket="a")) for _ in range(4)], [True, True, False, False])
+        # Other rockets and records without a rocket aren't limited
+        self.assertTrue(sampler.filter(make_record("log", rocket="b")))
+        self.assertTrue(sampler.filter(make_record("log")))
+        self.assertEqual(sampler.dropped, 2)
+
+        sampler.rate = 1000.0
+        record = make_record("log", rocket="a")
+        sampler._buckets["a"][1] -= 1 # A second later
+        self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.suppressed, 2)
+        self.assertIn("(2 earlier log(s) of this rocket suppressed)", TextFormatter("%(message)s").format(record))
+
+    def test_json_lines(self):
+        """Test that records are formatted as JSON objects with the attributes passed by extra."""
+        line = JsonLinesFormatter().format(make_record("[%s] Message %s added to buffer.", "a", 3, rocket="a"))
+
+        entry = json.loads(line)
+        self.assertEqual(entry["message"], "[a] Message 3 added to buffer.")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], MESSAGE_LOGGER)
+        self.assertEqual(entry["rocket"], "a")
+        self.assertNotIn("\n", line)
+
+    def test_queue_handler_never_blocks(self):
+        """Test that records are queued unformatted, and dropped when the queue is full."""
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        first = make_record("Message %s", 1)
+        handler.handle(first)
+        handler.handle(make_record("Message %s", 2))
+
+        self.assertIs(handler.queue.get_nowait(), first)
+        self.assertEqual(first.args, (1,))
+        self.assertEqual(handler.dropped, 1)
+
+    def test_message_log_level(self):
+        """Test that message logs are tagged with their rocket, and follow the message log level."""
+        control_center = ControlCenter()
+        launch = {
+            "metadata": {
+                "channel": "rocket_1", "messageNumber": 1,
+                "messageTime": "2024-03-20T10:00:00Z", "messageType": "RocketLaunched"
+            },
+            "message": {"type": "Falcon-9", "launchSpeed": 500, "mission": "ARTEMIS"}
+        }
+        with self.assertLogs(MESSAGE_LOGGER, logging.INFO) as logs:
+            control_center.process_incoming_message(launch)
+        self.assertEqual(logs.records[0].getMessage(), "[rocket_1] Rocket added to fleet.")
+        self.assertEqual(logs.records[0].rocket, "rocket_1")
+
+        control_center.message_log_level = logging.DEBUG
+        with self.assertNoLogs(MESSAGE_LOGGER, logging.INFO):
+            control_center.process_incoming_message({**launch, "metadata": {**launch["metadata"], "channel": "rocket_2"}})
+
+if __name__ == '__main__':
+    unittest.main()
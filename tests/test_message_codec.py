@@ -0,0 +1,60 @@
+import json
+import unittest
+from message_codec import decode_batch, decode_message, parse_message, stored_message
+
+class TestMessageCodec(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.message = {
+            "metadata": {
+                "channel": "rocket_1",
+                "messageNumber": 2,
+                "messageTime": "2024-03-20T10:00:00Z",
+                "messageType": "RocketSpeedIncreased"
+            },
+            "message": {"by": 100}
+        }
+
+    def test_parse_message(self):
+        """Test that a valid message is reduced to its channel and the fields needed to apply it."""
+        self.assertEqual(
+            parse_message(self.message),
+            ("rocket_1", (2, "RocketSpeedIncreased", "2024-03-20T10:00:00Z", 1710928800000000, {"by": 100}))
+        )
+        # The payload is optional
+        del self.message["message"]
+        self.assertEqual(parse_message(self.message)[1][4], {})
+
+    def test_stored_message(self):
+        """Test that stored messages are rebuilt, parsing the time of those stored without it."""
+        compact = parse_message(self.message)[1]
+        self.assertEqual(stored_message(list(compact)), compact)
+        self.assertEqual(stored_message([2, "RocketSpeedIncreased", "2024-03-20T10:00:00Z", {"by": 100}]), compact)
+
+    def test_parse_invalid_message(self):
+        """Test that messages with missing or mistyped fields are rejected."""
+        invalid_metadata = [
+            {"channel": ""},
+            {"messageNumber": "2"},
+            {"messageType": None},
+            {"messageTime": 1710928800},
+            {"messageTime": "garbage"}
+        ]
+        for changes in invalid_metadata:
+            message = {**self.message, "metadata": {**self.message["metadata"], **changes}}
+            self.assertIsNone(parse_message(message), changes)
+        self.assertIsNone(parse_message({**self.message, "message": [100]}))
+        self.assertIsNone(parse_message({"metadata": "rocket_1"}))
+        self.assertIsNone(parse_message([self.message]))
+        self.assertIsNone(parse_message(None))
+
+    def test_decode(self):
+        """Test that bodies are decoded, and invalid JSON is reported as None."""
+        body = json.dumps(self.message).encode()
+        self.assertEqual(decode_message(body), self.message)
+        self.assertIsNone(decode_message(b'{"metadata":'))
+        self.assertEqual(decode_batch(body + b"\nnot json\n", ndjson=True), [self.message, None])
+        self.assertIsNone(decode_batch(body, ndjson=False))
+
+if __name__ == '__main__':
+    unittest.main()
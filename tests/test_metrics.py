@@ -0,0 +1,67 @@
+import threading
+import unittest
+from metrics import MetricsRegistry, TimedLock
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.registry = MetricsRegistry()
+
+    def test_counter_across_threads(self):
+        """Test that the counts of every thread, finished ones included, are merged."""
+        counter = self.registry.counter("test_total", "Test counter.", ("kind",))
+
+        def count():
+            for _ in range(1000):
+                counter.inc(("a",))
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(("b",), 2)
+
+        self.assertEqual(counter.values(), {("a",): 4000, ("b",): 2})
+        # A new thread folds the shards of the finished ones
+        thread = threading.Thread(target=counter.inc, args=(("a",),))
+        thread.start()
+        thread.join()
+        self.assertEqual(counter.values()[("a",)], 4001)
+
+    def test_histogram_render(self):
+        """Test that histograms are rendered with cumulative buckets, sum and count."""
+        histogram = self.registry.histogram("test_seconds", "Test histogram.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        rendered = self.registry.render()
+        self.assertIn("# TYPE test_seconds histogram", rendered)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', rendered)
+        self.assertIn('test_seconds_bucket{le="1.0"} 2', rendered)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', rendered)
+        self.assertIn("test_seconds_sum 5.55", rendered)
+        self.assertIn("test_seconds_count 3", rendered)
+
+    def test_gauge_and_label_escaping(self):
+        """Test that gauges are collected when rendered, with escaped label values."""
+        self.registry.gauge("test_items", "Test gauge.", ("name",), lambda: {('say "hi"',): 3})
+        self.assertIn('test_items{name="say \\"hi\\""} 3', self.registry.render())
+
+    def test_timed_lock(self):
+        """Test that only contended acquisitions are recorded."""
+        histogram = self.registry.histogram("test_wait_seconds", "Test wait.", ("lock",))
+        lock = threading.Lock()
+        with TimedLock(lock, histogram, ("test",)):
+            self.assertTrue(lock.locked())
+        self.assertFalse(lock.locked())
+        self.assertEqual(histogram.values(), {})
+
+        lock.acquire()
+        threading.Timer(0.05, lock.release).start()
+        with TimedLock(lock, histogram, ("test",)):
+            pass
+        self.assertEqual(sum(histogram.values()[("test",)][:-1]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
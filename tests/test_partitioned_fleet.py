@@ -0,0 +1,117 @@
+import json
+import logging
+import unittest
+from benchmarks.workload import generate_traffic
+from fleet_analytics import numpy
+from partitioned_fleet import PartitionedFleet, partition_index
+
+class TestPartitionedFleet(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Start the worker processes once, they take a while to spawn."""
+        cls.fleet = PartitionedFleet(3, log_level=logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fleet.stop()
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.fleet.clear_fleet()
+        self.traffic = generate_traffic(30, 5, out_of_order_rate=0.2, seed=1)
+
+    def test_partition_index(self):
+        """Test that channels are spread over the partitions, the same way on every call."""
+        indexes = [partition_index(f"channel-{channel}", 3) for channel in range(30)]
+        self.assertEqual(set(indexes), {0, 1, 2})
+        self.assertEqual(indexes, [partition_index(f"channel-{channel}", 3) for channel in range(30)])
+
+    def test_submit_and_merge(self):
+        """Test that messages are applied by the workers, and that reads are merged in launch time order."""
+        processed = self.fleet.stats()["processed"]
+        outcomes = self.fleet.submit_batch(self.traffic + [{"metadata": {}}])
+        self.assertEqual(outcomes, {"queued": 150, "rejected": 0, "invalid": 1})
+        self.fleet.join()
+
+        rockets = self.fleet.rockets_in_launch_order()
+        self.assertEqual([rocket.id for rocket in rockets], [f"channel-{channel}" for channel in range(30)])
+        self.assertEqual(self.fleet.get_rocket("channel-7").json_cache, rockets[7].json_cache)
+        self.assertIsNone(self.fleet.get_rocket("channel-unknown"))
+        self.assertEqual(self.fleet.get_rocket_history("channel-7")["speeds"][0]["count"], 1)
+        with self.assertRaises(ValueError):
+            self.fleet.get_rocket_history("channel-7", "yesterday")
+
+        stats = self.fleet.stats()
+        self.assertEqual(stats["mode"], "processes")
+        self.assertEqual(stats["processed"], stats["enqueued"])
+        self.assertEqual(stats["processed"] - processed, 150)
+
+    def test_failed_query(self):
+        """Test that a query failing in the workers leaves the answers of the next queries in order."""
+        with self.assertRaises(RuntimeError):
+            self.fleet._call_all("_unknown")
+        self.assertIsInstance(self.fleet.fleet_version, int)
+        self.assertEqual(self.fleet.rockets_in_launch_order(), [])
+
+    def test_pages(self):
+        """Test that pages merged from every worker follow each other without gaps or repeats."""
+        self.fleet.submit_batch(self.traffic)
+        self.fleet.join()
+
+        ids, cursor = [], None
+        while True:
+            rockets, cursor = self.fleet.rockets_page(7, cursor)
+            ids.extend(rocket.id for rocket in rockets)
+            if cursor is None:
+                break
+        self.assertEqual(ids, [rocket.id for rocket in self.fleet.rockets_in_launch_order()])
+
+        rockets, cursor = self.fleet.rockets_page(7, None, "artemis")
+        self.assertEqual([rocket.id for rocket in rockets], ids[:7])
+        # Without an archive policy, nothing is archived
+        rockets, _ = self.fleet.rockets_page(7, None, include_archived=True)
+        self.assertEqual([rocket.id for rocket in rockets], ids[:7])
+        self.assertEqual(self.fleet.rockets_page(7, cursor, "apollo"), ([], None))
+
+    def test_query(self):
+        """Test that queries merge the first rockets of every worker in sort order."""
+        self.fleet.submit_batch(self.traffic)
+        self.fleet.join()
+
+        rockets = [json.loads(rocket.json_cache[1]) for rocket in self.fleet.rockets_in_launch_order()]
+        fastest = sorted(rockets, key=lambda rocket: (rocket["speed"], rocket["id"]), reverse=True)[:5]
+        queried = self.fleet.query_rockets(sort="speed", descending=True, limit=5)
+        self.assertEqual([rocket.id for rocket in queried], [rocket["id"] for rocket in fastest])
+        self.assertEqual(len(self.fleet.query_rockets(status="exploded")), 0)
+        with self.assertRaises(ValueError):
+            self.fleet.query_rockets(sort="mission")
+
+    def test_missions_and_metrics(self):
+        """Test that missions are merged by union, counts by sum, and metrics by partition."""
+        version = self.fleet.fleet_version
+        self.fleet.submit_batch(self.traffic)
+        self.fleet.join()
+
+        self.assertGreater(self.fleet.fleet_version, version)
+        self.assertEqual(self.fleet.list_missions(), ["ARTEMIS"])
+        self.assertEqual(self.fleet.get_mission_stats("artemis")["total"], 30)
+        self.assertEqual(len(self.fleet.rockets_of_mission("ARTEMIS")), 30)
+        self.assertIsNone(self.fleet.get_mission_stats("APOLLO"))
+
+        metrics = self.fleet.metrics.render()
+        self.assertEqual(metrics.count("# TYPE lunar_messages_total counter"), 1)
+        self.assertIn('outcome="accepted",partition="2"}', metrics)
+        self.assertEqual(self.fleet.buffer_stats()["partitions"], 3)
+
+    @unittest.skipUnless(numpy, "NumPy is not installed")
+    def test_fleet_columns(self):
+        """Test that the columnar snapshots of the workers are concatenated."""
+        self.fleet.submit_batch(self.traffic)
+        self.fleet.join()
+
+        stats = self.fleet.fleet_columns().stats()
+        self.assertEqual(stats["rockets"], 30)
+        self.assertEqual(stats["missions"]["ARTEMIS"]["rockets"], 30)
+
+if __name__ == '__main__':
+    unittest.main()
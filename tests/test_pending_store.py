@@ -0,0 +1,51 @@
+import unittest
+from pending_store import PendingStore, PENDING_ADDED, PENDING_DROPPED, PENDING_DUPLICATE
+
+class TestPendingStore(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.store = PendingStore(max_channels=2, max_messages_per_channel=2, ttl=10)
+
+    def _message(self, msg_number: int) -> tuple:
+        """Builds a compact speed increase message."""
+        return (msg_number, "RocketSpeedIncreased", "2025-05-14T10:00:00", {"by": 100})
+
+    def test_pop_in_order(self):
+        """Test that held messages are returned ordered by number, once."""
+        self.assertEqual(self.store.add("rocket_1", self._message(3), now=0), PENDING_ADDED)
+        self.assertEqual(self.store.add("rocket_1", self._message(2), now=0), PENDING_ADDED)
+        self.assertEqual(self.store.add("rocket_1", self._message(3), now=0), PENDING_DUPLICATE)
+
+        self.assertEqual([message[0] for message in self.store.pop("rocket_1")], [2, 3])
+        self.assertEqual(self.store.pop("rocket_1"), [])
+        self.assertEqual(self.store.stats()["replayed"], 2)
+
+    def test_channel_limit(self):
+        """Test that messages beyond the channel limit are dropped."""
+        for msg_number in (2, 3, 4):
+            outcome = self.store.add("rocket_1", self._message(msg_number), now=0)
+        self.assertEqual(outcome, PENDING_DROPPED)
+        self.assertEqual(self.store.stats()["dropped"], 1)
+
+    def test_oldest_channel_evicted(self):
+        """Test that the oldest channel is evicted to make room for a new one."""
+        for channel in ("rocket_1", "rocket_2", "rocket_3"):
+            self.store.add(channel, self._message(2), now=0)
+
+        self.assertEqual(self.store.pop("rocket_1"), [])
+        stats = self.store.stats()
+        self.assertEqual(stats["channels"], 2)
+        self.assertEqual(stats["evicted"], 1)
+
+    def test_ttl(self):
+        """Test that channels held for longer than the TTL are evicted."""
+        self.store.add("rocket_1", self._message(2), now=0)
+        self.store.add("rocket_2", self._message(2), now=5)
+
+        self.store.expire(now=10)
+        self.assertEqual(self.store.pop("rocket_1"), [])
+        self.assertEqual(len(self.store.pop("rocket_2")), 1)
+        self.assertEqual(self.store.stats()["evicted"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
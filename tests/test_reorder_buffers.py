@@ -0,0 +1,60 @@
+import os
+import unittest
+from unittest import mock
+from reorder_buffers import BufferAccounting, BufferLimits, GAP_POLICY_DEGRADE, estimate_message_size
+
+class TestBufferLimits(unittest.TestCase):
+    def test_invalid_gap_policy(self):
+        """Test that an unknown gap policy is rejected."""
+        with self.assertRaises(ValueError):
+            BufferLimits(gap_policy="unknown")
+
+    def test_from_env(self):
+        """Test reading the limits from environment variables."""
+        environ = {
+            "LUNAR_BUFFER_MAX_MESSAGES": "100",
+            "LUNAR_BUFFER_MAX_TOTAL_BYTES": "",
+            "LUNAR_GAP_TIMEOUT": "2.5",
+            "LUNAR_GAP_POLICY": GAP_POLICY_DEGRADE
+        }
+        with mock.patch.dict(os.environ, environ):
+            limits = BufferLimits.from_env()
+
+        self.assertEqual(limits.max_messages_per_rocket, 100)
+        self.assertEqual(limits.max_bytes_per_rocket, BufferLimits().max_bytes_per_rocket)
+        self.assertIsNone(limits.max_total_bytes)
+        self.assertEqual(limits.gap_timeout, 2.5)
+        self.assertEqual(limits.gap_policy, GAP_POLICY_DEGRADE)
+
+    def test_split(self):
+        """Test that the fleet-wide limits are shared between partitions, and the per-rocket ones are not."""
+        limits = BufferLimits(max_total_messages=10, max_total_bytes=None, max_messages_per_rocket=5)
+        partition = limits.split(3)
+        self.assertEqual(partition.max_total_messages, 4)
+        self.assertIsNone(partition.max_total_bytes)
+        self.assertEqual(partition.max_messages_per_rocket, 5)
+        self.assertEqual(limits.max_total_messages, 10)
+
+class TestBufferAccounting(unittest.TestCase):
+    def test_exceeds(self):
+        """Test comparing the totals to the global limits."""
+        accounting = BufferAccounting()
+        limits = BufferLimits(max_total_messages=2, max_total_bytes=1000)
+
+        accounting.add(2, 500)
+        self.assertFalse(accounting.exceeds(limits))
+        accounting.add(1, 100)
+        self.assertTrue(accounting.exceeds(limits))
+        accounting.add(-1, 100)
+        accounting.add(0, 600)
+        self.assertTrue(accounting.exceeds(limits))
+
+    def test_estimate_message_size(self):
+        """Test that larger messages are estimated larger."""
+        small = {"metadata": {"channel": "rocket_1"}, "message": {"by": 1}}
+        large = {"metadata": {"channel": "rocket_1"}, "message": {"reason": "x" * 1000}}
+        self.assertGreater(estimate_message_size(small), 0)
+        self.assertGreater(estimate_message_size(large), estimate_message_size(small) + 900)
+
+if __name__ == '__main__':
+    unittest.main()
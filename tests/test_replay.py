@@ -0,0 +1,55 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from benchmarks.workload import generate_channel_messages
+from control_center import ControlCenter
+from replay import fleet_summary, inject_duplicates, read_capture, replay
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.channel_messages = generate_channel_messages(5, 4)
+        self.messages = [message for messages in self.channel_messages for message in messages]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.capture = os.path.join(directory.name, "capture.jsonl")
+
+    def _write_capture(self, lines: list):
+        with open(self.capture, "w") as file:
+            file.write("\n".join(json.dumps(line) if not isinstance(line, str) else line for line in lines))
+
+    def test_read_capture(self):
+        """Test that messages and batches are read in order, and malformed lines read as None."""
+        self._write_capture([self.messages[0], self.messages[1:3], "", "not json"])
+        self.assertEqual(list(read_capture(self.capture)), self.messages[:3] + [None])
+
+    def test_replay(self):
+        """Test that a replay applies every message and reports the outcomes and the fleet."""
+        self._write_capture(self.messages + ["not json"])
+        control_center = ControlCenter()
+        result = replay(control_center, read_capture(self.capture))
+
+        self.assertEqual(result["messages"], 21)
+        self.assertEqual(result["outcomes"], {"accepted": 20, "invalid": 1})
+        self.assertLessEqual(result["p50_us"], result["p99_us"])
+        self.assertEqual(fleet_summary(control_center)["rockets"], 5)
+
+    def test_shuffled_replay_with_duplicates(self):
+        """Test that shuffled and duplicated messages, replayed by threads, lead to the same fleet."""
+        rng = random.Random(1)
+        messages = inject_duplicates(self.messages, 0.5, rng)
+        rng.shuffle(messages)
+        control_center = ControlCenter()
+        result = replay(control_center, messages, threads=3)
+
+        self.assertEqual(result["messages"], 30)
+        # Across threads, a copy may be held until launch before being found to be a duplicate
+        self.assertGreater(result["outcomes"]["duplicate"], 0)
+        for rocket in control_center.rockets_fleet.values():
+            self.assertEqual(rocket.speed, 800)
+            self.assertEqual(rocket.last_message_number, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import gzip
+import json
+import unittest
+import zlib
+import response_streams
+from response_streams import compress_stream, json_array_stream, ndjson_stream, pages_of
+
+class TestResponseStreams(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.items = [json.dumps({"id": number}).encode() for number in range(5)]
+
+    def read_page(self, limit: int, cursor: str | None) -> tuple[list[bytes], str | None]:
+        start = int(cursor or 0)
+        end = start + limit
+        return (self.items[start:end], str(end) if end < len(self.items) else None)
+
+    def test_pages_of(self):
+        """Test that pages are read until the last one."""
+        self.assertEqual(list(pages_of(self.read_page, 2)), [self.items[:2], self.items[2:4], self.items[4:]])
+
+    def test_json_array_stream(self):
+        """Test that chunks join into a JSON array, wrapped or empty."""
+        self.assertEqual(json.loads(b"".join(json_array_stream(pages_of(self.read_page, 2)))), [{"id": n} for n in range(5)])
+        self.assertEqual(b"".join(json_array_stream([[], []])), b"[]")
+        body = b"".join(json_array_stream([self.items[:1], []], b'{"rockets":[', b"]}"))
+        self.assertEqual(json.loads(body), {"rockets": [{"id": 0}]})
+        self.assertEqual(b"".join(json_array_stream([], b'{"rockets":[', b"]}")), b'{"rockets":[]}')
+
+    def test_ndjson_stream(self):
+        """Test that each value is on its own line."""
+        lines = b"".join(ndjson_stream(pages_of(self.read_page, 2))).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{"id": n} for n in range(5)])
+
+    def test_compress_stream(self):
+        """Test that each chunk is decodable as soon as it is received."""
+        chunks = list(compress_stream(iter([b"[1,", b"2]"]), "gzip"))
+        self.assertEqual(gzip.decompress(b"".join(chunks)), b"[1,2]")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(chunks[0]), b"[1,")
+        self.assertEqual(list(compress_stream(iter([b"[]"]), None)), [b"[]"])
+        with self.assertRaises(ValueError):
+            list(compress_stream(iter([b"[]"]), "br"))
+
+    @unittest.skipUnless(response_streams.zstandard, "zstandard is not installed")
+    def test_compress_stream_zstd(self):
+        """Test compressing with zstd."""
+        body = b"".join(compress_stream(iter([b"[1,", b"2]"]), "zstd"))
+        decompressor = response_streams.zstandard.ZstdDecompressor().decompressobj()
+        self.assertEqual(decompressor.decompress(body), b"[1,2]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,51 @@ class TestRocket(unittest.TestCase):
         self.assertEqual(self.test_rocket.last_message_number, msg_number)
         self.assertEqual(self.test_rocket.mission, new_mission)
 
+    def test_version_bumped_on_update(self):
+        """Test that every state change bumps the rocket version."""
+        initial_version = self.test_rocket.version
+        self.test_rocket.increase_speed(500, "2025-05-14T10:02:00", 2)
+        self.assertGreater(self.test_rocket.version, initial_version)
+
+    def test_message_buffer(self):
+        """Test the buffer pops messages by number and rejects duplicates."""
+        self.assertTrue(self.test_rocket.append_message_to_buffer(4, {"number": 4}, 100))
+        self.assertTrue(self.test_rocket.append_message_to_buffer(3, {"number": 3}, 50))
+        self.assertFalse(self.test_rocket.append_message_to_buffer(4, {"number": 4}, 100))
+        self.assertEqual(len(self.test_rocket.message_buffer), 2)
+        self.assertEqual(self.test_rocket.buffered_bytes, 150)
+
+        self.assertEqual(self.test_rocket.pop_message_from_buffer(), (3, {"number": 3}))
+        self.assertEqual(self.test_rocket.pop_message_from_buffer(), (4, {"number": 4}))
+        self.assertIsNone(self.test_rocket.pop_message_from_buffer())
+        self.assertEqual(self.test_rocket.buffered_sizes, {})
+        self.assertEqual(self.test_rocket.buffered_bytes, 0)
+
+    def test_buffer_and_lock_allocated_lazily(self):
+        """Test the buffer is only held while messages are buffered, and the lock on first use."""
+        self.assertIsNone(self.test_rocket._message_buffer)
+        self.assertIsNone(self.test_rocket._lock)
+        self.test_rocket.append_message_to_buffer(3, ("RocketSpeedIncreased", "2025-05-14T10:03:00", {"by": 1}))
+        self.assertIsNotNone(self.test_rocket._message_buffer)
+        self.test_rocket.pop_message_from_buffer()
+        self.assertIsNone(self.test_rocket._message_buffer)
+        self.assertIs(self.test_rocket.lock, self.test_rocket.lock)
+
+    def test_compact_state(self):
+        """Test the rocket has no per-instance dictionary and shares its repeated strings."""
+        self.assertFalse(hasattr(self.test_rocket, "__dict__"))
+        other_rocket = Rocket("rocket_456", "2025-05-14T10:00:00", "2025-05-14T10:00:00", 1, 0,
+                              "".join(["Fal", "con"]), "".join(["Moon ", "Landing"]))
+        self.assertIs(other_rocket.rocket_type, self.test_rocket.rocket_type)
+        self.assertIs(other_rocket.mission, self.test_rocket.mission)
+
+    def test_time_zone_preserved(self):
+        """Test times with a time zone are returned in their original time zone."""
+        msg_time_str = "2025-05-14T12:02:00.123456+02:00"
+        self.test_rocket.increase_speed(1, msg_time_str, 2)
+        self.assertEqual(self.test_rocket.last_update_time, datetime.fromisoformat(msg_time_str))
+        self.assertEqual(self.test_rocket.last_update_time.isoformat(), msg_time_str)
+
     def test_to_dict(self):
         """Test dictionary serialization."""
         rocket_dict = self.test_rocket.to_dict()
@@ -0,0 +1,103 @@
+import os
+import unittest
+from unittest import mock
+from rocket_history import HistoryRetention, RocketHistory, parse_time
+
+SECOND = 1_000_000
+
+def at(second: int) -> int:
+    """Returns the microseconds since the epoch of a number of seconds since the epoch."""
+    return second * SECOND
+
+class TestHistoryRetention(unittest.TestCase):
+    def test_invalid_tiers(self):
+        """Test that tiers must be positive, and multiples of the previous tier."""
+        with self.assertRaises(ValueError):
+            HistoryRetention(tiers=((10, 60), (15, 60)))
+        with self.assertRaises(ValueError):
+            HistoryRetention(tiers=((10, 0),))
+        with self.assertRaises(ValueError):
+            HistoryRetention(samples=0)
+
+    def test_from_env(self):
+        """Test reading the retention from environment variables."""
+        environ = {"LUNAR_HISTORY_SAMPLES": "10", "LUNAR_HISTORY_TIERS": "5:12, 60:24"}
+        with mock.patch.dict(os.environ, environ):
+            retention = HistoryRetention.from_env()
+
+        self.assertEqual(retention.samples, 10)
+        self.assertEqual(retention.tiers, ((5, 12), (60, 24)))
+        self.assertEqual(retention.mission_changes, HistoryRetention().mission_changes)
+        self.assertEqual(retention.max_bytes, (10 * 2 + 36 * 5) * 8)
+
+class TestRocketHistory(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.history = RocketHistory(HistoryRetention(samples=4, tiers=((10, 3), (60, 2))))
+
+    def test_parse_time(self):
+        """Test that times are parsed in their time zone, and times without one as UTC."""
+        self.assertEqual(parse_time("1970-01-01T00:00:01"), SECOND)
+        self.assertEqual(parse_time("1970-01-01T01:00:01+01:00"), SECOND)
+        with self.assertRaises(ValueError):
+            parse_time("yesterday")
+
+    def test_latest_samples(self):
+        """Test that the latest speeds are returned as received."""
+        for second, speed in enumerate((100, 150, 125)):
+            self.history.record_speed(at(second), speed)
+
+        speeds = self.history.speeds()
+        self.assertEqual([speed["avg"] for speed in speeds], [100, 150, 125])
+        self.assertEqual(speeds[1], {
+            "time": "1970-01-01T00:00:01+00:00", "seconds": 0, "min": 150, "max": 150, "avg": 150, "count": 1
+        })
+
+    def test_downsampling(self):
+        """Test that aged speeds are folded into buckets keeping their minimum, maximum and average."""
+        for second in range(24):
+            self.history.record_speed(at(second), second)
+
+        speeds = self.history.speeds()
+        # The last 4 samples are kept, the 20 before them fold into two 10s buckets
+        self.assertEqual([speed["seconds"] for speed in speeds], [10, 10, 0, 0, 0, 0])
+        self.assertEqual(speeds[0], {
+            "time": "1970-01-01T00:00:00+00:00", "seconds": 10, "min": 0, "max": 9, "avg": 4.5, "count": 10
+        })
+        self.assertEqual(sum(speed["count"] for speed in speeds), 24)
+
+    def test_memory_bounded(self):
+        """Test that the history holds at most the retained samples and buckets, dropping the oldest."""
+        for second in range(0, 100_000, 5):
+            self.history.record_speed(at(second), 1)
+
+        self.assertLessEqual(self.history.sample_count, 4 + 3 + 2)
+        speeds = self.history.speeds()
+        self.assertEqual(speeds[0]["seconds"], 60)
+        self.assertGreater(speeds[0]["time"], "1970-01-02")
+
+    def test_range_and_resolution(self):
+        """Test selecting the speeds between two times, aggregated at a resolution."""
+        for second in range(0, 30, 2):
+            self.history.record_speed(at(second), second)
+
+        speeds = self.history.speeds(10 * SECOND, 29 * SECOND, 20 * SECOND)
+        self.assertEqual([(speed["time"][-14:-6], speed["seconds"]) for speed in speeds], [
+            ("00:00:00", 20), ("00:00:20", 20)
+        ])
+        self.assertEqual((speeds[0]["min"], speeds[0]["max"]), (10, 18))
+
+    def test_missions(self):
+        """Test that the mission at the start of a range is returned with the later changes."""
+        self.history.record_mission(at(0), "ARTEMIS")
+        self.history.record_mission(at(10), "APOLLO")
+        self.history.record_mission(at(20), "GEMINI")
+
+        missions = self.history.missions(15 * SECOND, 20 * SECOND)
+        self.assertEqual([mission["mission"] for mission in missions], ["APOLLO", "GEMINI"])
+        self.assertEqual(self.history.missions(end_us=5 * SECOND), [
+            {"time": "1970-01-01T00:00:00+00:00", "mission": "ARTEMIS"}
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,19 @@
+import gzip
 import unittest
 import json
+import fleet_analytics
+import server
 from server import app, control_center
+from cold_store import ArchivePolicy, ColdStore
 from control_center import ControlCenter
+from ingest_pipeline import IngestPipeline
 
 class TestFlaskAPI(unittest.TestCase):
     def setUp(self):
         """Set up test client before each test."""
         self.app = app.test_client()
         self.test_time = "2025-05-14T10:00:00"
-        control_center.rockets_fleet.clear()
+        control_center.clear_fleet()
         
     def test_post_message_valid(self):
         """Test POST /messages with valid launch message."""
@@ -45,7 +50,55 @@ class TestFlaskAPI(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
+
+        # A JSON content type with a body that isn't valid JSON
+        response = self.app.post('/messages', data='{"metadata":', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
         
+    @unittest.skipUnless(fleet_analytics.numpy, "NumPy is not installed")
+    def test_get_fleet_stats(self):
+        """Test GET /fleet/stats serves the statistics of the latest snapshot, tagged with its version."""
+        self.test_post_message_valid()
+        server.fleet_stats.refresh()
+
+        response = self.app.get('/fleet/stats')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['rockets'], 1)
+        self.assertEqual(data['missions']['MoonLanding']['mean_speed'], 1000)
+
+        response = self.app.get('/fleet/stats', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_stream_fleet(self):
+        """Test GET /fleet/stream streams the fleet, then the changes of the selected rockets."""
+        self.test_post_message_valid()
+        response = self.app.get('/fleet/stream?rocket=rocket_123', buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = iter(response.response)
+
+        fleet_event = next(events)
+        self.assertTrue(fleet_event.startswith(b"event: fleet\ndata: "))
+        self.assertEqual(json.loads(fleet_event.split(b"data: ", 1)[1])[0]['id'], 'rocket_123')
+
+        message = {
+            "metadata": {
+                "channel": "rocket_123",
+                "messageNumber": 2,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 500}
+        }
+        self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+        rocket_event = next(events)
+        self.assertTrue(rocket_event.startswith(b"event: rocket\ndata: "))
+        self.assertEqual(json.loads(rocket_event.split(b"data: ", 1)[1])['speed'], 1500)
+
+        response.close()
+        self.assertEqual(server.fleet_stream.subscriber_count, 0)
+
     def test_get_rockets(self):
         """Test GET /rockets endpoint."""
         # First launch a rocket
@@ -56,6 +109,80 @@ class TestFlaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertTrue(isinstance(data, list))
         
+    def test_get_rockets_paginated(self):
+        """Test GET /rockets with limit and cursor query parameters."""
+        for number in range(5):
+            message = {
+                "metadata": {
+                    "channel": f"rocket_{number}",
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": f"2025-05-14T10:00:0{4 - number}"
+                },
+                "message": {"launchSpeed": 1000, "type": "Falcon", "mission": "MoonLanding"}
+            }
+            self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+
+        rocket_ids = []
+        response = self.app.get('/rockets?limit=2')
+        while True:
+            self.assertEqual(response.status_code, 200)
+            rocket_ids.extend(rocket['id'] for rocket in json.loads(response.data))
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            response = self.app.get(f'/rockets?limit=2&cursor={cursor}')
+
+        self.assertEqual(rocket_ids, [f"rocket_{number}" for number in range(4, -1, -1)])
+
+    def test_get_rocket_history(self):
+        """Test GET /rockets/<id>/history endpoint."""
+        self.test_post_message_valid()
+
+        response = self.app.get('/rockets/rocket_123/history?from=2025-05-14T09:00:00Z&resolution=60')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['speeds'], [{
+            "time": "2025-05-14T10:00:00+00:00", "seconds": 60, "min": 1000, "max": 1000, "avg": 1000, "count": 1
+        }])
+        self.assertEqual(data['missions'][0]['mission'], "MoonLanding")
+
+        self.assertEqual(self.app.get('/rockets/unknown/history').status_code, 404)
+        self.assertEqual(self.app.get('/rockets/rocket_123/history?resolution=0').status_code, 400)
+        self.assertEqual(self.app.get('/rockets/rocket_123/history?to=soon').status_code, 400)
+
+    def test_get_rockets_invalid_pagination(self):
+        """Test GET /rockets with invalid pagination parameters."""
+        self.assertEqual(self.app.get('/rockets?limit=0').status_code, 400)
+        self.assertEqual(self.app.get('/rockets?limit=abc').status_code, 400)
+        self.assertEqual(self.app.get('/rockets?limit=2&cursor=invalid').status_code, 400)
+
+    def test_get_rockets_query(self):
+        """Test GET /rockets with filter and sort query parameters."""
+        for number, (rocket_type, speed) in enumerate((("Falcon-9", 3000), ("Atlas", 5000), ("Falcon-9", 4000))):
+            message = {
+                "metadata": {
+                    "channel": f"rocket_{number}",
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": f"2025-05-14T10:00:0{number}"
+                },
+                "message": {"launchSpeed": speed, "type": rocket_type, "mission": "MoonLanding"}
+            }
+            self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+
+        response = self.app.get('/rockets?rocket_type=falcon-9&status=Launched&sort=speed&order=desc&limit=20')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([rocket['id'] for rocket in json.loads(response.data)], ["rocket_2", "rocket_0"])
+
+        response = self.app.get('/rockets?min_speed=3500&order=desc')
+        self.assertEqual([rocket['id'] for rocket in json.loads(response.data)], ["rocket_2", "rocket_1"])
+
+        self.assertEqual(self.app.get('/rockets?sort=mission').status_code, 400)
+        self.assertEqual(self.app.get('/rockets?order=up').status_code, 400)
+        self.assertEqual(self.app.get('/rockets?min_speed=fast').status_code, 400)
+        self.assertEqual(self.app.get('/rockets?sort=speed&limit=1&cursor=abc').status_code, 400)
+
     def test_get_specific_rocket(self):
         """Test GET /rockets/<rocket_id> endpoint."""
         # First launch a rocket
@@ -66,6 +193,45 @@ class TestFlaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['id'], 'rocket_123')
         
+    def test_get_rockets_matches_jsonify(self):
+        """Test that cached responses serialize rockets like jsonify."""
+        self.test_post_message_valid()
+
+        response = self.app.get('/rockets/rocket_123')
+        with app.app_context():
+            expected = app.json.response(control_center.get_rocket_by_id('rocket_123')).get_data()
+        self.assertEqual(response.data, expected.rstrip())
+
+    def test_conditional_requests(self):
+        """Test that unchanged resources return 304 to conditional requests."""
+        self.test_post_message_valid()
+
+        for url in ('/rockets', '/rockets?limit=1', '/rockets/rocket_123', '/missions/MoonLanding'):
+            response = self.app.get(url)
+            etag = response.headers['ETag']
+            response = self.app.get(url, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+
+        etag = self.app.get('/rockets/rocket_123').headers['ETag']
+        fleet_etag = self.app.get('/rockets').headers['ETag']
+        message = {
+            "metadata": {
+                "channel": "rocket_123",
+                "messageNumber": 2,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+        self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+
+        response = self.app.get('/rockets/rocket_123', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['speed'], 1100)
+        response = self.app.get('/rockets', headers={'If-None-Match': fleet_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)[0]['speed'], 1100)
+
     def test_get_nonexistent_rocket(self):
         """Test GET /rockets/<rocket_id> with invalid ID."""
         response = self.app.get('/rockets/nonexistent')
@@ -92,12 +258,199 @@ class TestFlaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['mission'], 'MoonLanding')
         self.assertTrue(isinstance(data['rockets'], list))
-        
+
+    def test_streamed_representations(self):
+        """Test that collections are streamed as JSON or NDJSON, compressed as negotiated."""
+        self.test_post_message_valid()
+        expected = json.loads(self.app.get('/rockets').data)
+
+        response = self.app.get('/rockets', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.data)), expected)
+
+        response = self.app.get('/rockets', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in response.data.splitlines()], expected)
+
+        response = self.app.get('/missions/moonlanding', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual([json.loads(line) for line in response.data.splitlines()], expected)
+
+        # Each representation has its own entity tag
+        etag = response.headers['ETag']
+        response = self.app.get('/missions/moonlanding', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        response = self.app.get('/missions/moonlanding', headers={'If-None-Match': etag, 'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 304)
+
+
+    def test_archived_rockets(self):
+        """Test that archived rockets are found by ID, and only listed with include=archived."""
+        self.test_post_message_valid()
+        control_center.archive_policy, control_center.cold_store = ArchivePolicy(exploded=False, idle_after=1), ColdStore()
+        try:
+            control_center.archive_rockets(now=0)
+            self.assertEqual(control_center.archive_rockets(now=1), 1)
+
+            self.assertEqual(self.app.get('/rockets/rocket_123').status_code, 200)
+            self.assertEqual(json.loads(self.app.get('/rockets').data), [])
+            self.assertEqual(self.app.get('/missions/moonlanding').status_code, 404)
+            for path in ('/rockets?include=archived', '/rockets?include=archived&limit=5',
+                         '/rockets?include=archived&sort=speed', '/missions/moonlanding?include=archived'):
+                data = json.loads(self.app.get(path).data)
+                rockets = data['rockets'] if isinstance(data, dict) else data
+                self.assertEqual([rocket['id'] for rocket in rockets], ['rocket_123'], path)
+        finally:
+            control_center.cold_store.close()
+            control_center.archive_policy = control_center.cold_store = None
+
+    def test_get_mission_stats(self):
+        """Test GET /missions/<mission>/stats endpoint."""
+        # First launch a rocket
+        self.test_post_message_valid()
+
+        response = self.app.get('/missions/moonlanding/stats')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['launched'], 1)
+        self.assertEqual(data['exploded'], 0)
+
+        self.assertEqual(self.app.get('/missions/NonexistentMission/stats').status_code, 404)
+
     def test_get_nonexistent_mission(self):
         """Test GET /missions/<mission> with invalid mission."""
         response = self.app.get('/missions/NonexistentMission')
         self.assertEqual(response.status_code, 404)
 
+    def test_post_message_batch_json(self):
+        """Test POST /messages/batch with a JSON array of messages."""
+        self.test_post_message_valid()
+        messages = [
+            {
+                "metadata": {
+                    "channel": "rocket_123",
+                    "messageNumber": number,
+                    "messageType": "RocketSpeedIncreased",
+                    "messageTime": self.test_time
+                },
+                "message": {"by": 100}
+            }
+            for number in (3, 2, 5)
+        ]
+
+        response = self.app.post(
+            '/messages/batch',
+            data=json.dumps(messages),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['messages_received'], 3)
+        self.assertEqual(data['accepted'], 2)
+        self.assertEqual(data['buffered'], 1)
+        self.assertEqual(control_center.get_rocket_by_id('rocket_123')['speed'], 1200)
+
+    def test_post_message_batch_ndjson(self):
+        """Test POST /messages/batch with NDJSON messages."""
+        self.test_post_message_valid()
+        message = {
+            "metadata": {
+                "channel": "rocket_123",
+                "messageNumber": 2,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+
+        response = self.app.post(
+            '/messages/batch',
+            data="\n".join([json.dumps(message), json.dumps(message), "Not json"]),
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['accepted'], 1)
+        self.assertEqual(data['duplicate'], 1)
+        self.assertEqual(data['invalid'], 1)
+
+    def test_post_message_batch_invalid(self):
+        """Test POST /messages/batch with a body that is not a list of messages."""
+        response = self.app.post(
+            '/messages/batch',
+            data=json.dumps({"metadata": {}}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_pipeline_ingest_mode(self):
+        """Test POST /messages enqueues messages in pipeline ingest mode."""
+        server.ingest_pipeline = IngestPipeline(control_center, worker_count=2)
+        try:
+            message = {
+                "metadata": {
+                    "channel": "rocket_123",
+                    "messageNumber": 1,
+                    "messageType": "RocketLaunched",
+                    "messageTime": self.test_time
+                },
+                "message": {"launchSpeed": 1000, "type": "Falcon", "mission": "MoonLanding"}
+            }
+            response = self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+            self.assertEqual(response.status_code, 202)
+
+            response = self.app.post('/messages', data=json.dumps({"metadata": {}}), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+            server.ingest_pipeline.join()
+            self.assertIsNotNone(control_center.get_rocket_by_id('rocket_123'))
+
+            data = json.loads(self.app.get('/ingest/stats').data)
+            self.assertEqual(data['mode'], 'pipeline')
+            self.assertEqual(data['processed'], 1)
+        finally:
+            server.ingest_pipeline.stop()
+            server.ingest_pipeline = None
+
+        data = json.loads(self.app.get('/ingest/stats').data)
+        self.assertEqual(data['mode'], 'synchronous')
+
+    def test_get_buffer_stats(self):
+        """Test GET /buffers endpoint."""
+        self.test_post_message_valid()
+        message = {
+            "metadata": {
+                "channel": "rocket_123",
+                "messageNumber": 3,
+                "messageType": "RocketSpeedIncreased",
+                "messageTime": self.test_time
+            },
+            "message": {"by": 100}
+        }
+        self.app.post('/messages', data=json.dumps(message), content_type='application/json')
+
+        response = self.app.get('/buffers?top=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['totals']['messages'], 1)
+        self.assertEqual(data['buffering_rockets'], 1)
+        self.assertEqual(data['largest_buffers'][0]['id'], 'rocket_123')
+        self.assertIn('gap_timeout', data['limits'])
+
+    def test_get_metrics(self):
+        """Test GET /metrics endpoint."""
+        self.test_post_message_valid()
+
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        metrics = response.get_data(as_text=True)
+        self.assertIn('lunar_messages_total{type="RocketLaunched",outcome="accepted"}', metrics)
+        self.assertIn('lunar_rockets{status="launched"} 1', metrics)
+        self.assertIn('lunar_message_apply_seconds_bucket{le="+Inf"}', metrics)
+
     def test_invalid_endpoint(self):
         """Test invalid endpoint."""
         response = self.app.get('/invalid_endpoint')
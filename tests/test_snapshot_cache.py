@@ -0,0 +1,75 @@
+import json
+import unittest
+from rocket import Rocket
+from snapshot_cache import SnapshotCache
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.encoded = []
+
+        def dumps(value) -> str:
+            self.encoded.append(value)
+            return json.dumps(value, default=str)
+
+        self.cache = SnapshotCache(dumps, max_views=2)
+        self.test_rocket = Rocket(
+            id="rocket_123",
+            launch_time="2025-05-14T10:00:00",
+            last_update_time="2025-05-14T10:01:00",
+            last_message_number=1,
+            speed=1000,
+            rocket_type="Falcon",
+            mission="Moon Landing"
+        )
+
+    def test_rocket_json_reused_until_changed(self):
+        """Test that a rocket is only serialized again after it changed."""
+        first = self.cache.rocket_json(self.test_rocket)
+        self.assertEqual(self.cache.rocket_json(self.test_rocket), first)
+        self.assertEqual(len(self.encoded), 1)
+
+        self.test_rocket.increase_speed(500, "2025-05-14T10:02:00", 2)
+        self.assertEqual(json.loads(self.cache.rocket_json(self.test_rocket))["speed"], 1500)
+        self.assertEqual(len(self.encoded), 2)
+
+    def test_rockets_json(self):
+        """Test serializing a list of rockets."""
+        rockets = json.loads(self.cache.rockets_json([self.test_rocket, self.test_rocket]))
+        self.assertEqual([rocket["id"] for rocket in rockets], ["rocket_123", "rocket_123"])
+        self.assertEqual(json.loads(self.cache.rockets_json([])), [])
+
+    def test_view_rebuilt_on_version_change(self):
+        """Test that a view is only rebuilt when its version changes."""
+        builds = []
+
+        def build():
+            builds.append(1)
+            return (b"[]", {})
+
+        self.cache.view("rockets", 1, build)
+        self.cache.view("rockets", 1, build)
+        self.assertEqual(len(builds), 1)
+
+        self.cache.view("rockets", 2, build)
+        self.assertEqual(len(builds), 2)
+
+    def test_view_eviction(self):
+        """Test that least recently used views are evicted."""
+        builds = []
+
+        def build():
+            builds.append(1)
+            return (b"[]", {})
+
+        for key in ("a", "b", "c", "a"):
+            self.cache.view(key, 1, build)
+        self.assertEqual(len(builds), 4)
+
+    def test_etag_per_version(self):
+        """Test that entity tags differ between versions."""
+        self.assertEqual(self.cache.etag(1), self.cache.etag(1))
+        self.assertNotEqual(self.cache.etag(1), self.cache.etag(2))
+
+if __name__ == '__main__':
+    unittest.main()